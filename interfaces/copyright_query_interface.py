@@ -1,16 +1,18 @@
 from PySide6.QtWidgets import (
-    QVBoxLayout, QHBoxLayout, QTextEdit, QLabel, QFileDialog,
+    QVBoxLayout, QHBoxLayout, QLabel, QFileDialog,
     QProgressBar, QDialog, QPushButton, QMessageBox
 )
 from PySide6.QtCore import Qt, QThread, Signal, QObject, QTimer
 from qfluentwidgets import PrimaryPushButton
 from .base_interface import BaseInterface
+from .log_view import LogView
 import sys
 import os
 
 # 导入著作权查询功能
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.copyright_query import CopyrightQuery
+from utils.progress_channel import ProgressChannel, ERROR
 
 class LoginConfirmationDialog(QDialog):
     """登录确认对话框"""
@@ -50,16 +52,16 @@ class CopyrightQueryWorker(QObject):
     """著作权查询工作线程"""
     
     finished = Signal()
-    progress = Signal(str)
     progress_percent = Signal(int)
     login_required = Signal()
     anti_crawl_detected = Signal()  # 新增反爬检测信号
     login_confirmed = Signal(bool)
     error_occurred = Signal(str)
     
-    def __init__(self, excel_file):
+    def __init__(self, excel_file, channel):
         super().__init__()
         self.excel_file = excel_file
+        self.channel = channel  # 进度日志通道（由界面按固定帧率刷新显示）
         self.is_running = True
         self.waiting_for_login = False
         self.copyright_query = None
@@ -68,14 +70,14 @@ class CopyrightQueryWorker(QObject):
     def run(self):
         """执行著作权查询"""
         try:
-            self.progress.emit("初始化著作权查询工具...")
+            self.channel.post("初始化著作权查询工具...")
             self.copyright_query = CopyrightQuery()
             
             # 创建进度回调函数
             def progress_callback(message, percent=None):
                 if not self.is_running:
                     return False  # 返回False将终止查询
-                self.progress.emit(message)
+                self.channel.post(message)
                 if percent is not None:
                     self.progress_percent.emit(percent)
                 return True  # 返回True继续查询
@@ -102,23 +104,25 @@ class CopyrightQueryWorker(QObject):
             self.copyright_query.set_login_confirm_callback(login_confirm_callback)
             
             # 开始查询
-            self.progress.emit("开始处理Excel文件...")
+            self.channel.post("开始处理Excel文件...")
             self.progress_percent.emit(5)
             
             if self.is_running:
                 # 如果有保存的索引，从该索引继续处理
                 start_index = self.copyright_query.current_game_index
-                result_file = self.copyright_query.process_excel(self.excel_file, start_from_index=start_index)
+                # 取消令牌注册到任务管理器，程序退出时同样会立即取消查询
+                with self.copyright_query.cancel_token:
+                    result_file = self.copyright_query.process_excel(self.excel_file, start_from_index=start_index)
                 if result_file:
-                    self.progress.emit(f"查询完成！结果已保存到: {result_file}")
+                    self.channel.post(f"查询完成！结果已保存到: {result_file}")
                 else:
-                    self.progress.emit("查询未完成，可能发生了错误")
+                    self.channel.post("查询未完成，可能发生了错误")
             else:
-                self.progress.emit("查询已被用户取消")
+                self.channel.post("查询已被用户取消")
         
         except Exception as e:
             self.error_occurred.emit(f"发生错误: {str(e)}")
-            self.progress.emit(f"查询过程中发生错误: {str(e)}")
+            self.channel.post(f"查询过程中发生错误: {str(e)}", ERROR)
         
         finally:
             self.progress_percent.emit(100)
@@ -135,9 +139,10 @@ class CopyrightQueryWorker(QObject):
         if self.waiting_for_login:
             self.on_login_confirmation(False)
         
-        # 如果copyright_query已经初始化，设置其paused为True以终止操作
+        # 如果copyright_query已经初始化，设置其paused为True并取消令牌：等待中的操作立即结束，浏览器随即关闭
         if self.copyright_query:
             self.copyright_query.paused = True
+            self.copyright_query.cancel_token.cancel()
             # 确保进度停止更新
             if hasattr(self.copyright_query, 'progress_callback'):
                 def terminated_callback(message, percent=None):
@@ -172,8 +177,9 @@ class CopyrightQueryInterface(BaseInterface):
         )
         explanation_label.setWordWrap(True)
 
-        self.output_text_edit = QTextEdit()
-        self.output_text_edit.setReadOnly(True)
+        self.output_text_edit = LogView("copyright")
+        self.channel = ProgressChannel("copyright", parent=self)
+        self.channel.flushed.connect(self.on_progress)
         self.output_text_edit.setPlaceholderText("著作权人查询日志将显示在这里...")
         
         self.progress_bar = QProgressBar()
@@ -209,7 +215,7 @@ class CopyrightQueryInterface(BaseInterface):
         """开始查询著作权信息"""
         # 创建工作线程
         self.thread = QThread()
-        self.worker = CopyrightQueryWorker(excel_path)
+        self.worker = CopyrightQueryWorker(excel_path, self.channel)
         self.worker.moveToThread(self.thread)
 
         # 连接信号
@@ -219,7 +225,6 @@ class CopyrightQueryInterface(BaseInterface):
         self.thread.finished.connect(self.thread.deleteLater)
         self.thread.finished.connect(self.on_query_finished)
 
-        self.worker.progress.connect(self.on_progress)
         self.worker.progress_percent.connect(self.on_percent)
         self.worker.error_occurred.connect(self.on_error)
         self.worker.login_required.connect(self.on_login_required)
@@ -232,6 +237,7 @@ class CopyrightQueryInterface(BaseInterface):
         self.progress_bar.setValue(0)
 
         # 启动线程
+        self.channel.start()
         self.thread.start()
 
     def on_login_required(self, is_anti_crawl=False):
@@ -250,9 +256,6 @@ class CopyrightQueryInterface(BaseInterface):
     def on_progress(self, msg):
         """更新进度消息"""
         self.output_text_edit.append(msg)
-        # 滚动到底部
-        scrollbar = self.output_text_edit.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
 
     def on_percent(self, val):
         """更新进度条"""
@@ -283,6 +286,7 @@ class CopyrightQueryInterface(BaseInterface):
 
     def on_query_finished(self):
         """查询完成后的处理"""
+        self.channel.stop()
         self.progress_bar.setValue(100)
         self.cancel_button.setVisible(False)
         self.cancel_button.setEnabled(True)
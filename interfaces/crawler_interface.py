@@ -1,45 +1,56 @@
 # interfaces/crawler_interface.py
 
 from PySide6.QtWidgets import (
-    QVBoxLayout, QHBoxLayout, QTextEdit, QLabel, QFrame,
+    QVBoxLayout, QHBoxLayout, QLabel, QFrame,
     QDateEdit, QCheckBox, QProgressBar
 )
 from PySide6.QtCore import Qt, QDate, QObject, QThread, Signal
-from qfluentwidgets import PrimaryPushButton, ToolButton, FluentIcon as FIF
+from qfluentwidgets import PrimaryPushButton, PushButton, ToolButton, FluentIcon as FIF
 from .base_interface import BaseInterface
+from .log_view import LogView
 from utils.crawler import crawl_new_games
+from utils.cancellation import CancellationToken
+from utils.progress_channel import ProgressChannel, ERROR
 
 
 class CrawlerWorker(QObject):
     finished = Signal()
-    progress = Signal(str)
     progress_percent = Signal(int,int)  # (value, stage)
 
-    def __init__(self, start_date, end_date, enable_version_match=True):
+    def __init__(self, start_date, end_date, channel, enable_version_match=True, resume=False):
         super().__init__()
+        self.channel = channel  # 进度日志通道（由界面按固定帧率刷新显示）
         self.start_date = start_date
         self.end_date = end_date
         self.enable_version_match = enable_version_match
+        self.resume = resume
+        self.cancel_token = CancellationToken("新游爬取")
+
+    def stop(self):
+        """停止任务：等待中的操作立即结束，浏览器随即关闭（可在GUI线程直接调用）"""
+        self.cancel_token.cancel()
 
     def run(self):
         # 包装回调
-        def pcallback(msg):
-            self.progress.emit(msg)
         def ppercent(value, stage):
             # stage=0 => 爬虫; stage=1 => 匹配
             self.progress_percent.emit(value, stage)
 
         try:
-            crawl_new_games(
-                start_date_str=self.start_date,
-                end_date_str=self.end_date,
-                progress_callback=pcallback,
-                enable_version_match=self.enable_version_match,
-                progress_percent_callback=ppercent
-            )
+            # 取消令牌注册到任务管理器，程序退出时同样会立即取消任务
+            with self.cancel_token:
+                crawl_new_games(
+                    start_date_str=self.start_date,
+                    end_date_str=self.end_date,
+                    progress_callback=self.channel,
+                    enable_version_match=self.enable_version_match,
+                    progress_percent_callback=ppercent,
+                    resume=self.resume,
+                    cancel_token=self.cancel_token
+                )
         except Exception as e:
             # 其他未捕获异常
-            self.progress.emit(f"爬虫出现异常: {e}")
+            self.channel.post(f"爬虫出现异常: {e}", ERROR)
         finally:
             self.finished.emit()
 
@@ -55,19 +66,29 @@ class CrawlerInterface(BaseInterface):
         self.start_button = PrimaryPushButton("开始爬取")
         self.start_button.clicked.connect(self.handle_start)
 
+        self.stop_button = PushButton("停止")
+        self.stop_button.clicked.connect(self.handle_stop)
+        self.stop_button.setEnabled(False)
+
         self.expand_button = ToolButton(FIF.CHEVRON_DOWN_MED)
         self.expand_button.clicked.connect(self.toggle_expand)
 
         self.match_checkbox = QCheckBox("自动匹配版号")
         self.match_checkbox.setChecked(True)
 
+        self.resume_checkbox = QCheckBox("从上次中断处继续")
+        self.resume_checkbox.setChecked(False)
+
         header_layout.addWidget(self.start_button)
+        header_layout.addWidget(self.stop_button)
         header_layout.addWidget(self.expand_button)
         header_layout.addWidget(self.match_checkbox)
+        header_layout.addWidget(self.resume_checkbox)
         header_layout.addStretch()
 
         self.desc_label = QLabel(
-            "说明：默认爬取从今天到未来4天共5天的数据。\n勾选自动匹配版号则爬取完成后会重置进度条并进行匹配。"
+            "说明：默认爬取从今天到未来4天共5天的数据。\n勾选自动匹配版号则爬取完成后会重置进度条并进行匹配。\n"
+            "勾选从上次中断处继续则跳过相同日期范围内上次已爬完的日期。"
         )
         header_layout.addWidget(self.desc_label)
 
@@ -94,8 +115,9 @@ class CrawlerInterface(BaseInterface):
         self.config_layout.addWidget(ed_label)
         self.config_layout.addWidget(self.end_date_edit)
 
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
+        self.output_text = LogView("crawler")
+        self.channel = ProgressChannel("crawler", parent=self)
+        self.channel.flushed.connect(self.on_progress)
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0,100)
         self.progress_bar.setValue(0)
@@ -114,9 +136,10 @@ class CrawlerInterface(BaseInterface):
         sdate = self.start_date_edit.date().toString("yyyy-MM-dd")
         edate = self.end_date_edit.date().toString("yyyy-MM-dd")
         enable_match = self.match_checkbox.isChecked()
+        resume = self.resume_checkbox.isChecked()
 
         self.thread = QThread()
-        self.worker = CrawlerWorker(sdate, edate, enable_match)
+        self.worker = CrawlerWorker(sdate, edate, self.channel, enable_match, resume)
         self.worker.moveToThread(self.thread)
 
         self.thread.started.connect(self.worker.run)
@@ -124,20 +147,33 @@ class CrawlerInterface(BaseInterface):
         self.worker.finished.connect(self.worker.deleteLater)
         self.thread.finished.connect(self.thread.deleteLater)
 
-        self.worker.progress.connect(self.on_progress)
         self.worker.progress_percent.connect(self.on_percent)
 
         self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.stop_button.setText("停止")
         self.match_checkbox.setEnabled(False)
+        self.resume_checkbox.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.progress_bar.setFormat("进度: 0%")
 
+        self.channel.start()
         self.thread.start()
+        self.thread.finished.connect(self.channel.stop)
         self.thread.finished.connect(lambda: self.start_button.setEnabled(True))
+        self.thread.finished.connect(lambda: self.stop_button.setEnabled(False))
         self.thread.finished.connect(lambda: self.match_checkbox.setEnabled(True))
+        self.thread.finished.connect(lambda: self.resume_checkbox.setEnabled(True))
         self.thread.finished.connect(self.on_finish)
 
+    def handle_stop(self):
+        if self.stop_button.isEnabled():
+            self.stop_button.setEnabled(False)
+            self.stop_button.setText("正在停止...")
+            self.output_text.append("\n[提示] 正在停止任务，已爬完的数据会照常保存...")
+            self.worker.stop()
+
     def on_finish(self):
         self.output_text.append("\n[提示] 整体任务结束。")
 
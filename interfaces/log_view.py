@@ -0,0 +1,128 @@
+# interfaces/log_view.py
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListView, QFileDialog, QMessageBox
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QPainter
+from qfluentwidgets import PushButton
+
+from utils.progress_channel import LOG_VIEW_MAX_LINES, get_log_files
+
+class LogListModel(QAbstractListModel):
+    """只保留最近 max_lines 行的日志模型（超出时从头部整批删除）"""
+
+    def __init__(self, max_lines=LOG_VIEW_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self._lines = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._lines[index.row()]
+        return None
+
+    def append_lines(self, lines):
+        lines = lines[-self.max_lines:]
+        if not lines:
+            return
+        overflow = len(self._lines) + len(lines) - self.max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            del self._lines[:overflow]
+            self.endRemoveRows()
+        first = len(self._lines)
+        self.beginInsertRows(QModelIndex(), first, first + len(lines) - 1)
+        self._lines.extend(lines)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines = []
+        self.endResetModel()
+
+class _LogListView(QListView):
+    """行高统一的列表视图（只布局和绘制可见行），为空时显示占位提示"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.placeholder_text = ""
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setEditTriggers(QListView.NoEditTriggers)
+        self.setSelectionMode(QListView.ExtendedSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.placeholder_text and self.model() is not None and self.model().rowCount() == 0:
+            painter = QPainter(self.viewport())
+            painter.setPen(self.palette().placeholderText().color())
+            painter.drawText(self.viewport().rect().adjusted(6, 6, -6, -6),
+                             Qt.AlignLeft | Qt.AlignTop, self.placeholder_text)
+
+class LogView(QWidget):
+    """日志显示控件：替代 QTextEdit 追加日志的用法。
+    界面只保留最近 LOG_VIEW_MAX_LINES 行，且只渲染可见行，长时间运行也不会变慢；
+    "导出完整日志" 从磁盘上的日志文件（.crawler_cache/logs/<log_name>.log 及其滚动备份）导出全部内容"""
+
+    def __init__(self, log_name, max_lines=LOG_VIEW_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.log_name = log_name
+        self.model = LogListModel(max_lines, self)
+        self.view = _LogListView(self)
+        self.view.setModel(self.model)
+
+        self.export_button = PushButton("导出完整日志")
+        self.export_button.clicked.connect(self.export_full_log)
+        self.clear_button = PushButton("清空显示")
+        self.clear_button.clicked.connect(self.clear)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.clear_button)
+        button_layout.addWidget(self.export_button)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view)
+        layout.addLayout(button_layout)
+
+    def append(self, text):
+        """追加一段文本（可包含多行），视图原本停在底部时自动滚动到底部"""
+        scrollbar = self.view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        self.model.append_lines(str(text).split("\n"))
+        if at_bottom:
+            self.view.scrollToBottom()
+
+    def clear(self):
+        self.model.clear()
+
+    def setPlaceholderText(self, text):
+        self.view.placeholder_text = text
+        self.view.viewport().update()
+
+    def export_full_log(self):
+        """将磁盘上的完整日志（按时间从旧到新）合并导出到用户选择的文件"""
+        files = get_log_files(self.log_name)
+        if not files:
+            QMessageBox.information(self, "导出日志", "暂无日志文件可导出")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出完整日志", f"{self.log_name}_log.txt",
+                                              "Text Files (*.txt)")
+        if not path:
+            return
+        try:
+            with open(path, 'wb') as out:
+                for log_file in files:
+                    with open(log_file, 'rb') as f:
+                        while True:
+                            chunk = f.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            out.write(chunk)
+            QMessageBox.information(self, "导出日志", f"完整日志已导出到: {path}")
+        except Exception as e:
+            QMessageBox.critical(self, "导出日志", f"导出日志失败: {str(e)}")
@@ -13,7 +13,11 @@ import os
 import sys
 import time
 import json
-import requests
+from utils.http_transport import transport
+from utils.range_downloader import PART_SUFFIX, verify_file
+
+# 下载停滞超时（毫秒）：超过该时间没有任何进度才自动取消，大文件下载不再受总时长限制
+DOWNLOAD_STALL_TIMEOUT = 300000
 
 def resource_path(relative_path):
     """获取资源文件的绝对路径，兼容开发和打包后的环境"""
@@ -445,8 +449,11 @@ class SettingsInterface(BaseInterface):
         # 检查文件是否已存在
         filename = os.path.basename(download_url)
         save_path = os.path.join(os.getcwd(), filename)
+        version_checker = getattr(self, 'version_checker', None)
+        sha256 = version_checker.get_asset_sha256(download_url) if version_checker else None
         
-        if os.path.exists(save_path):
+        # 有 SHA-256 时由下载线程校验已存在的文件（校验通过则直接使用），否则询问是否重新下载
+        if os.path.exists(save_path) and not sha256:
             reply = QMessageBox.question(
                 self,
                 "文件已存在",
@@ -466,7 +473,7 @@ class SettingsInterface(BaseInterface):
         
         # 创建并配置新的下载工作器
         self.download_thread = QThread()
-        self.download_worker = DownloadWorker(download_url)
+        self.download_worker = DownloadWorker(download_url, sha256=sha256)
         self.download_worker.moveToThread(self.download_thread)
         
         # 连接信号
@@ -475,11 +482,11 @@ class SettingsInterface(BaseInterface):
         self.download_worker.finished.connect(self.on_download_finished)
         self.download_worker.finished.connect(lambda: self.cleanup_download_resources())
         
-        # 设置下载超时计时器
+        # 设置下载停滞计时器：每次收到进度时重新计时，超过5分钟没有进展才取消
         self.download_timeout_timer = QTimer()
         self.download_timeout_timer.setSingleShot(True)
         self.download_timeout_timer.timeout.connect(self.handle_download_timeout)
-        self.download_timeout_timer.start(300000)  # 5分钟超时
+        self.download_timeout_timer.start(DOWNLOAD_STALL_TIMEOUT)
         
         # 更新UI状态
         self.download_progress_bar.setValue(0)
@@ -495,7 +502,10 @@ class SettingsInterface(BaseInterface):
         # 开始下载
         try:
             self.download_thread.start()
-            self.output_text_edit.append(f"开始下载 {filename}...")
+            if os.path.exists(save_path + PART_SUFFIX):
+                self.output_text_edit.append(f"检测到未完成的下载，继续下载 {filename}...")
+            else:
+                self.output_text_edit.append(f"开始下载 {filename}...")
         except Exception as e:
             self.output_text_edit.append(f"启动下载线程失败: {str(e)}")
             self.cleanup_download_resources()
@@ -504,7 +514,7 @@ class SettingsInterface(BaseInterface):
     def handle_download_timeout(self):
         """处理下载超时"""
         if self.download_worker and self.download_thread and self.download_thread.isRunning():
-            self.output_text_edit.append("下载超时，自动取消")
+            self.output_text_edit.append("下载长时间没有进展，自动取消")
             self.cancel_download()
             
             # 确保UI恢复
@@ -552,12 +562,15 @@ class SettingsInterface(BaseInterface):
     def report_download_progress(self, percent, message):
         """更新下载进度"""
         self.download_progress_bar.setValue(percent)
+        if hasattr(self, 'download_timeout_timer') and self.download_timeout_timer.isActive():
+            self.download_timeout_timer.start(DOWNLOAD_STALL_TIMEOUT)
         
         current_time = time.time()
         if not self._download_start_time:
             self._download_start_time = current_time
             self._last_update_time = current_time
-            self._last_bytes = 0
+            # 续传时从已下载的字节数开始计算速度
+            self._last_bytes = getattr(self.download_worker, 'downloaded_bytes', 0)
             
         if current_time - self._last_update_time >= 0.5:  # 每0.5秒更新一次速度
             if hasattr(self.download_worker, 'downloaded_bytes'):
@@ -579,8 +592,8 @@ class SettingsInterface(BaseInterface):
             self.output_text_edit.append(message)
 
     def on_download_finished(self, success, file_path):
-        # 清理临时文件
-        if not success and os.path.exists(file_path):
+        # 清理临时文件（未完成的 .part 文件保留用于续传）
+        if not success and file_path and os.path.exists(file_path):
             try:
                 os.remove(file_path)
             except Exception as e:
@@ -604,17 +617,13 @@ class SettingsInterface(BaseInterface):
             download_folder = os.path.dirname(file_path)
             QDesktopServices.openUrl(QUrl.fromLocalFile(download_folder))
         else:
-            self.output_text_edit.append("下载失败，请检查网络连接或文件写入权限。")
-            QMessageBox.warning(self, "下载失败", "下载最新版本时出错，请检查网络连接或文件写入权限。")
+            self.output_text_edit.append("下载未完成，请检查网络连接或文件写入权限。")
+            QMessageBox.warning(self, "下载未完成", "下载最新版本未完成，请检查网络连接或文件写入权限。\n\n已下载的部分会保留，再次下载时将从中断处继续。")
         self.check_update_button.setEnabled(True)
 
-    def verify_download(self, file_path, expected_size=None):
-        """验证下载文件的完整性"""
-        if not os.path.exists(file_path):
-            return False
-        if expected_size and os.path.getsize(file_path) != expected_size:
-            return False
-        return True
+    def verify_download(self, file_path, expected_size=None, expected_sha256=None):
+        """验证下载文件的完整性（大小与 SHA-256）"""
+        return verify_file(file_path, expected_size, expected_sha256)
 
     def save_download_progress(self, url, downloaded_bytes):
         """保存下载进度"""
@@ -631,7 +640,7 @@ class SettingsInterface(BaseInterface):
     def check_network(self):
         """检查网络连接状态"""
         try:
-            requests.get('https://www.baidu.com', timeout=3)
+            transport.get('https://www.baidu.com', timeout=3, retry=False)
             return True
         except:
             return False
@@ -1,40 +1,51 @@
 # interfaces/version_matching_interface.py
 
 from PySide6.QtWidgets import (
-    QVBoxLayout, QHBoxLayout, QTextEdit, QLabel, QFileDialog,
-    QProgressBar
+    QVBoxLayout, QHBoxLayout, QLabel, QFileDialog,
+    QProgressBar, QCheckBox
 )
 from PySide6.QtCore import Qt, QThread, Signal, QObject
-from qfluentwidgets import PrimaryPushButton
+from qfluentwidgets import PrimaryPushButton, PushButton
 from .base_interface import BaseInterface
+from .log_view import LogView
 from utils.crawler import match_version_numbers
+from utils.cancellation import CancellationToken
+from utils.progress_channel import ProgressChannel, ERROR
 
 class VersionMatchWorker(QObject):
     finished = Signal()
-    progress = Signal(str)
     progress_percent = Signal(int)
 
-    def __init__(self, excel_file):
+    def __init__(self, excel_file, channel, resume=False):
         super().__init__()
+        self.channel = channel  # 进度日志通道（由界面按固定帧率刷新显示）
         self.excel_file = excel_file
+        self.resume = resume
+        self.cancel_token = CancellationToken("版号匹配")
+
+    def stop(self):
+        """停止匹配：等待中的操作立即结束，浏览器随即关闭（可在GUI线程直接调用）"""
+        self.cancel_token.cancel()
 
     def run(self):
-        def pcallback(msg):
-            self.progress.emit(msg)
         def local_percent(val, _unused):
             """match_version_numbers(val, stage) => 2 params
                这里只用 val，忽略 stage"""
             self.progress_percent.emit(val)
 
         try:
-            match_version_numbers(
-                excel_filename=self.excel_file,
-                progress_callback=pcallback,
-                progress_percent_callback=local_percent,
-                create_new_file=True  # 在单独界面 => 另存
-            )
+            # 取消令牌注册到任务管理器，程序退出时同样会立即取消任务
+            with self.cancel_token:
+                match_version_numbers(
+                    excel_filename=self.excel_file,
+                    progress_callback=self.channel,
+                    progress_percent_callback=local_percent,
+                    create_new_file=True,  # 在单独界面 => 另存
+                    resume=self.resume,
+                    cancel_token=self.cancel_token
+                )
         except Exception as e:
-            self.progress.emit(f"版号匹配过程中发生错误: {e}")
+            self.channel.post(f"版号匹配过程中发生错误: {e}", ERROR)
         finally:
             self.finished.emit()
 
@@ -49,17 +60,26 @@ class VersionMatchingInterface(BaseInterface):
         header_layout = QHBoxLayout()
         self.upload_button = PrimaryPushButton("选择Excel文件并匹配")
         self.upload_button.clicked.connect(self.handle_upload)
+        self.stop_button = PushButton("停止")
+        self.stop_button.clicked.connect(self.handle_stop)
+        self.stop_button.setEnabled(False)
+        self.resume_checkbox = QCheckBox("从上次中断处继续")
+        self.resume_checkbox.setChecked(False)
         header_layout.addWidget(self.upload_button)
+        header_layout.addWidget(self.stop_button)
+        header_layout.addWidget(self.resume_checkbox)
         header_layout.addStretch()
 
         explanation_label = QLabel(
             "说明：请选择包含“游戏名称”列的Excel，执行自动版号匹配。\n"
-            "进度条会随每2~3条输出更新。会另存一个“xxx-已匹配版号.xlsx”副本。"
+            "进度条会随每2~3条输出更新。会另存一个“xxx-已匹配版号.xlsx”副本。\n"
+            "勾选“从上次中断处继续”则对同一文件跳过上次已匹配的游戏。"
         )
         explanation_label.setWordWrap(True)
 
-        self.output_text_edit = QTextEdit()
-        self.output_text_edit.setReadOnly(True)
+        self.output_text_edit = LogView("version_match")
+        self.channel = ProgressChannel("version_match", parent=self)
+        self.channel.flushed.connect(self.on_progress)
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0,100)
         self.progress_bar.setValue(0)
@@ -80,7 +100,7 @@ class VersionMatchingInterface(BaseInterface):
             if files:
                 excel_path=files[0]
                 self.thread=QThread()
-                self.worker=VersionMatchWorker(excel_path)
+                self.worker=VersionMatchWorker(excel_path, self.channel, self.resume_checkbox.isChecked())
                 self.worker.moveToThread(self.thread)
 
                 self.thread.started.connect(self.worker.run)
@@ -88,17 +108,30 @@ class VersionMatchingInterface(BaseInterface):
                 self.worker.finished.connect(self.worker.deleteLater)
                 self.thread.finished.connect(self.thread.deleteLater)
 
-                self.worker.progress.connect(self.on_progress)
                 self.worker.progress_percent.connect(self.on_percent)
 
                 self.upload_button.setEnabled(False)
+                self.stop_button.setEnabled(True)
+                self.stop_button.setText("停止")
+                self.resume_checkbox.setEnabled(False)
                 self.progress_bar.setVisible(True)
                 self.progress_bar.setValue(0)
 
+                self.channel.start()
                 self.thread.start()
+                self.thread.finished.connect(self.channel.stop)
                 self.thread.finished.connect(lambda: self.upload_button.setEnabled(True))
+                self.thread.finished.connect(lambda: self.stop_button.setEnabled(False))
+                self.thread.finished.connect(lambda: self.resume_checkbox.setEnabled(True))
                 self.thread.finished.connect(self.on_match_finished)
 
+    def handle_stop(self):
+        if self.stop_button.isEnabled():
+            self.stop_button.setEnabled(False)
+            self.stop_button.setText("正在停止...")
+            self.output_text_edit.append("\n正在停止匹配，已匹配的结果会照常保存...")
+            self.worker.stop()
+
     def on_progress(self, msg):
         self.output_text_edit.append(msg)
 
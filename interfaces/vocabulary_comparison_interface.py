@@ -6,7 +6,7 @@ from PySide6.QtWidgets import (
 )
 from qfluentwidgets import PrimaryPushButton
 from .base_interface import BaseInterface
-from utils.vocabulary_comparison import VocabularyComparisonProcessor
+from utils.vocabulary_comparison import VocabularyComparisonProcessor, MultiVocabularyComparisonProcessor
 import os
 
 class VocabularyComparisonInterface(BaseInterface):
@@ -21,7 +21,10 @@ class VocabularyComparisonInterface(BaseInterface):
 
     def init_ui(self):
         # 说明文本
-        instruction_label = QLabel("说明：可分别选择A、B两个词表进行对比并查看结果，结果默认输出在词表A的地址中。")
+        instruction_label = QLabel(
+            "说明：可分别选择A、B两个词表进行对比并查看结果，结果默认输出在词表A的地址中。\n"
+            "多词表对照：一次选择多个词表，输出各词表的出现矩阵、合并词表、共有词汇及各自独有的词汇，结果输出在第一个词表的地址中。"
+        )
         instruction_label.setWordWrap(True)
         #instruction_label.setStyleSheet("font-weight: bold; margin-bottom: 10px;")
 
@@ -49,6 +52,10 @@ class VocabularyComparisonInterface(BaseInterface):
         self.compare_button.clicked.connect(self.handle_compare)
         self.compare_button.setEnabled(False)  # 初始禁用
 
+        # 多词表对照按钮
+        self.multi_compare_button = PrimaryPushButton("多词表对照")
+        self.multi_compare_button.clicked.connect(self.handle_multi_compare)
+
         # 结果输出区域
         self.result_text_edit = QTextEdit()
         self.result_text_edit.setReadOnly(True)
@@ -58,6 +65,7 @@ class VocabularyComparisonInterface(BaseInterface):
         self.layout.addWidget(instruction_label)  # 添加说明文本
         self.layout.addLayout(file_selection_layout)
         self.layout.addWidget(self.compare_button)
+        self.layout.addWidget(self.multi_compare_button)
         self.layout.addWidget(self.result_text_edit)
 
     def select_a_file(self):
@@ -79,10 +87,25 @@ class VocabularyComparisonInterface(BaseInterface):
             self.check_files_selected()
 
     def check_files_selected(self):
-        """检查是否已选择两个文件"""
-        if self.a_file_path and self.b_file_path:
+        """检查是否已选择两个文件（对照任务运行期间保持禁用）"""
+        if self.a_file_path and self.b_file_path and self.thread is None:
             self.compare_button.setEnabled(True)
 
+    def set_running(self, running):
+        """两种对照共用同一个线程，任一任务运行期间同时禁用两个按钮，结束后恢复"""
+        if running:
+            self.compare_button.setEnabled(False)
+            self.multi_compare_button.setEnabled(False)
+        else:
+            self.multi_compare_button.setEnabled(True)
+            self.check_files_selected()
+
+    def cleanup_thread(self):
+        if self.thread is not None:
+            self.thread.quit()
+            self.thread.wait()
+            self.thread = None
+
     def handle_compare(self):
         if not self.a_file_path or not self.b_file_path:
             QMessageBox.warning(self, "文件未选择", "请先选择A词表和B词表文件。")
@@ -95,7 +118,7 @@ class VocabularyComparisonInterface(BaseInterface):
             return
 
         # 禁用按钮，防止重复点击
-        self.compare_button.setEnabled(False)
+        self.set_running(True)
         self.result_text_edit.append("开始词表对照...")
 
         # 启动处理器线程
@@ -124,10 +147,43 @@ class VocabularyComparisonInterface(BaseInterface):
             )
             self.result_text_edit.append(result_text)
             QMessageBox.information(self, "对照完成", "词表对照已完成并保存。")
-        # 重新启用按钮
-        self.compare_button.setEnabled(True)
-        # 清理线程
-        if self.thread is not None:
-            self.thread.quit()
-            self.thread.wait()
-            self.thread = None
+        # 清理线程后重新启用按钮
+        self.cleanup_thread()
+        self.set_running(False)
+
+    def handle_multi_compare(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "选择多个词表文件", "", "文档文件 (*.docx *.xlsx *.xls *.txt)"
+        )
+        if not files:
+            return
+        if len(files) < 2:
+            QMessageBox.warning(self, "文件不足", "请至少选择两个词表文件。")
+            return
+
+        # 输出目录为第一个词表所在目录
+        output_dir = os.path.dirname(files[0])
+
+        # 禁用按钮，防止重复点击
+        self.set_running(True)
+        self.result_text_edit.append(f"开始多词表对照，共 {len(files)} 个词表...")
+
+        self.thread = QThread()
+        self.processor = MultiVocabularyComparisonProcessor(files, output_dir)
+        self.processor.moveToThread(self.thread)
+        self.thread.started.connect(self.processor.run)
+        self.processor.finished.connect(self.on_multi_finished)
+        self.processor.finished.connect(self.processor.deleteLater)
+        self.thread.finished.connect(self.thread.deleteLater)
+        self.thread.start()
+
+    def on_multi_finished(self, output_path, summary):
+        if output_path.startswith("错误:"):
+            QMessageBox.critical(self, "对照失败", output_path)
+            self.result_text_edit.append(output_path)
+        else:
+            self.result_text_edit.append("\n".join(summary + [f"对照结果已保存至: {output_path}"]))
+            QMessageBox.information(self, "对照完成", "多词表对照已完成并保存。")
+        # 清理线程后重新启用按钮
+        self.cleanup_thread()
+        self.set_running(False)
@@ -285,7 +285,8 @@ class WelcomeInterface(BaseInterface):
                 background-color: #bdc3c7;
             }
         """)
-        self.check_env_button.clicked.connect(self.run_environment_check)
+        # 手动检测时忽略缓存的检测结论，始终启动浏览器完整验证
+        self.check_env_button.clicked.connect(lambda: self.run_environment_check(force_full_check=True))
 
         description_label = QLabel("每次运行软件时会自动检测运行环境\n需要已安装Edge浏览器")
         description_label.setStyleSheet("""
@@ -366,8 +367,8 @@ class WelcomeInterface(BaseInterface):
         super().resizeEvent(event)
         self.overlay.resize(self.size())
 
-    def run_environment_check(self):
-        """执行环境检测"""
+    def run_environment_check(self, force_full_check=False):
+        """执行环境检测（force_full_check=False 时运行环境未变化则跳过浏览器启动验证）"""
         if hasattr(self, 'thread') and self.thread and self.thread.isRunning():
             return
 
@@ -385,7 +386,7 @@ class WelcomeInterface(BaseInterface):
 
         # 创建新的线程和工作对象
         self.thread = QThread()
-        self.environment_checker = EnvironmentChecker()
+        self.environment_checker = EnvironmentChecker(force_full_check=force_full_check)
         self.environment_checker.moveToThread(self.thread)
 
         # 连接信号
@@ -2,16 +2,17 @@
 
 import sys
 import os
+import multiprocessing
 import psutil  # 导入 psutil 库
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
 from window.main_window import MainWindow
 # 导入任务管理器
 from utils.task_manager import task_manager
-import tempfile
-import glob
-import shutil
-import subprocess
+# 导入共享HTTP传输层
+from utils.http_transport import transport
+from utils.browser_standby import browser_standby
+from utils.profile_pool import profile_pool
 import time
 
 def resource_path(relative_path):
@@ -26,171 +27,19 @@ def cleanup_webdriver_temp_files():
     """启动时清理可能遗留的WebDriver临时文件夹和驱动进程"""
     try:
         print("正在清理WebDriver临时文件和相关驱动进程...")
-        # 清理临时目录中的所有WebDriver相关目录
-        temp_dir = tempfile.gettempdir()
-        patterns = ["edge_driver_*", "edge_temp_*", "edge_port_*", "edge_alt_*", "scoped_dir*"]
-        removed_count = 0
-        failed_count = 0
         
-        # 跳过需要保留的目录
-        skip_patterns = ["webdriver_cache_fixed"]
-        
-        # 第一阶段：彻底终止所有相关的驱动进程
-        terminated_processes = set()
-        
-        # 1. 使用taskkill强制终止所有 msedgedriver 进程 (Windows特定)
-        #    注意：不再终止 msedge.exe
-        if sys.platform == 'win32':
-            for process_name in ['msedgedriver.exe', 'EdgeWebDriver.exe']: # 移除了 'msedge.exe'
-                try:
-                    result = subprocess.run(
-                        f'taskkill /f /im {process_name}', 
-                        shell=True, 
-                        stdout=subprocess.DEVNULL, 
-                        stderr=subprocess.DEVNULL,
-                        timeout=3  # 设置超时
-                    )
-                    if result.returncode == 0:
-                        terminated_processes.add(process_name)
-                except subprocess.TimeoutExpired:
-                    print(f"终止进程 {process_name} 超时")
-                except Exception as e:
-                    pass
-            
-        # 2. 使用psutil更精确地查找和终止相关的驱动进程
-        #    注意：不再查找 msedge 关键字
-        process_keywords = ['msedgedriver', 'edgewebdriver'] # 移除了 'msedge'
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                # 确保 proc.info['name'] 存在且包含关键字
-                if proc.info.get('name') and any(keyword in proc.info['name'].lower() for keyword in process_keywords):
-                    try:
-                        proc_name = proc.info.get('name')
-                        proc.terminate()  # 先尝试温和终止
-                        try:
-                            # 等待进程终止，最多2秒
-                            gone, alive = psutil.wait_procs([proc], timeout=2)
-                            if proc in alive:
-                                proc.kill()  # 如果还活着，强制终止
-                            
-                            terminated_processes.add(proc_name)
-                        except Exception:
-                            proc.kill()  # 如果等待出错，直接强制终止
-                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                        pass
-            except Exception:
-                pass
-        
-        # 等待一段时间确保进程完全释放文件锁
-        if terminated_processes:
-            print(f"已终止以下驱动进程: {', '.join(terminated_processes)}")
-            time.sleep(1.5)  # 增加等待时间，确保资源完全释放
-        
-        # 第二阶段：智能清理临时文件
-        # 1. 收集所有需要清理的目录，先按修改时间排序
-        to_clean = []
-        for pattern in patterns:
-            for path in glob.glob(os.path.join(temp_dir, pattern)):
-                try:
-                    if os.path.isdir(path):
-                        # 检查是否是需要跳过的目录
-                        should_skip = False
-                        for skip_pattern in skip_patterns:
-                            if skip_pattern in path:
-                                print(f"跳过缓存目录: {path}")
-                                should_skip = True
-                                break
-                        
-                        if should_skip:
-                            continue
-                            
-                        # 获取目录修改时间
-                        mtime = os.path.getmtime(path)
-                        to_clean.append((path, mtime))
-                except Exception:
-                    pass
-        
-        # 按修改时间从旧到新排序
-        to_clean.sort(key=lambda x: x[1])
-        
-        # 2. 智能清理各个目录
-        for path, _ in to_clean:
-            try:
-                # 检查目录是否可访问
-                if not os.access(path, os.W_OK):
-                    print(f"无法访问目录: {path}，跳过清理")
-                    failed_count += 1
-                    continue
-                
-                # 尝试使用安全的方式删除
-                is_locked = False
-                
-                # 先检查目录中是否有锁定的文件
-                for root, dirs, files in os.walk(path, topdown=False):
-                    for name in files:
-                        file_path = os.path.join(root, name)
-                        try:
-                            # 尝试以写入模式打开文件，检查是否被锁定
-                            with open(file_path, 'a+'):
-                                pass
-                        except PermissionError:
-                            # 文件被锁定
-                            is_locked = True
-                            break
-                
-                if is_locked:
-                    print(f"目录 {path} 包含锁定的文件，尝试强制删除")
-                    # 使用系统命令强制删除 (Windows特定)
-                    if sys.platform == 'win32':
-                        try:
-                            subprocess.run(
-                                f'rmdir /s /q "{path}"', 
-                                shell=True, 
-                                stdout=subprocess.DEVNULL, 
-                                stderr=subprocess.DEVNULL,
-                                timeout=3
-                            )
-                            # 检查目录是否已被删除
-                            if not os.path.exists(path):
-                                removed_count += 1
-                            else:
-                                failed_count += 1
-                        except Exception:
-                            failed_count += 1
-                    else:
-                        # 非Windows系统，使用shutil
-                        shutil.rmtree(path, ignore_errors=True)
-                        if not os.path.exists(path):
-                            removed_count += 1
-                        else:
-                            failed_count += 1
-                else:
-                    # 目录未锁定，使用标准方法删除
-                    shutil.rmtree(path, ignore_errors=True)
-                    if not os.path.exists(path):
-                        removed_count += 1
-                    else:
-                        failed_count += 1
-            except Exception as e:
-                print(f"清理目录失败: {path}, 错误: {str(e)}")
-                failed_count += 1
-        
-        # 最后检查：再次确认是否有残留的驱动进程
-        # 注意：不再检查 msedge.exe
-        found_after_cleanup = []
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                if proc.info.get('name') and any(keyword in proc.info.get('name').lower() for keyword in process_keywords):
-                    found_after_cleanup.append(proc.info.get('name', f"PID-{proc.pid}"))
-            except:
-                pass
-        
-        if found_after_cleanup:
-            print(f"警告: 清理后仍有以下驱动进程: {', '.join(found_after_cleanup)}")
-        
-        # 输出清理结果
-        if removed_count > 0 or failed_count > 0:
-            print(f"启动清理结果: 成功移除 {removed_count} 个临时目录, {failed_count} 个失败")
+        # 第一阶段：终止上次运行异常退出后遗留的驱动/浏览器进程
+        #    只处理本程序记录过的进程（PID 与创建时间都吻合），不扫描也不影响其他程序或其他用户的浏览器
+        terminated_count = task_manager.reap_leftover_processes()
+        if terminated_count:
+            print(f"已终止上次运行遗留的 {terminated_count} 个驱动/浏览器进程")
+        
+        # 第二阶段：回收配置目录池
+        #    只读取清单：占用者已退出的目录回收为空闲供下次复用，超出配额的目录与旧版本遗留目录在后台删除，
+        #    不再逐个遍历并打开临时目录中的文件检测锁定
+        recovered = profile_pool.recover()
+        if recovered:
+            print(f"已回收上次运行遗留的 {recovered} 个浏览器配置目录")
     except Exception as e:
         print(f"启动清理时出错: {str(e)}")
         # 记录异常但不影响程序启动
@@ -236,39 +85,12 @@ def ensure_final_cleanup():
     try:
         # 1. 先清理任务管理器中的资源
         task_manager.cleanup_all_resources()
-        
-        # 2. 终止所有可能的残留驱动进程
-        #    注意：不再终止 msedge.exe
-        if sys.platform == 'win32':
-            for process_name in ['msedgedriver.exe', 'EdgeWebDriver.exe']: # 移除了 'msedge.exe'
-                try:
-                    subprocess.run(
-                        f'taskkill /f /im {process_name}', 
-                        shell=True, 
-                        stdout=subprocess.DEVNULL, 
-                        stderr=subprocess.DEVNULL,
-                        timeout=2
-                    )
-                except:
-                    pass
-        
-        # 3. 使用psutil确保干净退出
-        #    注意：不再查找 msedge
-        process_keywords = ['msedgedriver', 'edgewebdriver'] # 移除了 'msedge'
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                if (proc.info.get('name') and 
-                    any(keyword in proc.info.get('name').lower() for keyword in process_keywords) and
-                    proc.pid != os.getpid()):  # 确保不终止自己
-                    try:
-                        proc.terminate()
-                        gone, alive = psutil.wait_procs([proc], timeout=1)
-                        if proc in alive:
-                            proc.kill()
-                    except:
-                        pass
-            except:
-                pass
+        # 关闭共享HTTP连接池
+        transport.close()
+        # 关闭预热的待命浏览器
+        browser_standby.shutdown()
+        # 归还本程序仍占用的浏览器配置目录
+        profile_pool.release_all()
         
         print("最终清理完成。")
     except Exception as e:
@@ -342,4 +164,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # 打包后的程序在子进程（如词表并行解析）中需要此调用
+    multiprocessing.freeze_support()
     main()
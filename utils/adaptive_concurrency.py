@@ -0,0 +1,203 @@
+# utils/adaptive_concurrency.py
+
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.task_manager import task_manager
+from utils.cancellation import TaskCancelled
+
+# 页面中出现这些关键字时视为触发了网站反爬/限流
+ANTI_CRAWL_KEYWORDS = [
+    "访问过于频繁", "请求过于频繁", "操作过于频繁", "访问受限", "请稍后再试",
+    "验证码", "安全验证", "人机验证", "403 Forbidden", "429 Too Many Requests",
+    "Access Denied",
+]
+
+class AntiCrawlDetected(RuntimeError):
+    """检测到反爬/限流信号，任务函数抛出该异常时控制器会立即降速"""
+    pass
+
+def detect_anti_crawl(driver):
+    """检查当前页面是否为反爬/限流页面，返回命中的关键字（未命中返回 None）"""
+    try:
+        text = f"{driver.title or ''}\n{driver.page_source or ''}"
+    except Exception:
+        return None
+    for kw in ANTI_CRAWL_KEYWORDS:
+        if kw in text:
+            return kw
+    return None
+
+class AdaptiveController:
+    """自适应并发控制器：
+    - 根据最近一段时间的耗时、失败率和反爬信号动态调整同时运行的任务数与请求间隔
+    - 运行正常且耗时稳定时逐步加速（每次 +1 个并发，间隔缩短），出错时降速，遇到反爬立即减半
+    - 并发数始终限制在 [min_workers, max_workers]，间隔限制在 [min_delay, max_delay]
+    - 传入 cancel_token 时，并发闸门和请求间隔的等待在任务取消后立即抛出 TaskCancelled
+    """
+
+    def __init__(self, name, initial_workers, max_workers, min_workers=1,
+                 initial_delay=(0.5, 1.5), min_delay=0.2, max_delay=10.0,
+                 window=10, error_threshold=0.3, latency_factor=1.5, cancel_token=None):
+        self.name = name
+        self.cancel_token = cancel_token
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.limit = min(max(initial_workers, self.min_workers), self.max_workers)
+        self.delay_low, self.delay_high = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+
+        self.in_flight = 0
+        self.samples = deque(maxlen=window)  # (耗时, 是否成功)
+        self.baseline_latency = None          # 观察到的最快正常耗时（滑动基准）
+        self.samples_since_change = 0
+        self._cond = threading.Condition()
+
+    # ------------------------------------------------------------------
+    # 并发闸门
+    # ------------------------------------------------------------------
+    def acquire(self):
+        """等待直到当前运行任务数低于并发上限（任务取消时抛出 TaskCancelled）"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._check_cancelled()
+                self._cond.wait(timeout=0.5)
+            self._check_cancelled()
+            self.in_flight += 1
+
+    def _check_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def release(self):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # 请求间隔
+    # ------------------------------------------------------------------
+    def pause(self):
+        """按当前自适应间隔随机等待，替代固定的 random_delay"""
+        with self._cond:
+            low, high = self.delay_low, self.delay_high
+        if self.cancel_token is not None:
+            self.cancel_token.sleep(random.uniform(low, high))
+        else:
+            time.sleep(random.uniform(low, high))
+
+    def _scale_delay(self, factor):
+        self.delay_low = min(max(self.delay_low * factor, self.min_delay), self.max_delay)
+        self.delay_high = min(max(self.delay_high * factor, self.delay_low), self.max_delay)
+
+    # ------------------------------------------------------------------
+    # 反馈
+    # ------------------------------------------------------------------
+    def record(self, latency, ok=True, blocked=False):
+        """记录一次任务的结果并据此调整并发数与间隔"""
+        with self._cond:
+            if blocked:
+                # 反爬信号：并发减半、间隔翻倍，并重新开始观察
+                self.limit = max(self.min_workers, self.limit // 2)
+                self._scale_delay(2.0)
+                self.samples.clear()
+                self.samples_since_change = 0
+                self._cond.notify_all()
+                print(f"[{self.name}] 检测到反爬信号，并发降至 {self.limit}，"
+                      f"间隔调整为 {self.delay_low:.1f}~{self.delay_high:.1f} 秒")
+                return
+
+            self.samples.append((latency, ok))
+            self.samples_since_change += 1
+            if ok and (self.baseline_latency is None or latency < self.baseline_latency):
+                self.baseline_latency = latency
+
+            if len(self.samples) < min(self.window, 3):
+                return
+            errors = sum(1 for (_, s) in self.samples if not s)
+            error_rate = errors / len(self.samples)
+            ok_latencies = sorted(l for (l, s) in self.samples if s)
+            median_latency = ok_latencies[len(ok_latencies) // 2] if ok_latencies else None
+
+            if error_rate > self.error_threshold:
+                # 失败率过高：降一档并发，间隔放大
+                if self.samples_since_change >= self.limit:
+                    self.limit = max(self.min_workers, self.limit - 1)
+                    self._scale_delay(1.5)
+                    self.samples_since_change = 0
+            elif (median_latency is not None and self.baseline_latency
+                  and median_latency > self.baseline_latency * self.latency_factor * 2):
+                # 耗时明显上升（服务端开始变慢）：保持并发，放大间隔
+                if self.samples_since_change >= self.limit:
+                    self._scale_delay(1.25)
+                    self.samples_since_change = 0
+            elif errors == 0 and self.samples_since_change >= self.window // 2:
+                # 一段时间内全部成功且耗时平稳：加一档并发，缩短间隔
+                if (median_latency is None or self.baseline_latency is None
+                        or median_latency <= self.baseline_latency * self.latency_factor):
+                    self.limit = min(self.max_workers, self.limit + 1)
+                self._scale_delay(0.8)
+                self.samples_since_change = 0
+                self._cond.notify_all()
+
+    def stats(self):
+        """返回当前控制状态，便于输出日志"""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "delay": (round(self.delay_low, 2), round(self.delay_high, 2)),
+            }
+
+class AdaptiveThreadPoolExecutor(ThreadPoolExecutor):
+    """受自适应控制器约束的线程池：
+    线程数按控制器上限创建，实际同时运行的任务数由控制器动态决定；
+    作为上下文管理器使用时自动注册到任务管理器，退出时取消注册。
+    is_success 可根据任务返回值判断是否成功（任务不抛异常但结果不确定时使用）"""
+
+    def __init__(self, controller, is_success=None, thread_name_prefix=''):
+        super().__init__(max_workers=controller.max_workers,
+                         thread_name_prefix=thread_name_prefix or controller.name)
+        self.controller = controller
+        self.is_success = is_success
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(self._run_controlled, fn, *args, **kwargs)
+
+    def _run_controlled(self, fn, *args, **kwargs):
+        self.controller.acquire()
+        start = time.time()
+        try:
+            result = fn(*args, **kwargs)
+        except TaskCancelled:
+            # 取消不是失败，不计入控制器的反馈
+            raise
+        except AntiCrawlDetected:
+            self.controller.record(time.time() - start, ok=False, blocked=True)
+            raise
+        except Exception:
+            self.controller.record(time.time() - start, ok=False)
+            raise
+        else:
+            ok = self.is_success(result) if self.is_success else True
+            self.controller.record(time.time() - start, ok=ok)
+            return result
+        finally:
+            self.controller.release()
+
+    def __enter__(self):
+        task_manager.register_thread_pool(self)
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return super().__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            task_manager.unregister_thread_pool(self)
@@ -0,0 +1,260 @@
+# utils/benchmark.py
+#
+# 离线基准测试：通过本地HTTP服务器回放保存的网页快照（fixtures），
+# 在不访问真实网站的情况下测量新游爬取、版号匹配与著作权结果解析的耗时和WebDriver命令数。
+#
+# 快照目录结构（默认使用仓库自带的 resources/fixtures，内容均为虚构的示例数据；
+# 也可用 --fixtures 指定自行保存的真实页面快照，如 .crawler_cache/fixtures）：
+#   taptap/app-calendar/<yyyy-MM-dd>.html    TapTap 新游日历页（每个文件对应一天）
+#   taptap/app/<id>.html                     日历卡片链接（/app/<id>）对应的游戏详情页
+#   nppa/bsfw/jggs/cxjg/index.html           版号查询结果页（忽略查询参数，所有游戏返回同一页）
+#   nppa/bsfw/jggs/cxjg/detail/<id>.html     结果行中游戏名称链接（相对路径 detail/<id>.html）对应的版号详情页
+#   nppa/names.txt                           可选，版号匹配使用的游戏名（每行一个）
+#   qcc/search.html                          企查查著作权搜索结果页
+#
+# 用法：
+#   python -m utils.benchmark [--fixtures 目录] [--repeat 次数] [--parser-only]
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import functools
+from collections import Counter
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, unquote
+
+# 仓库自带的示例快照
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'resources', 'fixtures')
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    """将请求路径映射到快照文件：忽略查询参数，依次尝试 原路径、原路径.html、原路径/index.html"""
+
+    def translate_path(self, path):
+        rel = unquote(urlsplit(path).path).lstrip('/')
+        base = os.path.join(self.directory, *[p for p in rel.split('/') if p not in ('', '.', '..')])
+        for candidate in (base, base + '.html', os.path.join(base, 'index.html')):
+            if os.path.isfile(candidate):
+                return candidate
+        return base
+
+    def log_message(self, format, *args):
+        pass  # 不输出每个请求的访问日志
+
+class FixtureServer:
+    """在后台线程中运行的本地快照服务器"""
+
+    def __init__(self, fixture_dir):
+        handler = functools.partial(FixtureRequestHandler, directory=fixture_dir)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class WebDriverCommandCounter:
+    """统计期间所有 WebDriver 实例发出的命令数（每条命令即一次与浏览器驱动的往返）"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._original = None
+
+    def __enter__(self):
+        from selenium.webdriver.remote.webdriver import WebDriver
+        self._original = WebDriver.execute
+        original, counter = self._original, self
+
+        def counting_execute(driver, driver_command, params=None):
+            with counter._lock:
+                counter.counts[driver_command] += 1
+            return original(driver, driver_command, params)
+
+        WebDriver.execute = counting_execute
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        from selenium.webdriver.remote.webdriver import WebDriver
+        WebDriver.execute = self._original
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+class NoDelay:
+    """基准测试期间关闭自适应控制器的请求间隔，只测量页面加载与解析本身"""
+
+    def __enter__(self):
+        from utils.adaptive_concurrency import AdaptiveController
+        self._original = AdaptiveController.pause
+        AdaptiveController.pause = lambda controller: None
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        from utils.adaptive_concurrency import AdaptiveController
+        AdaptiveController.pause = self._original
+
+def report(title, pages, elapsed, counter=None):
+    """输出一项基准测试结果"""
+    per_page = elapsed * 1000 / pages if pages else 0
+    print(f"\n[{title}]")
+    print(f"  页面数: {pages}    总耗时: {elapsed:.2f} 秒    平均每页: {per_page:.1f} 毫秒")
+    if counter is not None:
+        per_cmd = counter.total / pages if pages else 0
+        print(f"  WebDriver命令: 共 {counter.total} 条，平均每页 {per_cmd:.1f} 条")
+        for cmd, n in counter.counts.most_common(8):
+            print(f"    {cmd}: {n}")
+
+# ----------------------------------------------------------------------
+# 各项基准
+# ----------------------------------------------------------------------
+def bench_qcc_parser(fixture_dir, repeat):
+    """纯本地解析（不启动浏览器）：lxml 解析企查查结果表格"""
+    from utils.qcc_parser import LXML_AVAILABLE, parse_copyright_results
+    path = os.path.join(fixture_dir, 'qcc', 'search.html')
+    if not LXML_AVAILABLE or not os.path.isfile(path):
+        print("\n[企查查结果解析(lxml)] 跳过：未安装 lxml 或缺少 qcc/search.html")
+        return
+    import lxml.html
+    from utils.qcc_parser import RESULTS_TABLE_XPATH
+    with open(path, 'r', encoding='utf-8') as f:
+        doc = lxml.html.fromstring(f.read())
+    tables = doc.xpath(RESULTS_TABLE_XPATH)
+    if not tables:
+        print("\n[企查查结果解析(lxml)] 跳过：快照中未找到结果表格")
+        return
+    table_html = lxml.html.tostring(tables[0], encoding='unicode')
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = parse_copyright_results(table_html)
+    report("企查查结果解析(lxml，无浏览器)", repeat, time.perf_counter() - start)
+    print(f"  每页提取到 {len(results)} 条结果")
+
+def bench_qcc_browser(server, fixture_dir, repeat):
+    """浏览器中加载企查查快照，对比本地解析与逐行WebDriver提取"""
+    if not os.path.isfile(os.path.join(fixture_dir, 'qcc', 'search.html')):
+        print("\n[企查查结果提取] 跳过：缺少 qcc/search.html")
+        return
+    from selenium.webdriver.common.by import By
+    from utils.webdriver_helper import WebDriverHelper
+    from utils.copyright_query import CopyrightQuery
+    from utils.qcc_parser import RESULTS_TABLE_XPATH
+
+    query = CopyrightQuery()
+    query.set_progress_callback(lambda message, percent=None: True)  # 静默日志
+    driver = WebDriverHelper.create_driver(headless=True, profile=WebDriverHelper.PROFILE_LEAN)
+    if driver is None:
+        print("\n[企查查结果提取] 跳过：浏览器启动失败")
+        return
+    try:
+        driver.get(f"{server.base_url}/qcc/search.html")
+        with WebDriverCommandCounter() as counter:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                query.extract_and_match_results(driver, "", "")
+            report("企查查结果提取(extract_and_match_results)", repeat, time.perf_counter() - start, counter)
+        with WebDriverCommandCounter() as counter:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                table = driver.find_element(By.XPATH, RESULTS_TABLE_XPATH)
+                query.extract_results_via_webdriver(driver, table)
+            report("企查查结果提取(逐行WebDriver)", repeat, time.perf_counter() - start, counter)
+    finally:
+        WebDriverHelper.quit_driver(driver)
+
+def bench_calendar(server, fixture_dir):
+    """新游爬取：对快照中的所有日期运行 crawl_new_games（内部并发执行 crawl_one_day 与详情页抓取）"""
+    cal_dir = os.path.join(fixture_dir, 'taptap', 'app-calendar')
+    days = sorted(os.path.splitext(n)[0] for n in os.listdir(cal_dir)) if os.path.isdir(cal_dir) else []
+    if not days:
+        print("\n[新游爬取] 跳过：缺少 taptap/app-calendar/*.html")
+        return
+    from utils import crawler
+    crawler.TAPTAP_BASE_URL = f"{server.base_url}/taptap"
+    work_dir = tempfile.mkdtemp(prefix="bench_calendar_")
+    old_cwd = os.getcwd()
+    os.chdir(work_dir)  # Excel 与任务日志写入临时目录
+    try:
+        with NoDelay(), WebDriverCommandCounter() as counter:
+            start = time.perf_counter()
+            crawler.crawl_new_games(days[0], days[-1], progress_callback=lambda msg: None,
+                                    enable_version_match=False)
+            report("新游爬取(crawl_new_games)", len(days), time.perf_counter() - start, counter)
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def bench_nppa(server, fixture_dir):
+    """版号匹配：对一组游戏名运行 match_version_numbers（内部并发执行 fetch_game_info），不使用本地版号缓存"""
+    page = os.path.join(fixture_dir, 'nppa', 'bsfw', 'jggs', 'cxjg', 'index.html')
+    if not os.path.isfile(page):
+        print("\n[版号匹配] 跳过：缺少 nppa/bsfw/jggs/cxjg/index.html")
+        return
+    names_file = os.path.join(fixture_dir, 'nppa', 'names.txt')
+    names = []
+    if os.path.isfile(names_file):
+        with open(names_file, 'r', encoding='utf-8') as f:
+            names = [line.strip() for line in f if line.strip()]
+    names = names or ["基准测试游戏"]
+
+    import openpyxl
+    from utils import crawler
+    from utils.version_number_cache import VersionNumberCache
+    crawler.NPPA_QUERY_URL = f"{server.base_url}/nppa/bsfw/jggs/cxjg/index.html"
+    work_dir = tempfile.mkdtemp(prefix="bench_nppa_")
+    old_cwd, old_cache = os.getcwd(), crawler.version_number_cache
+    os.chdir(work_dir)
+    crawler.version_number_cache = VersionNumberCache(db_path=os.path.join(work_dir, 'cache.db'))
+    try:
+        wb = openpyxl.Workbook()
+        wb.active.append(["游戏名称"])
+        for name in names:
+            wb.active.append([name])
+        wb.save("names.xlsx")
+        with NoDelay(), WebDriverCommandCounter() as counter:
+            start = time.perf_counter()
+            crawler.match_version_numbers("names.xlsx", progress_callback=lambda msg: None,
+                                          create_new_file=False)
+            report("版号匹配(match_version_numbers)", len(names), time.perf_counter() - start, counter)
+    finally:
+        crawler.version_number_cache.close()
+        crawler.version_number_cache = old_cache
+        os.chdir(old_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="爬虫解析离线基准测试")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="网页快照目录（默认 resources/fixtures）")
+    parser.add_argument("--repeat", type=int, default=20, help="单页解析基准的重复次数")
+    parser.add_argument("--parser-only", action="store_true", help="只运行不需要浏览器的本地解析基准")
+    args = parser.parse_args(argv)
+
+    fixture_dir = os.path.abspath(args.fixtures)
+    if not os.path.isdir(fixture_dir):
+        print(f"快照目录不存在: {fixture_dir}")
+        return 1
+    print(f"快照目录: {fixture_dir}")
+
+    bench_qcc_parser(fixture_dir, args.repeat)
+    if args.parser_only:
+        return 0
+
+    with FixtureServer(fixture_dir) as server:
+        print(f"本地快照服务器: {server.base_url}")
+        bench_calendar(server, fixture_dir)
+        bench_nppa(server, fixture_dir)
+        bench_qcc_browser(server, fixture_dir, args.repeat)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# utils/browser_standby.py
+#
+# 预热的待命浏览器：用户进入新游爬虫/版号匹配页面时在后台启动若干个精简配置的无头浏览器待命。
+# 任务调用 WebDriverHelper.create_driver 时，如果请求的浏览器配置与待命浏览器兼容，直接交出已启动的实例
+# （省去浏览器冷启动和版本探测），并在后台补充新的待命实例；超过空闲时间没有任务取用时关闭全部待命浏览器。
+# 著作权人查询使用可见窗口和随机 User-Agent，不在适用范围内（创建时传入 use_standby=False）。
+# 可在 config.json 中设置 "browser_standby": false 关闭。
+
+import time
+import json
+import threading
+
+from selenium import webdriver
+
+# 待命浏览器数量
+STANDBY_SIZE = 1
+# 空闲超时（秒）：超过该时间没有任务取用则关闭待命浏览器
+STANDBY_IDLE_TIMEOUT = 300
+
+def options_signature(options):
+    """浏览器配置的比较依据：启动参数、页面加载策略、实验选项"""
+    return (frozenset(options.arguments), options.page_load_strategy,
+            json.dumps(options.experimental_options, sort_keys=True, default=str))
+
+def is_headless(arguments):
+    return any(arg.startswith("--headless") for arg in arguments)
+
+def is_compatible(requested, standby):
+    """请求的启动参数都已包含在待命浏览器中（且同为无头模式），其余配置完全相同时可直接交出"""
+    req_args, req_strategy, req_experimental = requested
+    standby_args, standby_strategy, standby_experimental = standby
+    return (req_args <= standby_args and is_headless(req_args) == is_headless(standby_args)
+            and req_strategy == standby_strategy and req_experimental == standby_experimental)
+
+def is_alive(driver):
+    """待命期间浏览器可能被清理进程的操作终止，交出前确认仍可用"""
+    try:
+        process = driver.service.process
+        if process is not None and process.poll() is not None:
+            return False
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+class BrowserStandby:
+    """待命浏览器服务（线程安全）"""
+
+    def __init__(self, size=STANDBY_SIZE, idle_timeout=STANDBY_IDLE_TIMEOUT):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.profile = None
+        self._drivers = []  # [(driver, 配置签名)]
+        self._lock = threading.Lock()
+        self._active = False
+        self._filling = False
+        self._last_used = 0
+        self._timer = None
+
+    @staticmethod
+    def enabled():
+        try:
+            from utils.version_checker import load_config
+            return load_config().get("browser_standby", True) is not False
+        except Exception:
+            return True
+
+    @staticmethod
+    def build_options(profile=None):
+        """待命浏览器的启动配置：覆盖各爬虫任务常用的无头参数"""
+        from utils.webdriver_helper import WebDriverHelper
+        options = webdriver.EdgeOptions()
+        options.use_chromium = True
+        for arg in ("--headless", "--disable-extensions", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu"):
+            options.add_argument(arg)
+        return WebDriverHelper.apply_profile(options, profile)
+
+    def start(self, profile=None):
+        """开始（或继续）待命：后台补足待命浏览器，并重新计算空闲时间。进入会使用无头浏览器的任务页面时调用"""
+        if not self.enabled():
+            return
+        with self._lock:
+            if self.profile != profile:
+                self._discard_locked()
+            self.profile = profile
+            self._active = True
+        self._touch()
+        self._schedule_fill()
+
+    def acquire(self, options):
+        """取出一个与 options 兼容的待命浏览器，没有则返回 None（调用方照常冷启动）"""
+        signature = options_signature(options)
+        while True:
+            with self._lock:
+                if not self._active:
+                    return None
+                index = next((i for i, (_, sig) in enumerate(self._drivers) if is_compatible(signature, sig)), None)
+                if index is None:
+                    return None
+                driver, _ = self._drivers.pop(index)
+            self._touch()
+            self._schedule_fill()
+            if is_alive(driver):
+                return driver
+            self._quit(driver)
+
+    def shutdown(self):
+        """关闭所有待命浏览器并停止补充（空闲超时或程序退出时调用）"""
+        with self._lock:
+            self._active = False
+            timer, self._timer = self._timer, None
+            self._discard_locked()
+        if timer:
+            timer.cancel()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    def _discard_locked(self):
+        drivers, self._drivers = self._drivers, []
+        for driver, _ in drivers:
+            threading.Thread(target=self._quit, args=(driver,), daemon=True).start()
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _touch(self):
+        """记录最近一次使用时间，并重新开始空闲计时"""
+        with self._lock:
+            self._last_used = time.monotonic()
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.idle_timeout, self._on_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_idle(self):
+        with self._lock:
+            idle = time.monotonic() - self._last_used >= self.idle_timeout - 1
+        if idle:
+            print("待命浏览器空闲超时，已关闭")
+            self.shutdown()
+
+    def _schedule_fill(self):
+        with self._lock:
+            if self._filling or not self._active:
+                return
+            self._filling = True
+        threading.Thread(target=self._fill, daemon=True, name="browser_standby").start()
+
+    def _fill(self):
+        from utils.webdriver_helper import WebDriverHelper
+        try:
+            while True:
+                with self._lock:
+                    drivers = list(self._drivers)
+                    profile = self.profile
+                    if not self._active:
+                        return
+                dead = [item for item in drivers if not is_alive(item[0])]
+                if dead:
+                    with self._lock:
+                        self._drivers = [item for item in self._drivers if item not in dead]
+                    for driver, _ in dead:
+                        self._quit(driver)
+                    continue
+                if len(drivers) >= self.size:
+                    return
+                options = self.build_options(profile)
+                driver = WebDriverHelper.create_driver(options=options, headless=True, profile=profile,
+                                                       use_standby=False)
+                if driver is None:
+                    return  # 启动失败时不反复重试，任务照常冷启动
+                with self._lock:
+                    keep = self._active and self.profile == profile
+                    if keep:
+                        self._drivers.append((driver, options_signature(options)))
+                if not keep:
+                    self._quit(driver)
+                    return
+        finally:
+            with self._lock:
+                self._filling = False
+
+# 全局待命浏览器服务
+browser_standby = BrowserStandby()
@@ -0,0 +1,112 @@
+# utils/cancellation.py
+#
+# 协作式取消：每个任务持有一个 CancellationToken，用户停止任务或程序退出时调用 token.cancel()：
+# - 任务中的等待（random_delay、重试间隔、WebDriverWait 轮询、并发闸门）都改为可被取消的等待，
+#   取消后最多 POLL_INTERVAL 秒内抛出 TaskCancelled
+# - 通过 attach_driver 登记到令牌的浏览器在取消时立即终止其进程树，
+#   阻塞在 driver.get 等调用上的线程随之出错返回，不必等页面加载超时
+# 任务入口捕获 TaskCancelled 后保存已完成的部分（任务日志保留，可从中断处继续）并结束。
+
+import time
+import threading
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.task_manager import task_manager, get_driver_process_tree, reap_process_trees
+
+# WebDriverWait 的轮询间隔（秒），也是等待页面元素时响应取消的最长延迟
+POLL_INTERVAL = 0.5
+
+class TaskCancelled(Exception):
+    """任务已被取消（由 CancellationToken 的等待/检查点抛出）"""
+    pass
+
+class CancellationToken:
+    """取消令牌（线程安全），cancel 可在任意线程（包括GUI线程）调用"""
+
+    def __init__(self, name=""):
+        self.name = name
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._drivers = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消任务：唤醒所有可取消的等待，并立即释放已登记的浏览器"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            drivers, self._drivers = self._drivers, []
+        if drivers:
+            threading.Thread(target=self._release, args=(drivers,), daemon=True).start()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TaskCancelled(f"任务{self.name}已取消" if self.name else "任务已取消")
+
+    def sleep(self, seconds):
+        """可被取消的 time.sleep：取消时立即抛出 TaskCancelled"""
+        if self._event.wait(max(0, seconds)):
+            self.raise_if_cancelled()
+
+    def until(self, driver, timeout, condition):
+        """等价于 WebDriverWait(driver, timeout).until(condition)，每次轮询前检查是否已取消"""
+        def guarded(d):
+            self.raise_if_cancelled()
+            return condition(d)
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(guarded)
+
+    # ------------------------------------------------------------------
+    # 浏览器登记
+    # ------------------------------------------------------------------
+    def attach_driver(self, driver):
+        """登记任务正在使用的浏览器；令牌已取消时立即释放该浏览器并抛出 TaskCancelled"""
+        if driver is None:
+            return
+        with self._lock:
+            if not self._event.is_set():
+                self._drivers.append(driver)
+                return
+        self._release([driver])
+        self.raise_if_cancelled()
+
+    def detach_driver(self, driver):
+        """任务自行关闭浏览器前取消登记"""
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+
+    @staticmethod
+    def _release(drivers):
+        """终止浏览器进程树；无法获取进程信息（未安装 psutil）时退回调用 quit()"""
+        procs = []
+        for driver in drivers:
+            tree = get_driver_process_tree(driver)
+            if tree:
+                procs.extend(tree)
+            else:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+        reap_process_trees(procs)
+
+    # 作为上下文管理器使用时注册到任务管理器，程序退出时统一取消
+    def __enter__(self):
+        task_manager.register_cancel_token(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        task_manager.unregister_cancel_token(self)
+        return False
+
+def cancellable_sleep(seconds, cancel_token=None):
+    """有令牌时可被取消的等待，没有令牌时等同 time.sleep"""
+    if cancel_token is not None:
+        cancel_token.sleep(seconds)
+    else:
+        time.sleep(seconds)
@@ -13,7 +13,6 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.service import Service as EdgeService
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementNotInteractableException
@@ -29,7 +28,7 @@ except ImportError:
         # 如果还是导入失败，创建一个简易的辅助类
         class WebDriverHelper:
             @staticmethod
-            def create_driver(options=None, headless=True, progress_callback=None):
+            def create_driver(options=None, headless=True, progress_callback=None, profile=None):
                 # 默认使用原始方法创建浏览器
                 from webdriver_manager.microsoft import EdgeChromiumDriverManager
                 edge_options = options or webdriver.EdgeOptions()
@@ -68,6 +67,83 @@ except ImportError:
     
     task_manager = SimpleTaskManager()
 
+# 导入单写者Excel输出组件
+from utils.excel_writer import BufferedExcelWriter
+# 导入任务日志（断点续查）
+from utils.job_journal import JobJournal
+# 导入游戏名称归一化
+from utils.helpers import normalize_game_name
+# 导入结果表格本地解析（依赖 lxml，未安装时回退到逐行WebDriver提取）
+from utils.qcc_parser import LXML_AVAILABLE, parse_copyright_results
+# 导入分级进度日志（调试细节只写入滚动日志文件）
+from utils.progress_channel import get_file_logger, DEBUG, INFO, UI_LEVEL
+# 导入协作式取消（停止查询时立即结束等待并关闭浏览器）
+from utils.cancellation import CancellationToken, TaskCancelled
+
+# 著作权查询写入Excel的结果列
+RESULT_COLUMNS = [
+    "匹配著作权人", 
+    "搜索的结果数量", 
+    "当前结果与游戏简称是否一致", 
+    "当前结果与运营单位是否一致", 
+    "是否建议人工排查"
+]
+
+class CopyrightResultSink:
+    """著作权查询结果输出：每个游戏的结果列先写入内存工作簿，
+    Excel 只在检查点（按时间间隔或暂停时）和结束时整体写出一次，且保留原文件格式。
+    两次检查点之间崩溃时，内存中的结果由任务日志（JobJournal）在下次运行同一Excel时重放恢复。
+    row_idx 为 pandas 读取时的数据行索引（第0行数据对应Excel第2行），
+    也可以是行索引列表（同名游戏的多行），此时结果写入每一行"""
+
+    def __init__(self, excel_path):
+        self.excel_path = excel_path
+        wb = openpyxl.load_workbook(excel_path)
+        ws = wb.active
+        self.column_map = {}
+        for idx, cell in enumerate(ws[1], start=1):
+            if cell.value is not None and cell.value not in self.column_map:
+                self.column_map[cell.value] = idx
+        self.writer = BufferedExcelWriter(excel_path, workbook=wb)
+        self._pending = {}
+
+    def set(self, row_idx, column, value):
+        """记录某行（或多行）某列的结果（先缓存，commit 时批量落盘）"""
+        if column not in self.column_map:
+            return
+        rows = row_idx if isinstance(row_idx, (list, tuple)) else [row_idx]
+        for r in rows:
+            self._pending[(int(r) + 2, self.column_map[column])] = value
+
+    def get_row(self, row_idx, columns):
+        """读取某行指定列的当前结果，返回 {列名: 值}（传入多行时读取第一行）"""
+        self.commit()
+        if isinstance(row_idx, (list, tuple)):
+            row_idx = row_idx[0]
+        ws = self.writer.workbook.active
+        return {
+            col: ws.cell(row=int(row_idx) + 2, column=self.column_map[col]).value
+            for col in columns if col in self.column_map
+        }
+
+    def commit(self):
+        """将缓存的结果写入内存工作簿"""
+        if not self._pending:
+            return
+        updates = [(r, c, v) for (r, c), v in self._pending.items()]
+        self._pending = {}
+        self.writer.update_cells(updates)
+
+    def checkpoint(self, force=False):
+        """提交结果并按需写出Excel（force=True 时立即写出），返回是否实际写出"""
+        self.commit()
+        return self.writer.checkpoint(force=force)
+
+    def finalize(self):
+        """提交结果并最终写出Excel"""
+        self.commit()
+        self.writer.finalize()
+
 class CopyrightQuery:
     """著作权人查询工具"""
     
@@ -93,6 +169,13 @@ class CopyrightQuery:
         self.paused = False
         # 暂停原因
         self.paused_reason = ""
+        # 浏览器配置档：查询过程需要用户在浏览器中登录（验证码/二维码需显示图片），默认使用常规模式；
+        # 已登录、仅需读取结果时可设为 "lean"（不加载图片/媒体/字体，eager 加载策略）
+        self.browser_profile = "default"
+        # 调试日志（.crawler_cache/logs/copyright.log）
+        self.logger = get_file_logger("copyright")
+        # 取消令牌：停止查询时调用 cancel_token.cancel()，等待中的操作立即结束并关闭浏览器
+        self.cancel_token = CancellationToken("著作权查询")
         
     def set_progress_callback(self, callback):
         """设置进度回调函数"""
@@ -102,14 +185,21 @@ class CopyrightQuery:
         """设置登录确认回调函数"""
         self.login_confirm_callback = callback
     
-    def update_progress(self, message, percent=None):
-        """更新进度信息"""
+    def update_progress(self, message, percent=None, level=INFO):
+        """更新进度信息；低于界面级别的调试信息不发送到界面，只写入日志文件"""
+        if level < UI_LEVEL:
+            self.logger.log(level, message)
+            return not self.paused
         if self.progress_callback:
             return self.progress_callback(message, percent)
         else:
             print(message)
             return True
     
+    def debug(self, message):
+        """记录查询过程中的调试细节（DOM定位、逐行提取等），不发送到界面"""
+        return self.update_progress(message, level=DEBUG)
+    
     def filter_webdriver_message(self, message, percent=None):
         """过滤WebDriver信息，只保留关键状态"""
         # 定义需要保留的关键信息关键词
@@ -133,10 +223,10 @@ class CopyrightQuery:
         
         # 简化消息，删除过多细节
         if "缓存目录" in message or "缓存文件" in message:
-            return None  # 忽略缓存路径信息
+            show_message = False  # 缓存路径信息只记录到调试日志
         
         if "检测到Edge浏览器版本" in message:
-            return None  # 忽略版本检测信息
+            show_message = False  # 版本检测信息只记录到调试日志
         
         # 只显示关键节点信息
         if show_message:
@@ -159,12 +249,13 @@ class CopyrightQuery:
                 error_detail = message.split(':', 1)[1].strip() if ':' in message else ''
                 return self.update_progress(f"启动浏览器失败: {error_detail}", percent)
         
-        # 默认不显示其他WebDriver消息
+        # 其他WebDriver消息不显示，只记录到调试日志
+        self.debug(message)
         return None
     
     def random_delay(self, min_sec=1.0, max_sec=3.0):
-        """避免爬取过快"""
-        time.sleep(random.uniform(min_sec, max_sec))
+        """避免爬取过快（查询被取消时抛出 TaskCancelled）"""
+        self.cancel_token.sleep(random.uniform(min_sec, max_sec))
     
     def create_excel_copy_with_new_columns(self, excel_path):
         """创建Excel副本并添加新列"""
@@ -185,13 +276,7 @@ class CopyrightQuery:
             last_col_idx = len(list(ws.columns))
             
             # 定义新增加的列名
-            new_columns = [
-                "匹配著作权人", 
-                "搜索的结果数量", 
-                "当前结果与游戏简称是否一致", 
-                "当前结果与运营单位是否一致", 
-                "是否建议人工排查"
-            ]
+            new_columns = RESULT_COLUMNS
             
             # 添加新列
             for i, col_name in enumerate(new_columns):
@@ -207,7 +292,12 @@ class CopyrightQuery:
             return None
         
     def identify_game_name_column(self, excel_path):
-        """识别Excel中的游戏名称列和运营单位列，返回游戏名称和运营单位的键值对"""
+        """识别Excel中的游戏名称列和运营单位列，返回待查询的 (游戏名称, 运营单位) 列表
+        
+        名称归一化（全角/半角、括号样式、空白、大小写）后相同且运营单位相同的多行视为同一个游戏，只查询一次：
+        game_list 中的名称为该组第一次出现的原始名称，row_indices 以 (游戏名称, 运营单位) 为键，值为该组所有行索引的列表。
+        运营单位不同的同名行分开查询，各自得到与本行运营单位对应的匹配结论
+        """
         try:
             # 读取Excel文件
             df = pd.read_excel(excel_path)
@@ -267,25 +357,37 @@ class CopyrightQuery:
                     operator_col = df.columns[1]
                 self.update_progress(f"已选择运营单位列: {operator_col}")
             
-            # 创建游戏名称和运营单位的键值对
-            game_operator_dict = {}
-            row_indices = {}  # 存储每个游戏对应的行索引
+            # 按 (归一化名称, 运营单位) 分组，名称和运营单位都相同的行只查询一次
+            game_list = []
+            row_indices = {}  # (游戏名称, 运营单位) -> 该组所有行索引
+            group_keys = {}  # (归一化名称, 运营单位) -> 该组使用的 (原始名称, 运营单位)
+            total_rows = 0
             
             for idx, row in df.iterrows():
                 game_name = row[game_name_col]
                 operator = row[operator_col] if operator_col and pd.notna(row[operator_col]) else ""
-                if pd.notna(game_name):
-                    game_operator_dict[game_name] = operator
-                    row_indices[game_name] = idx  # 记录行索引
+                if pd.isna(game_name) or not str(game_name).strip():
+                    continue
+                total_rows += 1
+                key = (normalize_game_name(game_name), operator)
+                if key not in group_keys:
+                    group_keys[key] = (game_name, operator)
+                    game_list.append((game_name, operator))
+                    row_indices[(game_name, operator)] = []
+                row_indices[group_keys[key]].append(idx)  # 记录行索引
             
-            self.update_progress(f"找到 {len(game_operator_dict)} 个游戏名称和运营单位", 20)
+            duplicate_rows = total_rows - len(game_list)
+            if duplicate_rows > 0:
+                self.update_progress(f"共 {total_rows} 行游戏数据，其中 {duplicate_rows} 行与其他行名称（忽略全半角/括号/空白差异）和运营单位均相同，"
+                                     f"将只查询一次并同步写入这些行")
+            self.update_progress(f"找到 {len(game_list)} 个游戏名称和运营单位", 20)
             
-            # 返回游戏名称列名、运营单位列名、游戏-运营单位键值对和行索引映射
-            return game_name_col, operator_col, game_operator_dict, row_indices
+            # 返回游戏名称列名、运营单位列名、(游戏名称, 运营单位) 列表和行索引映射
+            return game_name_col, operator_col, game_list, row_indices
                 
         except Exception as e:
             self.update_progress(f"读取Excel文件出错: {str(e)}")
-            return None, None, {}, {}
+            return None, None, [], {}
     
     def extract_number_from_text(self, text):
         """从文本中提取数字"""
@@ -302,42 +404,43 @@ class CopyrightQuery:
         """等待页面加载完成"""
         try:
             # 等待页面完全加载
-            WebDriverWait(driver, timeout).until(
-                lambda d: d.execute_script('return document.readyState') == 'complete'
+            self.cancel_token.until(
+                driver, timeout, lambda d: d.execute_script('return document.readyState') == 'complete'
             )
             # 增加一个短暂的固定等待，确保动态内容加载
-            time.sleep(0.5)
+            self.cancel_token.sleep(0.5)
             return True
         except TimeoutException:
             print("页面加载超时")
             return False
     
     def click_filter_checkbox(self, driver, label_text):
-        """使用WebDriverWait点击包含特定文本的筛选复选框标签"""
+        """等待并点击包含特定文本的筛选复选框标签"""
         try:
             # 构建XPath，查找包含特定文本的label元素
             xpath = f"//label[contains(@class, 'fcheck')][contains(., '{label_text}')]"
-            self.update_progress(f"尝试查找并点击复选框: {label_text} (XPath: {xpath})")
+            self.debug(f"尝试查找并点击复选框: {label_text} (XPath: {xpath})")
             
             # 等待元素可见且可点击
-            wait = WebDriverWait(driver, 15) # 增加等待时间
-            checkbox_label = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
+            checkbox_label = self.cancel_token.until(driver, 15, EC.element_to_be_clickable((By.XPATH, xpath)))
             
             # 尝试多种点击方式
             try:
                 # 方式1: 直接点击
                 checkbox_label.click()
-                self.update_progress(f"成功点击复选框: {label_text} (直接点击)")
+                self.debug(f"成功点击复选框: {label_text} (直接点击)")
                 self.continuous_failures = 0  # 成功后重置失败计数
                 return True
             except ElementNotInteractableException:
-                self.update_progress("直接点击失败，尝试JavaScript点击")
+                self.debug("直接点击失败，尝试JavaScript点击")
                 # 方式2: 使用JavaScript点击
                 driver.execute_script("arguments[0].click();", checkbox_label)
-                self.update_progress(f"成功点击复选框: {label_text} (JavaScript点击)")
+                self.debug(f"成功点击复选框: {label_text} (JavaScript点击)")
                 self.continuous_failures = 0  # 成功后重置失败计数
                 return True
                 
+        except TaskCancelled:
+            raise
         except TimeoutException:
             self.update_progress(f"查找或点击复选框超时: {label_text}")
             self.save_debug_info(driver, f"checkbox_timeout_{label_text.replace(' ', '_')}")
@@ -353,24 +456,23 @@ class CopyrightQuery:
         """获取搜索结果数量"""
         try:
             # 等待包含结果数量的span元素可见
-            wait = WebDriverWait(driver, 15) # 增加等待时间
             span_xpath = "//h4[contains(., '为您找到')]/span[@class='text-danger']"
-            self.update_progress(f"等待搜索结果数量元素可见 (XPath: {span_xpath})")
-            span_element = wait.until(EC.visibility_of_element_located((By.XPATH, span_xpath)))
+            self.debug(f"等待搜索结果数量元素可见 (XPath: {span_xpath})")
+            span_element = self.cancel_token.until(driver, 15, EC.visibility_of_element_located((By.XPATH, span_xpath)))
             
             # 获取文本并提取数字
             result_text = span_element.text.strip()
-            self.update_progress(f"从span.text-danger获取到结果: '{result_text}'")
+            self.debug(f"从span.text-danger获取到结果: '{result_text}'")
             if result_text: 
                 self.continuous_failures = 0  # 成功后重置失败计数
                 return self.extract_number_from_text(result_text)
             else:
                 # 如果文本为空，尝试获取父级h4的文本
-                self.update_progress("span文本为空，尝试获取父级h4文本")
+                self.debug("span文本为空，尝试获取父级h4文本")
                 try:
                     h4_element = driver.find_element(By.XPATH, "//h4[contains(., '为您找到')]")
                     h4_text = h4_element.text.strip()
-                    self.update_progress(f"从h4获取到文本: '{h4_text}'")
+                    self.debug(f"从h4获取到文本: '{h4_text}'")
                     self.continuous_failures = 0  # 成功后重置失败计数
                     return self.extract_number_from_text(h4_text)
                 except Exception as e_h4:
@@ -395,6 +497,8 @@ class CopyrightQuery:
                 if not self.check_anti_crawl("未找到搜索结果元素，也未找到'无结果'提示"):
                     return 0
                 return 0 # 超时且无明确提示，返回0
+        except TaskCancelled:
+            raise
         except Exception as e:
             self.update_progress(f"获取搜索结果数量时发生未知错误: {str(e)}")
             self.save_debug_info(driver, "result_count_error")
@@ -403,6 +507,142 @@ class CopyrightQuery:
                 return 0
             return 0
 
+    def extract_results_via_webdriver(self, driver, results_table):
+        """逐行通过WebDriver提取结果（未安装 lxml 时使用），返回 [(简称, 著作权人), ...]"""
+        results = []
+        # 获取所有结果行 (tr)
+        result_rows = results_table.find_elements(By.TAG_NAME, "tr")
+        self.debug(f"找到 {len(result_rows)} 条结果行")
+        
+        if not result_rows:
+            self.update_progress("未在表格中找到结果行(tr)")
+            return results
+
+        # 提取每行的信息
+        for row in result_rows:
+            short_name = "-"
+            owner = ""
+            try:
+                # --- 提取软件简称 --- (修改后：提取span.val的完整文本)
+                self.debug("\n开始提取软件简称...")
+                short_name = "-" # 默认值
+                try:
+                    # 尝试主要XPath查找包含软件简称的span.val
+                    # XPath解释：查找任意包含 '软件简称' 文本的 span，然后找它后面紧跟着的 class 包含 'val' 的 span
+                    val_span_xpath = ".//span[contains(text(), '软件简称')]/following-sibling::span[contains(@class, 'val')]"
+                    val_elements = row.find_elements(By.XPATH, val_span_xpath)
+
+                    if val_elements:
+                        # 获取第一个找到的span.val的完整文本内容
+                        # .text 属性会获取元素及其所有子元素的可见文本
+                        short_name = val_elements[0].text.strip()
+                        self.debug(f"通过主要XPath找到span.val，提取到完整简称: '{short_name}'")
+                    else:
+                        # 如果主要XPath找不到，尝试备选方法：查找包含"软件简称"的span.f，再找其兄弟span.val
+                        self.debug("主要XPath未找到span.val，尝试备选方法...")
+                        try:
+                            # 查找所有 class='f' 的 span
+                            label_spans = row.find_elements(By.XPATH, ".//span[@class='f']")
+                            found_backup = False
+                            for label_span in label_spans:
+                                # 检查哪个标签包含"软件简称"
+                                if "软件简称" in label_span.text:
+                                    # 找到标签后，尝试寻找对应的数值 span (span.val)
+                                    try:
+                                        # 尝试1：作为直接的兄弟节点
+                                        # ./following-sibling:: 表示查找当前节点之后的兄弟节点
+                                        val_span = label_span.find_element(By.XPATH, "./following-sibling::span[contains(@class, 'val')]")
+                                        short_name = val_span.text.strip() # 获取完整文本
+                                        self.debug(f"通过备选方法(直接兄弟)找到span.val，提取到完整简称: '{short_name}'")
+                                        found_backup = True
+                                        break # 找到就跳出循环
+                                    except NoSuchElementException:
+                                        # 尝试2：作为父级 div 的兄弟 span.val (处理可能的嵌套结构)
+                                        try:
+                                             # ./parent::div 找到直接的父级 div 元素
+                                             parent_div = label_span.find_element(By.XPATH, "./parent::div")
+                                             # 再从父级 div 查找兄弟 span.val
+                                             val_span = parent_div.find_element(By.XPATH, "./following-sibling::span[contains(@class, 'val')]")
+                                             short_name = val_span.text.strip() # 获取完整文本
+                                             self.debug(f"通过备选方法(父级兄弟)找到span.val，提取到完整简称: '{short_name}'")
+                                             found_backup = True
+                                             break # 找到就跳出循环
+                                        except NoSuchElementException:
+                                            # 如果两种结构都没找到，记录一下信息，继续检查下一个可能的标签span
+                                            self.debug(f"备选方法在标签 '{label_span.text[:20]}...' 处未找到对应的span.val")
+                                            continue
+
+                            if not found_backup:
+                                 self.debug("备选方法也未能找到简称对应的span.val")
+
+                        except Exception as e_backup:
+                            self.update_progress(f"执行备选提取方法时出错: {str(e_backup)}")
+                            # 出错则保持 short_name 为 "-"
+
+                    # 最终清理，如果提取结果为空字符串，也设为"-"
+                    if not short_name or short_name.strip() == "":
+                        short_name = "-"
+                        self.debug("提取到的简称为空，重置为 '-'")
+
+                except Exception as e_sn:
+                    # 捕获整个提取简称过程中的任何异常
+                    self.update_progress(f"提取软件简称时发生异常: {str(e_sn)}")
+                    short_name = "-" # 确保异常时为默认值 "-"
+
+                self.debug(f"最终确定的用于匹配的简称: '{short_name}'")
+
+                # --- 提取著作权人 --- (逻辑不变)
+                try:
+                    # 1. 找到包含"著作权人："的父级 span.f
+                    # 注意：著作权人可能嵌套在 app-over-hidden-text div 中
+                    label_span_owner_candidates = row.find_elements(By.XPATH, ".//span[@class='f' and starts-with(normalize-space(.), '著作权人')] | .//span[starts-with(normalize-space(.), '著作权人')]//span[@class='f']")
+                    if not label_span_owner_candidates:
+                         raise NoSuchElementException("未找到著作权人标签 span.f")
+                    
+                    label_span_owner = None
+                    for candidate in label_span_owner_candidates:
+                        try:
+                            parent_div = candidate.find_element(By.XPATH, "./ancestor::div[contains(@class, 'rline')] | ./ancestor::div[@class='f']/ancestor::div[contains(@class, 'rline')]")
+                            if parent_div:
+                                label_span_owner = candidate
+                                break
+                        except NoSuchElementException:
+                            continue
+                    if not label_span_owner:
+                         label_span_owner = label_span_owner_candidates[0]
+                         
+                    val_span_owner = None
+                    try:
+                        val_span_owner = label_span_owner.find_element(By.XPATH, "following-sibling::span[contains(@class, 'val')]")
+                    except NoSuchElementException:
+                         try:
+                             wrapper_div = label_span_owner.find_element(By.XPATH, "./parent::div[contains(@class,'f')]")
+                             val_span_owner = wrapper_div.find_element(By.XPATH, "following-sibling::span[contains(@class, 'val')]")
+                         except NoSuchElementException:
+                              val_span_owner = row.find_element(By.XPATH, ".//span[starts-with(normalize-space(.), '著作权人')]/following-sibling::span[contains(@class, 'val')]")
+                    
+                    if not val_span_owner:
+                         raise NoSuchElementException("未找到著作权人值 span.val")
+
+                    owner_link = val_span_owner.find_element(By.TAG_NAME, 'a')
+                    owner = owner_link.text.strip()
+                    self.debug(f"提取到著作权人: '{owner}'")
+                except NoSuchElementException:
+                    self.debug("未找到著作权人信息")
+                    owner = ""
+                
+                # 确保提取到了有效信息再添加
+                if owner or short_name != "-": 
+                    results.append((short_name if short_name else "-", owner))
+                    self.debug(f"提取到结果: 简称='{short_name if short_name else "-"}', 著作权人='{owner}'")
+                else:
+                    self.debug("跳过一条结果，未提取到有效简称或著作权人")
+
+            except Exception as e_row:
+                self.update_progress(f"处理结果行时出错: {str(e_row)}")
+                self.save_debug_info(driver, f"row_processing_error")
+        return results
+
     def extract_and_match_results(self, driver, game_name, operator):
         """解析搜索结果列表，提取信息并根据规则进行匹配"""
         results = [] # 存储提取结果: [(简称, 著作权人), ...]
@@ -417,145 +657,25 @@ class CopyrightQuery:
             # 获取结果表格
             try:
                 results_table = driver.find_element(By.XPATH, results_container_xpath)
-                self.update_progress(f"成功定位结果表格: {results_container_xpath}")
+                self.debug(f"成功定位结果表格: {results_container_xpath}")
             except NoSuchElementException:
                 self.update_progress(f"未找到结果表格: {results_container_xpath}")
                 self.save_debug_info(driver, "no_results_table")
                 return matched_copyright_owner, is_game_name_match, is_operator_match, recommend_manual_check
             
-            # 获取所有结果行 (tr)
-            result_rows = results_table.find_elements(By.TAG_NAME, "tr")
-            self.update_progress(f"找到 {len(result_rows)} 条结果行")
-            
-            if not result_rows:
-                self.update_progress("未在表格中找到结果行(tr)")
-                return matched_copyright_owner, is_game_name_match, is_operator_match, recommend_manual_check
-
-            # 提取每行的信息
-            for row in result_rows:
-                short_name = "-"
-                owner = ""
+            if LXML_AVAILABLE:
+                # 一次性取回表格HTML，在本地解析所有结果行
                 try:
-                    # --- 提取软件简称 --- (修改后：提取span.val的完整文本)
-                    self.update_progress("\n开始提取软件简称...")
-                    short_name = "-" # 默认值
-                    try:
-                        # 尝试主要XPath查找包含软件简称的span.val
-                        # XPath解释：查找任意包含 '软件简称' 文本的 span，然后找它后面紧跟着的 class 包含 'val' 的 span
-                        val_span_xpath = ".//span[contains(text(), '软件简称')]/following-sibling::span[contains(@class, 'val')]"
-                        val_elements = row.find_elements(By.XPATH, val_span_xpath)
-
-                        if val_elements:
-                            # 获取第一个找到的span.val的完整文本内容
-                            # .text 属性会获取元素及其所有子元素的可见文本
-                            short_name = val_elements[0].text.strip()
-                            self.update_progress(f"通过主要XPath找到span.val，提取到完整简称: '{short_name}'")
-                        else:
-                            # 如果主要XPath找不到，尝试备选方法：查找包含"软件简称"的span.f，再找其兄弟span.val
-                            self.update_progress("主要XPath未找到span.val，尝试备选方法...")
-                            try:
-                                # 查找所有 class='f' 的 span
-                                label_spans = row.find_elements(By.XPATH, ".//span[@class='f']")
-                                found_backup = False
-                                for label_span in label_spans:
-                                    # 检查哪个标签包含"软件简称"
-                                    if "软件简称" in label_span.text:
-                                        # 找到标签后，尝试寻找对应的数值 span (span.val)
-                                        try:
-                                            # 尝试1：作为直接的兄弟节点
-                                            # ./following-sibling:: 表示查找当前节点之后的兄弟节点
-                                            val_span = label_span.find_element(By.XPATH, "./following-sibling::span[contains(@class, 'val')]")
-                                            short_name = val_span.text.strip() # 获取完整文本
-                                            self.update_progress(f"通过备选方法(直接兄弟)找到span.val，提取到完整简称: '{short_name}'")
-                                            found_backup = True
-                                            break # 找到就跳出循环
-                                        except NoSuchElementException:
-                                            # 尝试2：作为父级 div 的兄弟 span.val (处理可能的嵌套结构)
-                                            try:
-                                                 # ./parent::div 找到直接的父级 div 元素
-                                                 parent_div = label_span.find_element(By.XPATH, "./parent::div")
-                                                 # 再从父级 div 查找兄弟 span.val
-                                                 val_span = parent_div.find_element(By.XPATH, "./following-sibling::span[contains(@class, 'val')]")
-                                                 short_name = val_span.text.strip() # 获取完整文本
-                                                 self.update_progress(f"通过备选方法(父级兄弟)找到span.val，提取到完整简称: '{short_name}'")
-                                                 found_backup = True
-                                                 break # 找到就跳出循环
-                                            except NoSuchElementException:
-                                                # 如果两种结构都没找到，记录一下信息，继续检查下一个可能的标签span
-                                                self.update_progress(f"备选方法在标签 '{label_span.text[:20]}...' 处未找到对应的span.val")
-                                                continue
-
-                                if not found_backup:
-                                     self.update_progress("备选方法也未能找到简称对应的span.val")
-
-                            except Exception as e_backup:
-                                self.update_progress(f"执行备选提取方法时出错: {str(e_backup)}")
-                                # 出错则保持 short_name 为 "-"
-
-                        # 最终清理，如果提取结果为空字符串，也设为"-"
-                        if not short_name or short_name.strip() == "":
-                            short_name = "-"
-                            self.update_progress("提取到的简称为空，重置为 '-'")
-
-                    except Exception as e_sn:
-                        # 捕获整个提取简称过程中的任何异常
-                        self.update_progress(f"提取软件简称时发生异常: {str(e_sn)}")
-                        short_name = "-" # 确保异常时为默认值 "-"
-
-                    self.update_progress(f"最终确定的用于匹配的简称: '{short_name}'")
-
-                    # --- 提取著作权人 --- (逻辑不变)
-                    try:
-                        # 1. 找到包含"著作权人："的父级 span.f
-                        # 注意：著作权人可能嵌套在 app-over-hidden-text div 中
-                        label_span_owner_candidates = row.find_elements(By.XPATH, ".//span[@class='f' and starts-with(normalize-space(.), '著作权人')] | .//span[starts-with(normalize-space(.), '著作权人')]//span[@class='f']")
-                        if not label_span_owner_candidates:
-                             raise NoSuchElementException("未找到著作权人标签 span.f")
-                        
-                        label_span_owner = None
-                        for candidate in label_span_owner_candidates:
-                            try:
-                                parent_div = candidate.find_element(By.XPATH, "./ancestor::div[contains(@class, 'rline')] | ./ancestor::div[@class='f']/ancestor::div[contains(@class, 'rline')]")
-                                if parent_div:
-                                    label_span_owner = candidate
-                                    break
-                            except NoSuchElementException:
-                                continue
-                        if not label_span_owner:
-                             label_span_owner = label_span_owner_candidates[0]
-                             
-                        val_span_owner = None
-                        try:
-                            val_span_owner = label_span_owner.find_element(By.XPATH, "following-sibling::span[contains(@class, 'val')]")
-                        except NoSuchElementException:
-                             try:
-                                 wrapper_div = label_span_owner.find_element(By.XPATH, "./parent::div[contains(@class,'f')]")
-                                 val_span_owner = wrapper_div.find_element(By.XPATH, "following-sibling::span[contains(@class, 'val')]")
-                             except NoSuchElementException:
-                                  val_span_owner = row.find_element(By.XPATH, ".//span[starts-with(normalize-space(.), '著作权人')]/following-sibling::span[contains(@class, 'val')]")
-                        
-                        if not val_span_owner:
-                             raise NoSuchElementException("未找到著作权人值 span.val")
-
-                        owner_link = val_span_owner.find_element(By.TAG_NAME, 'a')
-                        owner = owner_link.text.strip()
-                        self.update_progress(f"提取到著作权人: '{owner}'")
-                    except NoSuchElementException:
-                        self.update_progress("未找到著作权人信息")
-                        owner = ""
-                    
-                    # 确保提取到了有效信息再添加
-                    if owner or short_name != "-": 
-                        results.append((short_name if short_name else "-", owner))
-                        self.update_progress(f"提取到结果: 简称='{short_name if short_name else "-"}', 著作权人='{owner}'")
-                    else:
-                        self.update_progress("跳过一条结果，未提取到有效简称或著作权人")
-
-                except Exception as e_row:
-                    self.update_progress(f"处理结果行时出错: {str(e_row)}")
-                    self.save_debug_info(driver, f"row_processing_error")
+                    results = parse_copyright_results(results_table.get_attribute("outerHTML"))
+                    summary = "\n".join(f"  简称='{sn}', 著作权人='{own}'" for sn, own in results)
+                    self.debug(f"本地解析结果表格完成：\n{summary}" if summary else "本地解析结果表格完成，未提取到有效结果")
+                except Exception as e_parse:
+                    self.update_progress(f"本地解析结果表格失败: {str(e_parse)}，改为逐行提取")
+                    results = self.extract_results_via_webdriver(driver, results_table)
+            else:
+                results = self.extract_results_via_webdriver(driver, results_table)
             
-            self.update_progress(f"共提取到 {len(results)} 条有效结果进行匹配")
+            self.debug(f"共提取到 {len(results)} 条有效结果进行匹配")
             if not results:
                 return matched_copyright_owner, is_game_name_match, is_operator_match, recommend_manual_check
 
@@ -567,7 +687,7 @@ class CopyrightQuery:
             if operator: 
                 for sn, own in results:
                     if own == operator:
-                        self.update_progress(f"运营单位匹配成功: 结果著作权人 '{own}' == 表格运营单位 '{operator}'")
+                        self.debug(f"运营单位匹配成功: 结果著作权人 '{own}' == 表格运营单位 '{operator}'")
                         operator_matched_result = (sn, own)
                         break 
             
@@ -578,29 +698,29 @@ class CopyrightQuery:
                      is_game_name_match = "是"
                 else:
                      is_game_name_match = "否"
-                     self.update_progress(f"运营单位匹配成功，但简称不匹配: 结果简称 '{operator_matched_result[0]}' != 表格游戏名 '{game_name}'")
+                     self.debug(f"运营单位匹配成功，但简称不匹配: 结果简称 '{operator_matched_result[0]}' != 表格游戏名 '{game_name}'")
                 recommend_manual_check = "否" 
             else:
                 # 2. 如果运营单位未匹配，则匹配游戏名称 (软件简称)
-                self.update_progress("运营单位未匹配，开始匹配游戏简称...")
+                self.debug("运营单位未匹配，开始匹配游戏简称...")
                 is_operator_match = "否"
                 for sn, own in results:
                     if sn == game_name:
                         game_name_matches.append((sn, own))
-                        self.update_progress(f"游戏简称匹配成功: '{sn}'")
+                        self.debug(f"游戏简称匹配成功: '{sn}'")
                 
                 if len(game_name_matches) == 1:
-                    self.update_progress("游戏简称唯一匹配")
+                    self.debug("游戏简称唯一匹配")
                     matched_copyright_owner = game_name_matches[0][1]
                     is_game_name_match = "是"
                     recommend_manual_check = "否"
                 elif len(game_name_matches) > 1:
-                    self.update_progress("游戏简称存在多个匹配，标记需人工排查")
+                    self.debug("游戏简称存在多个匹配，标记需人工排查")
                     matched_copyright_owner = game_name_matches[0][1] 
                     is_game_name_match = "是"
                     recommend_manual_check = "是"
                 else:
-                    self.update_progress("游戏简称也未匹配")
+                    self.debug("游戏简称也未匹配")
                     is_game_name_match = "否"
                     recommend_manual_check = "是" 
 
@@ -636,8 +756,13 @@ class CopyrightQuery:
         except Exception as e:
             print(f"保存截图失败: {str(e)}")
 
-    def query_copyright(self, excel_path, progress_callback=None, start_from_index=0):
-        """查询著作权人信息并填充Excel"""
+    def query_copyright(self, excel_path, progress_callback=None, start_from_index=0, resume=True):
+        """查询著作权人信息并填充Excel
+        
+        每查询完一个游戏即记入该输入文件的任务日志（运营单位+游戏名 -> 结果列）。
+        resume=True 时对同一Excel重新运行会自动复用已有结果、跳过已查询的游戏；
+        全部查询完成后清除任务日志。
+        """
         # 如果传入了回调，临时替换全局回调
         old_callback = self.progress_callback
         if progress_callback:
@@ -651,42 +776,22 @@ class CopyrightQuery:
                 self.progress_callback = old_callback
             return None
             
-        # 识别游戏名称列和运营单位列，获取游戏-运营单位键值对和行索引映射
-        game_name_col, operator_col, game_operator_dict, row_indices = self.identify_game_name_column(excel_path)
-        if not game_operator_dict:
+        # 识别游戏名称列和运营单位列，获取 (游戏名称, 运营单位) 列表和行索引映射
+        game_name_col, operator_col, game_list, row_indices = self.identify_game_name_column(excel_path)
+        if not game_list:
             self.update_progress("没有找到有效的游戏名称数据")
             if old_callback:
                 self.progress_callback = old_callback
             return None
         
-        # 加载副本Excel准备写入
-        df_result = pd.read_excel(new_excel_path)
-        
-        # --- 处理Pandas类型警告 --- 
-        # 显式设置新添加的文本列的数据类型为 object
-        text_columns = [
-            "匹配著作权人", 
-            "当前结果与游戏简称是否一致", 
-            "当前结果与运营单位是否一致", 
-            "是否建议人工排查"
-        ]
-        for col in text_columns:
-            if col in df_result.columns:
-                 # 确保列存在，并将其类型设置为object，填充NA值为空字符串以保持一致性
-                 df_result[col] = df_result[col].astype(object).fillna('') 
-            else:
-                 # 如果列不存在（理论上不应发生），创建一个object类型的空列
-                 df_result[col] = pd.Series(dtype='object')
-                 
-        # "搜索的结果数量" 列可以尝试设为整数，但需处理可能的NA
-        count_col = "搜索的结果数量"
-        if count_col in df_result.columns:
-            # 尝试转换为整数，无法转换的（如空值）保持原样或设为特定值（如-1或NaN）
-            # 先填充NaN为0或其他标记，再尝试转换类型
-            df_result[count_col] = pd.to_numeric(df_result[count_col], errors='coerce').fillna(0).astype(int)
-        else:
-             df_result[count_col] = pd.Series(dtype='int')
-        # --- 类型处理结束 ---
+        # 结果输出：逐个游戏写入内存工作簿，Excel 只在检查点和结束时整体写出
+        try:
+            sink = CopyrightResultSink(new_excel_path)
+        except Exception as e:
+            self.update_progress(f"加载Excel副本失败: {str(e)}")
+            if old_callback:
+                self.progress_callback = old_callback
+            return None
 
         # 创建Edge浏览器选项
         opt = webdriver.EdgeOptions()
@@ -705,15 +810,13 @@ class CopyrightQuery:
             # 使用WebDriverHelper创建浏览器实例
             self.update_progress("正在准备启动浏览器...", 20)
             
-            # 先尝试清理可能存在的残留进程
-            WebDriverHelper.kill_msedgedriver()
-            self.update_progress("已清理可能存在的WebDriver进程", 21)
-            
             # 创建浏览器实例
             driver = WebDriverHelper.create_driver(
                 options=opt, 
                 headless=False,  # 不使用无头模式，因为需要用户登录
-                progress_callback=self.filter_webdriver_message
+                progress_callback=self.filter_webdriver_message,
+                profile=self.browser_profile,
+                use_standby=False  # 需要可见窗口登录，待命的无头浏览器不适用
             )
             
             if not driver:
@@ -726,14 +829,13 @@ class CopyrightQuery:
             
             # 注册WebDriver到任务管理器
             task_manager.register_webdriver(driver)
+            # 登记到取消令牌：停止查询时立即关闭浏览器
+            self.cancel_token.attach_driver(driver)
             
             # 设置页面加载超时
             driver.set_page_load_timeout(30)
             driver.set_script_timeout(30)
             
-            # 使用第一个游戏作为示例，访问企查查著作权查询页面
-            first_game = list(game_operator_dict.keys())[0]
-            # encoded_name = quote(first_game) # 第一次访问时再编码
             # qcc_url = f"https://www.qcc.com/web_searchCopyright?searchKey={encoded_name}&type=2" # 移到循环内
             
             # self.update_progress(f"正在访问企查查著作权查询页面: {qcc_url}", 30)
@@ -790,9 +892,25 @@ class CopyrightQuery:
                     self.update_progress("继续查询...", 37)
             # --- 登录确认结束 --- 
             
-            # 获取游戏列表，转换为列表以便按索引访问
-            game_list = list(game_operator_dict.items())
             total_games = len(game_list)
+
+            # 任务日志：按输入文件记录已完成查询的游戏（运营单位+名称）及其结果
+            journal = JobJournal(f"copyright_{os.path.abspath(excel_path)}")
+            if not resume:
+                journal.clear()
+            make_unit = lambda g_n, op: f"{op}:{g_n}"
+            resumed = 0
+            for game_name, operator in game_list:
+                if journal.is_done(make_unit(game_name, operator)):
+                    row_idx = row_indices.get((game_name, operator))
+                    if row_idx is not None:
+                        for col, val in (journal.get_payload(make_unit(game_name, operator)) or {}).items():
+                            sink.set(row_idx, col, val)
+                    resumed += 1
+            if resumed:
+                sink.checkpoint(force=True)
+                self.update_progress(
+                    f"检测到该文件上次未完成的查询，已恢复 {resumed}/{total_games} 个游戏的结果，将自动跳过这些游戏")
             
             # 从指定索引开始查询
             if start_from_index > 0:
@@ -800,6 +918,13 @@ class CopyrightQuery:
             
             # 查询每个游戏的著作权信息
             for i in range(start_from_index, total_games):
+                # 提交上一个游戏的结果（各分支 continue 后也会在此落盘）
+                sink.commit()
+                self.cancel_token.raise_if_cancelled()
+                
+                # 已有结果的游戏直接跳过
+                if journal.is_done(make_unit(*game_list[i])):
+                    continue
                 # 记录当前处理索引，用于可能的恢复
                 self.current_game_index = i
                 
@@ -816,30 +941,29 @@ class CopyrightQuery:
                         # 首次访问，使用URL导航
                         encoded_name = quote(game_name)
                         search_url = qcc_base_url + encoded_name
-                        self.update_progress(f"首次访问，使用URL: {search_url}")
+                        self.debug(f"首次访问，使用URL: {search_url}")
                         try:
                              driver.get(search_url)
                              is_first_game = False # 更新标记
                         except Exception as e_first_nav:
                              self.update_progress(f"首次通过URL访问失败: {e_first_nav}, 跳过此游戏")
-                             row_idx = row_indices.get(game_name)
-                             if row_idx is not None: df_result.loc[row_idx, "是否建议人工排查"] = "是 (首次URL访问失败)"
+                             row_idx = row_indices.get((game_name, operator))
+                             if row_idx is not None: sink.set(row_idx, "是否建议人工排查", "是 (首次URL访问失败)")
                              continue # 进行下一个游戏
                     else:
                         # 后续访问，使用页面内搜索框
-                        self.update_progress(f"后续访问，使用页面内搜索框查询: '{game_name}'")
+                        self.debug(f"后续访问，使用页面内搜索框查询: '{game_name}'")
                         try:
                             search_box_id = "copyrightSearchKey"
-                            wait = WebDriverWait(driver, 15)
-                            search_input = wait.until(EC.presence_of_element_located((By.ID, search_box_id)))
-                            self.update_progress("找到搜索框，准备输入...")
+                            search_input = self.cancel_token.until(driver, 15, EC.presence_of_element_located((By.ID, search_box_id)))
+                            self.debug("找到搜索框，准备输入...")
                             # search_input.clear() # 改用更可靠的清空方式
                             search_input.send_keys(Keys.CONTROL + "a") # 全选
                             search_input.send_keys(Keys.DELETE)     # 删除
-                            self.update_progress("已清空搜索框内容")
+                            self.debug("已清空搜索框内容")
                             search_input.send_keys(game_name)
                             search_input.send_keys(Keys.RETURN) # 模拟回车
-                            self.update_progress(f"已在搜索框输入 '{game_name}' 并回车")
+                            self.debug(f"已在搜索框输入 '{game_name}' 并回车")
                         except (TimeoutException, NoSuchElementException) as e_searchbox:
                             self.update_progress(f"错误：无法找到或操作搜索框: {e_searchbox}")
                             self.save_debug_info(driver, f"searchbox_error_{game_name[:10]}")
@@ -851,8 +975,8 @@ class CopyrightQuery:
                                 self.update_progress(f"URL回退导航成功: {search_url}")
                             except Exception as e_fallback_nav:
                                  self.update_progress(f"URL回退失败: {e_fallback_nav}, 跳过此游戏")
-                                 row_idx = row_indices.get(game_name)
-                                 if row_idx is not None: df_result.loc[row_idx, "是否建议人工排查"] = "是 (搜索框和URL导航均失败)"
+                                 row_idx = row_indices.get((game_name, operator))
+                                 if row_idx is not None: sink.set(row_idx, "是否建议人工排查", "是 (搜索框和URL导航均失败)")
                                  continue # 进行下一个游戏
                                  
                     # 等待页面加载完成 (无论哪种搜索方式后都需要)
@@ -862,8 +986,8 @@ class CopyrightQuery:
                         self.random_delay(2, 3)
                         if not self.wait_for_page_load(driver, timeout=20):
                             self.update_progress("刷新后仍然无法加载页面，跳过此游戏")
-                            row_idx = row_indices.get(game_name)
-                            if row_idx is not None: df_result.loc[row_idx, "是否建议人工排查"] = "是 (页面加载失败)"
+                            row_idx = row_indices.get((game_name, operator))
+                            if row_idx is not None: sink.set(row_idx, "是否建议人工排查", "是 (页面加载失败)")
                             continue # 进行下一个游戏
                     # --- 搜索执行结束 ---
                             
@@ -879,7 +1003,7 @@ class CopyrightQuery:
                         current_state_count = self.get_search_result_count(driver)
                         # 检查暂停状态 (获取当前状态结果数后)
                         if self.paused:
-                             df_result.to_excel(new_excel_path, index=False)
+                             sink.checkpoint(force=True)
                              self.update_progress(f"获取当前状态结果数时暂停，已保存进度: {new_excel_path}")
                              # 暂停后，无法确定状态，最好跳过当前，让下一个游戏重新开始判断
                              # 并且重置状态标记，避免影响下一个游戏
@@ -889,12 +1013,11 @@ class CopyrightQuery:
                         self.update_progress(f"当前状态结果数量: {current_state_count}")
                         
                         if current_state_count > 0:
-                            current_operator = game_operator_dict.get(game_name, "") 
                             current_state_owner, current_state_game_match, current_state_operator_match, current_state_manual_check = \
-                                self.extract_and_match_results(driver, game_name, current_operator)
+                                self.extract_and_match_results(driver, game_name, operator)
                             # 检查暂停状态 (提取当前状态结果后)
                             if self.paused:
-                                df_result.to_excel(new_excel_path, index=False)
+                                sink.checkpoint(force=True)
                                 self.update_progress(f"提取当前状态结果时暂停，已保存进度: {new_excel_path}")
                                 is_state_filtered = False # 重置状态
                                 continue # 跳到下一个游戏
@@ -909,7 +1032,7 @@ class CopyrightQuery:
                         # 即使出错，也可能需要根据预期状态进行筛选操作，所以不直接continue
 
                     # --- 步骤3 & 4 & 5: 根据预期状态决定操作并记录结果 ---
-                    row_idx = row_indices.get(game_name)
+                    row_idx = row_indices.get((game_name, operator))
                     if row_idx is None:
                         self.update_progress(f"警告：未找到游戏 '{game_name}' 在原始Excel中的行索引")
                         # 如果找不到行，我们仍然需要根据逻辑更新 is_state_filtered 标志
@@ -920,24 +1043,24 @@ class CopyrightQuery:
                         
                     if is_state_filtered:
                         # === 情况A: 预期页面是已筛选状态 ===
-                        self.update_progress("处理预期为[已筛选]状态的情况...")
+                        self.debug("处理预期为[已筛选]状态的情况...")
                         if current_state_count > 0:
                              # A.1: 已筛选状态有结果 -> 直接使用
-                             self.update_progress("当前已筛选状态结果 > 0，直接使用此结果")
+                             self.debug("当前已筛选状态结果 > 0，直接使用此结果")
                              if row_idx is not None: # 只有找到行才写入
-                                 df_result.loc[row_idx, "搜索的结果数量"] = current_state_count 
-                                 df_result.loc[row_idx, "匹配著作权人"] = current_state_owner
-                                 df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = current_state_game_match
-                                 df_result.loc[row_idx, "当前结果与运营单位是否一致"] = current_state_operator_match
-                                 df_result.loc[row_idx, "是否建议人工排查"] = current_state_manual_check
-                                 self.update_progress(f"已更新行 {row_idx} (使用当前已筛选结果)")
+                                 sink.set(row_idx, "搜索的结果数量", current_state_count) 
+                                 sink.set(row_idx, "匹配著作权人", current_state_owner)
+                                 sink.set(row_idx, "当前结果与游戏简称是否一致", current_state_game_match)
+                                 sink.set(row_idx, "当前结果与运营单位是否一致", current_state_operator_match)
+                                 sink.set(row_idx, "是否建议人工排查", current_state_manual_check)
+                                 self.debug(f"已更新行 {row_idx} (使用当前已筛选结果)")
                                  # 下一个游戏开始时，状态依然是已筛选
                                  next_is_state_filtered = True 
                         else: # current_state_count == 0 or extraction failed
                              # A.2: 已筛选状态无结果 (或提取失败) -> 取消筛选并使用取消后的结果
                              self.update_progress("当前已筛选状态结果为 0 或提取失败，尝试取消筛选...")
                              # 显式点击筛选器以取消勾选
-                             self.update_progress("尝试点击筛选器以取消...")
+                             self.debug("尝试点击筛选器以取消...")
                              clicked_filter1_off = self.click_filter_checkbox(driver, '1年内')
                              self.random_delay(0.5, 1)
                              clicked_filter2_off = self.click_filter_checkbox(driver, '1-3年')
@@ -948,10 +1071,10 @@ class CopyrightQuery:
                              # 检查暂停(取消筛选时)
                              if self.paused:
                                  if row_idx is not None: # 保存一下之前的(0结果)状态
-                                      df_result.loc[row_idx, "搜索的结果数量"] = current_state_count # 通常是0
-                                      df_result.loc[row_idx, "匹配著作权人"] = current_state_owner # 通常是""
-                                      df_result.loc[row_idx, "是否建议人工排查"] = current_state_manual_check + " (取消筛选时暂停)"
-                                 df_result.to_excel(new_excel_path, index=False) 
+                                      sink.set(row_idx, "搜索的结果数量", current_state_count) # 通常是0
+                                      sink.set(row_idx, "匹配著作权人", current_state_owner) # 通常是""
+                                      sink.set(row_idx, "是否建议人工排查", current_state_manual_check + " (取消筛选时暂停)")
+                                 sink.checkpoint(force=True)
                                  self.update_progress(f"取消筛选时暂停，已保存进度: {new_excel_path}")
                                  is_state_filtered = False # 重置状态
                                  continue
@@ -959,7 +1082,7 @@ class CopyrightQuery:
                              if not clicked_filter1_off or not clicked_filter2_off or not clicked_filter3_off:
                                  self.update_progress("警告：取消筛选操作可能未完全成功")
                              else:
-                                 self.update_progress("已尝试点击取消筛选")
+                                 self.debug("已尝试点击取消筛选")
                              
                              # 获取取消筛选后的结果
                              unfiltered_count = 0
@@ -972,35 +1095,34 @@ class CopyrightQuery:
                                  if self.paused: raise Exception("获取取消筛选后结果数时暂停") # 主动抛出以便统一处理
                                  self.update_progress(f"取消筛选后结果数量: {unfiltered_count}")
                                  if unfiltered_count > 0:
-                                     current_operator = game_operator_dict.get(game_name, "") 
                                      unfiltered_owner, unfiltered_game_match, unfiltered_operator_match, unfiltered_manual_check = \
-                                         self.extract_and_match_results(driver, game_name, current_operator)
+                                         self.extract_and_match_results(driver, game_name, operator)
                                      if self.paused: raise Exception("提取取消筛选后结果时暂停")
                              except Exception as e_unfilter:
                                  self.update_progress(f"获取或提取取消筛选后结果时出错: {e_unfilter}")
                                  unfiltered_manual_check = f"是 (取消筛选后处理异常: {str(e_unfilter)[:30]}...)"
                                  if self.paused: # 如果是暂停导致的异常
                                      if row_idx is not None: # 保存一下之前的(0结果)状态
-                                          df_result.loc[row_idx, "搜索的结果数量"] = current_state_count
-                                          df_result.loc[row_idx, "是否建议人工排查"] = current_state_manual_check + " (处理取消筛选结果时暂停)"
-                                     df_result.to_excel(new_excel_path, index=False)
+                                          sink.set(row_idx, "搜索的结果数量", current_state_count)
+                                          sink.set(row_idx, "是否建议人工排查", current_state_manual_check + " (处理取消筛选结果时暂停)")
+                                     sink.checkpoint(force=True)
                                      self.update_progress(f"处理取消筛选结果时暂停，已保存进度: {new_excel_path}")
                                      is_state_filtered = False # 重置状态
                                      continue
                                      
                              # 记录取消筛选后的结果
                              if row_idx is not None:
-                                 df_result.loc[row_idx, "搜索的结果数量"] = unfiltered_count 
-                                 df_result.loc[row_idx, "匹配著作权人"] = unfiltered_owner
-                                 df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = unfiltered_game_match
-                                 df_result.loc[row_idx, "当前结果与运营单位是否一致"] = unfiltered_operator_match
-                                 df_result.loc[row_idx, "是否建议人工排查"] = unfiltered_manual_check + " (来自取消筛选)"
-                                 self.update_progress(f"已更新行 {row_idx} (使用取消筛选后的结果)")
+                                 sink.set(row_idx, "搜索的结果数量", unfiltered_count) 
+                                 sink.set(row_idx, "匹配著作权人", unfiltered_owner)
+                                 sink.set(row_idx, "当前结果与游戏简称是否一致", unfiltered_game_match)
+                                 sink.set(row_idx, "当前结果与运营单位是否一致", unfiltered_operator_match)
+                                 sink.set(row_idx, "是否建议人工排查", unfiltered_manual_check + " (来自取消筛选)")
+                                 self.debug(f"已更新行 {row_idx} (使用取消筛选后的结果)")
                                  # 下一个游戏开始时，状态是未筛选
                                  next_is_state_filtered = False
                     else:
                         # === 情况B: 预期页面是未筛选状态 ===
-                        self.update_progress("处理预期为[未筛选]状态的情况...")
+                        self.debug("处理预期为[未筛选]状态的情况...")
                         # 先记录下当前的未筛选结果 (即使是0也要记，用于后续对比)
                         initial_unfiltered_count = current_state_count
                         initial_unfiltered_owner = current_state_owner
@@ -1010,7 +1132,7 @@ class CopyrightQuery:
                         self.update_progress(f"已记录初始未筛选结果: 数量={initial_unfiltered_count}")
                         
                         # 尝试应用筛选
-                        self.update_progress("尝试应用筛选条件...")
+                        self.debug("尝试应用筛选条件...")
                         clicked_filter1_on = self.click_filter_checkbox(driver, '1年内')
                         self.random_delay(0.5, 1)
                         clicked_filter2_on = self.click_filter_checkbox(driver, '1-3年')
@@ -1021,12 +1143,12 @@ class CopyrightQuery:
                         # 检查暂停(应用筛选时)
                         if self.paused:
                              if row_idx is not None: # 保存初始结果
-                                 df_result.loc[row_idx, "搜索的结果数量"] = initial_unfiltered_count 
-                                 df_result.loc[row_idx, "匹配著作权人"] = initial_unfiltered_owner
-                                 df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = initial_unfiltered_game_match
-                                 df_result.loc[row_idx, "当前结果与运营单位是否一致"] = initial_unfiltered_operator_match
-                                 df_result.loc[row_idx, "是否建议人工排查"] = initial_unfiltered_manual_check + " (应用筛选时暂停)"
-                             df_result.to_excel(new_excel_path, index=False)
+                                 sink.set(row_idx, "搜索的结果数量", initial_unfiltered_count) 
+                                 sink.set(row_idx, "匹配著作权人", initial_unfiltered_owner)
+                                 sink.set(row_idx, "当前结果与游戏简称是否一致", initial_unfiltered_game_match)
+                                 sink.set(row_idx, "当前结果与运营单位是否一致", initial_unfiltered_operator_match)
+                                 sink.set(row_idx, "是否建议人工排查", initial_unfiltered_manual_check + " (应用筛选时暂停)")
+                             sink.checkpoint(force=True)
                              self.update_progress(f"应用筛选时暂停，已使用初始未筛选结果保存进度: {new_excel_path}")
                              is_state_filtered = False # 重置状态
                              continue
@@ -1034,7 +1156,7 @@ class CopyrightQuery:
                         if not clicked_filter1_on or not clicked_filter2_on or not clicked_filter3_on:
                              self.update_progress("警告：应用筛选操作可能未完全成功")
                         else:
-                             self.update_progress("已尝试点击应用筛选")
+                             self.debug("已尝试点击应用筛选")
                              
                         # 获取显式应用筛选后的结果
                         filtered_count = 0
@@ -1047,21 +1169,20 @@ class CopyrightQuery:
                             if self.paused: raise Exception("获取应用筛选后结果数时暂停")
                             self.update_progress(f"应用筛选后结果数量: {filtered_count}")
                             if filtered_count > 0:
-                                current_operator = game_operator_dict.get(game_name, "") 
                                 filtered_owner, filtered_game_match, filtered_operator_match, filtered_manual_check = \
-                                    self.extract_and_match_results(driver, game_name, current_operator)
+                                    self.extract_and_match_results(driver, game_name, operator)
                                 if self.paused: raise Exception("提取应用筛选后结果时暂停")
                         except Exception as e_filter_on:
                             self.update_progress(f"获取或提取应用筛选后结果时出错: {e_filter_on}")
                             filtered_manual_check = f"是 (应用筛选后处理异常: {str(e_filter_on)[:30]}...)"
                             if self.paused:
                                 if row_idx is not None: # 保存初始结果
-                                    df_result.loc[row_idx, "搜索的结果数量"] = initial_unfiltered_count 
-                                    df_result.loc[row_idx, "匹配著作权人"] = initial_unfiltered_owner
-                                    df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = initial_unfiltered_game_match
-                                    df_result.loc[row_idx, "当前结果与运营单位是否一致"] = initial_unfiltered_operator_match
-                                    df_result.loc[row_idx, "是否建议人工排查"] = initial_unfiltered_manual_check + " (处理筛选结果时暂停)"
-                                df_result.to_excel(new_excel_path, index=False)
+                                    sink.set(row_idx, "搜索的结果数量", initial_unfiltered_count) 
+                                    sink.set(row_idx, "匹配著作权人", initial_unfiltered_owner)
+                                    sink.set(row_idx, "当前结果与游戏简称是否一致", initial_unfiltered_game_match)
+                                    sink.set(row_idx, "当前结果与运营单位是否一致", initial_unfiltered_operator_match)
+                                    sink.set(row_idx, "是否建议人工排查", initial_unfiltered_manual_check + " (处理筛选结果时暂停)")
+                                sink.checkpoint(force=True)
                                 self.update_progress(f"处理应用筛选结果时暂停，已使用初始未筛选结果保存进度: {new_excel_path}")
                                 is_state_filtered = False # 重置状态
                                 continue
@@ -1071,28 +1192,28 @@ class CopyrightQuery:
                             if filtered_count > 0:
                                  # B.1: 应用筛选后有结果 -> 使用筛选后的
                                  self.update_progress("应用筛选后结果 > 0，使用筛选后结果")
-                                 df_result.loc[row_idx, "搜索的结果数量"] = filtered_count 
-                                 df_result.loc[row_idx, "匹配著作权人"] = filtered_owner
-                                 df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = filtered_game_match
-                                 df_result.loc[row_idx, "当前结果与运营单位是否一致"] = filtered_operator_match
-                                 df_result.loc[row_idx, "是否建议人工排查"] = filtered_manual_check
-                                 self.update_progress(f"已更新行 {row_idx} (使用应用筛选后的结果)")
+                                 sink.set(row_idx, "搜索的结果数量", filtered_count) 
+                                 sink.set(row_idx, "匹配著作权人", filtered_owner)
+                                 sink.set(row_idx, "当前结果与游戏简称是否一致", filtered_game_match)
+                                 sink.set(row_idx, "当前结果与运营单位是否一致", filtered_operator_match)
+                                 sink.set(row_idx, "是否建议人工排查", filtered_manual_check)
+                                 self.debug(f"已更新行 {row_idx} (使用应用筛选后的结果)")
                                  # 下一个游戏开始时，状态是已筛选
                                  next_is_state_filtered = True
                             else: # filtered_count == 0
                                  # B.2: 应用筛选后无结果 -> 使用初始未筛选的
                                  self.update_progress("应用筛选后结果为 0，回退使用初始未筛选结果")
-                                 df_result.loc[row_idx, "搜索的结果数量"] = initial_unfiltered_count 
-                                 df_result.loc[row_idx, "匹配著作权人"] = initial_unfiltered_owner
-                                 df_result.loc[row_idx, "当前结果与游戏简称是否一致"] = initial_unfiltered_game_match
-                                 df_result.loc[row_idx, "当前结果与运营单位是否一致"] = initial_unfiltered_operator_match
+                                 sink.set(row_idx, "搜索的结果数量", initial_unfiltered_count) 
+                                 sink.set(row_idx, "匹配著作权人", initial_unfiltered_owner)
+                                 sink.set(row_idx, "当前结果与游戏简称是否一致", initial_unfiltered_game_match)
+                                 sink.set(row_idx, "当前结果与运营单位是否一致", initial_unfiltered_operator_match)
                                  # 修改人工排查建议以反映情况
                                  manual_check_note = initial_unfiltered_manual_check
                                  if manual_check_note == "否": manual_check_note = "否 (筛选后无结果，使用筛选前数据)"
                                  elif manual_check_note.startswith("是"): manual_check_note += " (筛选后无结果)"
                                  else: manual_check_note += " (筛选后无结果)"
-                                 df_result.loc[row_idx, "是否建议人工排查"] = manual_check_note
-                                 self.update_progress(f"已更新行 {row_idx} (使用初始未筛选结果)")
+                                 sink.set(row_idx, "是否建议人工排查", manual_check_note)
+                                 self.debug(f"已更新行 {row_idx} (使用初始未筛选结果)")
                                  # 下一个游戏开始时，状态是未筛选 (因为筛选尝试失败了)
                                  next_is_state_filtered = False
                         else: # row_idx is None
@@ -1105,53 +1226,74 @@ class CopyrightQuery:
                                 
                     # 在循环末尾更新状态标记，供下一次迭代使用
                     is_state_filtered = next_is_state_filtered
+
+                    # 记入任务日志（暂停/失败而跳过的游戏不记录，下次运行会重新查询）
+                    if row_idx is not None:
+                        journal.mark_done(make_unit(game_name, operator), sink.get_row(row_idx, RESULT_COLUMNS))
                     
                     # --- 原来的步骤4/5 (获取筛选后数量/判断写入) 被上面的逻辑覆盖，移除或注释 --- 
                     # self.update_progress("\\n获取筛选后的结果数量...")
 
-                    # 保存中间结果
-                    if (i + 1) % 5 == 0 or i == total_games - 1:
-                        try:
-                           df_result.to_excel(new_excel_path, index=False)
+                    # 保存中间结果：结果已记入任务日志，Excel 按时间间隔整体写出
+                    try:
+                       if sink.checkpoint():
                            self.update_progress(f"已保存进度到: {new_excel_path}")
-                        except Exception as save_e:
-                           self.update_progress(f"保存Excel时出错: {str(save_e)}")
+                    except Exception as save_e:
+                       self.update_progress(f"保存Excel时出错: {str(save_e)}")
                 
+                except TaskCancelled:
+                    raise
                 except Exception as e:
+                    # 浏览器被取消操作关闭时，后续调用会出错，此时按取消处理
+                    self.cancel_token.raise_if_cancelled()
                     self.update_progress(f"处理游戏 {game_name} 时出错: {str(e)}")
                     self.save_debug_info(driver, f"game_error_{game_name.replace(' ', '_')}")
-                    row_idx = row_indices.get(game_name)
+                    row_idx = row_indices.get((game_name, operator))
                     if row_idx is not None:
-                        df_result.loc[row_idx, "是否建议人工排查"] = f"是 (处理异常: {str(e)[:50]}...)"
+                        sink.set(row_idx, "是否建议人工排查", f"是 (处理异常: {str(e)[:50]}...)")
                     try:
-                        df_result.to_excel(new_excel_path, index=False)
+                        sink.commit()
                     except Exception as save_e:
                            self.update_progress(f"保存Excel时出错: {str(save_e)}")
                 
                 # 在处理完一个游戏后增加较长的随机延迟（3-5秒）
                 self.random_delay(3, 5)
-                self.update_progress("增加随机延迟，减轻反爬机制作用...")
+                self.debug("增加随机延迟，减轻反爬机制作用...")
             
             # 保存最终结果
             try:
-               df_result.to_excel(new_excel_path, index=False)
+               sink.finalize()
                self.update_progress(f"\n著作权人查询完成，结果已保存到: {new_excel_path}", 95)
             except Exception as save_e:
                self.update_progress(f"最终保存Excel时出错: {str(save_e)}")
+
+            # 全部游戏都已有结果时清除任务日志，否则保留供下次自动续查
+            unfinished = [name for name, op in game_list if not journal.is_done(make_unit(name, op))]
+            if unfinished:
+                self.update_progress(f"有 {len(unfinished)} 个游戏未完成查询，重新运行同一Excel将自动补查这些游戏")
+            else:
+                journal.clear()
             
+        except TaskCancelled:
+            # 已查询的游戏都已记入任务日志，重新运行同一Excel会从中断处继续
+            try:
+                sink.finalize()
+                self.update_progress(f"查询已取消，已保存当前进度到: {new_excel_path}")
+            except Exception as save_error:
+                self.update_progress(f"保存进度时出错: {str(save_error)}")
         except Exception as e:
             self.update_progress(f"浏览器操作过程中出错: {str(e)}")
             # 发生异常时尝试保存当前进度
             try:
-                if 'df_result' in locals() and new_excel_path:
-                    df_result.to_excel(new_excel_path, index=False)
-                    self.update_progress(f"已保存当前进度到: {new_excel_path}")
+                sink.finalize()
+                self.update_progress(f"已保存当前进度到: {new_excel_path}")
             except Exception as save_error:
                 self.update_progress(f"保存进度时出错: {str(save_error)}")
         finally:
             # 关闭浏览器
             if driver:
                 # 取消注册WebDriver
+                self.cancel_token.detach_driver(driver)
                 task_manager.unregister_webdriver(driver)
                 try:
                     # 使用WebDriverHelper安全关闭浏览器
@@ -1166,10 +1308,10 @@ class CopyrightQuery:
         
         return new_excel_path
     
-    def process_excel(self, excel_path, start_from_index=0):
+    def process_excel(self, excel_path, start_from_index=0, resume=True):
         """处理Excel文件并查询著作权人信息"""
-        # 直接处理整个Excel文件，可以指定开始的索引以恢复进度
-        return self.query_copyright(excel_path, start_from_index=start_from_index)
+        # 直接处理整个Excel文件，可以指定开始的索引以恢复进度；resume=True 时自动跳过上次已查询的游戏
+        return self.query_copyright(excel_path, start_from_index=start_from_index, resume=resume)
 
     def check_anti_crawl(self, exception_msg=None):
         """检查是否遇到了反爬机制"""
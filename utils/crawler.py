@@ -2,7 +2,6 @@
 
 import sys  # 确保导入sys模块
 import os
-import time
 import random
 import datetime
 import openpyxl
@@ -15,13 +14,30 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.service import Service as EdgeService
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 from PySide6.QtCore import Signal # Import Signal
 
 # 导入任务管理器
 from utils.task_manager import task_manager
+# 导入版号查询持久化缓存
+from utils.version_number_cache import version_number_cache
+# 导入单写者Excel输出组件
+from utils.excel_writer import BufferedExcelWriter
+# 导入任务日志（断点续爬）
+from utils.job_journal import JobJournal
+# 导入自适应并发控制
+from utils.adaptive_concurrency import (
+    AdaptiveController, AdaptiveThreadPoolExecutor, AntiCrawlDetected, detect_anti_crawl
+)
+# 导入批量DOM提取（单次 execute_script 取出整页字段）
+from utils.dom_extract import (
+    extract_calendar_cards, extract_publisher_info, extract_nppa_rows, extract_nppa_detail
+)
+# 导入分级进度日志通道
+from utils.progress_channel import ProgressChannel, get_file_logger, DEBUG, INFO, WARNING, UI_LEVEL
+# 导入协作式取消（停止任务时立即结束等待并关闭浏览器）
+from utils.cancellation import CancellationToken, TaskCancelled, cancellable_sleep
 
 # 导入WebDriverHelper
 try:
@@ -30,7 +46,7 @@ except ImportError:
     # 如果导入失败，创建一个简易的辅助类
     class WebDriverHelper:
         @staticmethod
-        def create_driver(options=None, headless=True, progress_callback=None):
+        def create_driver(options=None, headless=True, progress_callback=None, profile=None):
             # 默认使用原始方法创建浏览器
             opt = options or webdriver.EdgeOptions()
             if headless:
@@ -48,10 +64,32 @@ except ImportError:
                 except:
                     pass
 
+# 新游爬取的初始并发数与并发上限（自适应控制器在该范围内调整）
 MAX_WORKERS = 3
+MAX_WORKERS_CEILING = 6
+# 版号匹配的初始并发数与并发上限
+MATCH_WORKERS = 2
+MATCH_WORKERS_CEILING = 4
+# 新游详情页（厂商信息）的初始并发数与并发上限，与列表页扫描分开计算
+DETAIL_WORKERS = 2
+DETAIL_WORKERS_CEILING = 4
+# 失败的任务单元（某一天/某个游戏）在本轮结束后单独重试的轮数
+MAX_RETRY_ROUNDS = 2
+# 站点地址（离线基准测试时会指向本地的网页快照服务器）
+TAPTAP_BASE_URL = "https://www.taptap.cn"
+NPPA_QUERY_URL = "https://www.nppa.gov.cn/bsfw/jggs/cxjg/index.html"
+# 爬虫使用的浏览器配置档：只读取页面文本，使用精简模式（不加载图片/媒体/字体，eager 加载策略）
+BROWSER_PROFILE = "lean"
 
-def progress_log_callback(callback, message):
-    """统一日志输出，处理Qt Signal"""
+def progress_log_callback(callback, message, level=INFO):
+    """统一日志输出，处理进度通道、Qt Signal 和普通回调；
+    低于界面级别的调试信息只写入日志文件，不发送到界面"""
+    if isinstance(callback, ProgressChannel):
+        callback.post(message, level)
+        return
+    if level < UI_LEVEL:
+        get_file_logger("crawler").log(level, message)
+        return
     if callback:
         try:
             # Check if it's a Qt Signal instance
@@ -68,9 +106,9 @@ def progress_log_callback(callback, message):
     else:
         print(message) # Fallback if no callback provided
 
-def random_delay(min_sec=0.5, max_sec=1.5):
-    """避免爬取过快"""
-    time.sleep(random.uniform(min_sec, max_sec))
+def random_delay(min_sec=0.5, max_sec=1.5, cancel_token=None):
+    """避免爬取过快；传入 cancel_token 时任务取消后立即抛出 TaskCancelled"""
+    cancellable_sleep(random.uniform(min_sec, max_sec), cancel_token)
 
 def safe_execute(func):
     """装饰器统一处理异常"""
@@ -78,7 +116,7 @@ def safe_execute(func):
         try:
             return func(*args, progress_callback=progress_callback, **kwargs)
         except Exception as e:
-            progress_log_callback(progress_callback, f"执行出错: {str(e)}")
+            progress_log_callback(progress_callback, f"执行出错: {str(e)}", WARNING)
             if 'progress_percent_callback' in kwargs:
                 kwargs['progress_percent_callback'](100, 0)
             return None
@@ -93,13 +131,21 @@ def crawl_new_games(
     end_date_str,
     progress_callback=None,
     enable_version_match=True,
-    progress_percent_callback=None
+    progress_percent_callback=None,
+    resume=False,
+    cancel_token=None
 ):
     """
     1. 无"序号"列；列头: [ "日期", "游戏名称", "状态", "厂商", "类型", "评分" ]
-    2. 分天并发，每日爬完就输出并写到 Excel，但最终爬完后，再做一次"按日期升序"全表排序。
+    2. 分天并发扫描日历列表页，详情页按链接去重后由独立线程池并发获取；
+       每日数据齐全后就输出并记录到 Excel 写入组件，最终爬完后按日期升序一次性写出。
     3. 若 enable_version_match=True，则自动在同一个 Excel 里匹配版号并存储（不改名/不另存）。
+    4. 每爬完一天即记入任务日志；某天失败不会中止整个任务，而是在本轮结束后单独重试。
+       resume=True 时跳过同一日期范围内上次已爬完的日期，直接复用其结果。
+    5. 调用 cancel_token.cancel() 可随时停止：等待立即结束、浏览器立即关闭，已爬完的日期照常写出并保留在任务日志中。
     """
+    if cancel_token is None:
+        cancel_token = CancellationToken("新游爬取")
 
     # 提示
     progress_log_callback(progress_callback,
@@ -138,222 +184,325 @@ def crawl_new_games(
     today_str = datetime.date.today().strftime("%Y-%m-%d")
     excel_filename = f"游戏数据_{today_str}.xlsx"
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title="游戏数据"
-    ws.append(["日期","游戏名称","状态","厂商","类型","评分"])  # 无"序号"
-    wb.save(excel_filename)
+    writer = BufferedExcelWriter(
+        excel_filename,
+        headers=["日期","游戏名称","状态","厂商","类型","评分"],  # 无"序号"
+        sheet_title="游戏数据"
+    )
+    writer.checkpoint(force=True)
+
+    def parse_date(ds):
+        try:
+            return datetime.datetime.strptime(ds, "%Y-%m-%d")
+        except:
+            return datetime.datetime(1970,1,1)
+    sort_by_date = lambda row: parse_date(row[0])
 
     progress_log_callback(progress_callback,
         f"共需爬取 {total_dates} 天的新游信息，将分天爬取...")
 
+    # 自适应并发控制：根据耗时、失败率和反爬信号调整并发天数与请求间隔
+    day_controller = AdaptiveController(
+        "新游爬取", initial_workers=MAX_WORKERS, max_workers=MAX_WORKERS_CEILING,
+        cancel_token=cancel_token
+    )
+    # 详情页（厂商信息）使用独立的并发额度
+    detail_controller = AdaptiveController(
+        "详情页", initial_workers=DETAIL_WORKERS, max_workers=DETAIL_WORKERS_CEILING,
+        cancel_token=cancel_token
+    )
+
+    # 创建进度回调的包装器
+    wrapped_callback = lambda message, percent=None: helper_progress_callback(progress_callback, message)
+
     def crawl_one_day(d):
         """
-        返回 (day_str, [ (name, status, man, types, rating) ])，若结构异常 => raise RuntimeError
+        日历列表页快速扫描（不打开详情页）：
+        返回 (day_str, [ (name, status, types, rating, href) ])，若结构异常 => raise RuntimeError
         """
         day_str = d.strftime("%Y-%m-%d")
         opt = webdriver.EdgeOptions()
-        # 创建进度回调的包装器
-        wrapped_callback = lambda message, percent=None: helper_progress_callback(progress_callback, message)
         # 使用WebDriverHelper创建WebDriver
         driver = WebDriverHelper.create_driver(
             options=opt, 
             headless=True,
-            progress_callback=wrapped_callback
+            progress_callback=wrapped_callback,
+            profile=BROWSER_PROFILE
         )
         # 注册WebDriver到任务管理器
         task_manager.register_webdriver(driver)
         
         results = []
         try:
-            url = f"https://www.taptap.cn/app-calendar/{day_str}"
+            # 登记到取消令牌：任务取消时立即关闭浏览器
+            cancel_token.attach_driver(driver)
+            url = f"{TAPTAP_BASE_URL}/app-calendar/{day_str}"
             driver.get(url)
             
             # 修改：先等待页面加载完成
             try:
-                WebDriverWait(driver, 10).until(
+                cancel_token.until(driver, 10,
                     EC.presence_of_element_located((By.CSS_SELECTOR, 
                         "div.daily-event-list__content"))
                 )
-            except:
+            except TaskCancelled:
+                raise
+            except Exception:
+                blocked_kw = detect_anti_crawl(driver)
+                if blocked_kw:
+                    raise AntiCrawlDetected(f"页面疑似触发反爬限制（{blocked_kw}），稍后将降速重试。")
                 raise RuntimeError("网页结构疑似存在更新变动，请联系开发者进行解决。")
 
-            # 查找游戏元素
-            games = driver.find_elements(
-                By.CSS_SELECTOR,
-                "div.daily-event-list__content > a.tap-router"
-            )
-            
-            # 如果没有游戏，直接返回空列表
-            if not games:
-                return (day_str, [])
+            # 一次脚本调用取出所有卡片字段，避免逐个元素的WebDriver往返
+            cards = extract_calendar_cards(driver)
 
-            for g in games:
-                random_delay()
-                try:
-                    name_el=g.find_element(
-                        By.CSS_SELECTOR,"div.daily-event-app-info__title")
-                    name=name_el.get_attribute("content").strip()
-                except:
-                    name="未知名称"
-                try:
-                    t_list=g.find_elements(
-                        By.CSS_SELECTOR,
-                        "div.daily-event-app-info__tag div.tap-label-tag")
-                    types="/".join([t.text.strip() for t in t_list])
-                except:
-                    types="未知类型"
-                try:
-                    rating_el=g.find_element(
-                        By.CSS_SELECTOR,
-                        "div.daily-event-app-info__rating .tap-rating__number")
-                    rating=rating_el.text.strip()
-                except:
-                    rating="未知评分"
-                try:
-                    st_el=g.find_element(
-                        By.CSS_SELECTOR,"span.event-type-label__title")
-                    status=st_el.text.strip()
-                except:
-                    try:
-                        st2=g.find_element(
-                            By.CSS_SELECTOR,"div.event-recommend-label__title")
-                        status=st2.text.strip()
-                    except:
-                        status="未知状态"
+            for card in cards:
+                # 字段缺失（对应元素或名称的 content 属性不存在）时沿用原有的默认值
+                name = card.get("name")
+                if name is None:
+                    name = "未知名称"
+                types = card.get("types")
+                if types is None:
+                    types = "未知类型"
+                rating = card.get("rating")
+                if rating is None:
+                    rating = "未知评分"
+                status = card.get("status")
+                if status is None:
+                    status = "未知状态"
 
-                # 子页面
-                href=g.get_attribute("href")
+                href = card.get("href") or ""
                 if not href.startswith("http"):
-                    href="https://www.taptap.cn"+href
-                driver.execute_script("window.open(arguments[0]);", href)
-                driver.switch_to.window(driver.window_handles[1])
-                random_delay()
+                    href=TAPTAP_BASE_URL+href
 
-                man="未知厂商"
-                try:
-                    # 等待包含厂商/发行/开发信息的父容器加载
-                    # 使用 'div.row-card.app-intro' 作为更可靠的等待目标
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.row-card.app-intro"))
-                    )
-                    
-                    # 查找所有可能的厂商/发行/开发信息块
-                    # 这些信息通常位于 <a> 标签内，包含一个标签名 (厂商/发行/开发) 和对应的值
-                    # 选择器 'div.flex-center--y a.tap-router' 定位到这些链接
-                    info_elements = driver.find_elements(By.CSS_SELECTOR, "div.flex-center--y a.tap-router")
-                    
-                    # 创建一个字典来存储找到的标签和对应的值
-                    possible_publishers = {}
-                    for elem in info_elements:
-                        try:
-                            # 尝试提取标签名 (如 "厂商", "开发", "发行")
-                            # 标签名位于 class 包含 'gray-06' 和 'mr-6' 的 div 中
-                            label_element = elem.find_element(By.CSS_SELECTOR, "div.gray-06.mr-6")
-                            label = label_element.text.strip()
-                            
-                            # 尝试提取对应的值 (公司名称)
-                            # 公司名位于 class 包含 'tap-text' 和 'tap-text__one-line' 的 div 中
-                            value_element = elem.find_element(By.CSS_SELECTOR, "div.tap-text.tap-text__one-line")
-                            value = value_element.text.strip()
-                            
-                            # 如果成功提取到标签和值，则存入字典
-                            if label and value:
-                                possible_publishers[label] = value
-                                
-                        except Exception:
-                            # 如果在处理某个元素时出错（例如，结构不匹配），则忽略该元素，继续处理下一个
-                            continue 
-                            
-                    # 应用优先级逻辑选择厂商名称
-                    # 定义期望的标签及其优先级顺序
-                    priority = ["厂商", "发行", "开发"]
-                    for key in priority:
-                        # 检查字典中是否存在当前优先级的标签
-                        if key in possible_publishers:
-                            # 如果找到，则使用对应的值作为厂商名称，并停止查找
-                            man = possible_publishers[key]
-                            break 
-
-                except Exception as e:
-                    # 如果在等待或查找元素的整体过程中发生异常 (例如超时)，
-                    # 则保留默认值 "未知厂商"，可以选择性地记录日志
-                    # progress_log_callback(progress_callback, f"提取厂商信息时出错: {e}")
-                    pass # 保留默认值
-
-                driver.close()
-                driver.switch_to.window(driver.window_handles[0])
-
-                results.append( (name, status, man, types, rating) )
+                results.append( (name, status, types, rating, href) )
         finally:
             # 取消注册并关闭WebDriver
+            cancel_token.detach_driver(driver)
             task_manager.unregister_webdriver(driver)
             WebDriverHelper.quit_driver(driver)
         return (day_str, results)
 
+    # 详情页浏览器按线程复用：每个详情线程只启动一个浏览器，依次打开多个详情页
+    detail_local = threading.local()
+    detail_drivers = []
+    detail_drivers_lock = threading.Lock()
+
+    def get_detail_driver():
+        driver = getattr(detail_local, "driver", None)
+        if driver is None:
+            driver = WebDriverHelper.create_driver(
+                options=webdriver.EdgeOptions(),
+                headless=True,
+                progress_callback=wrapped_callback,
+                profile=BROWSER_PROFILE
+            )
+            if driver is None:
+                raise RuntimeError("详情页浏览器启动失败")
+            task_manager.register_webdriver(driver)
+            with detail_drivers_lock:
+                detail_drivers.append(driver)
+            detail_local.driver = driver
+            cancel_token.attach_driver(driver)
+        return driver
+
+    def drop_detail_driver():
+        driver = getattr(detail_local, "driver", None)
+        detail_local.driver = None
+        if driver is not None:
+            with detail_drivers_lock:
+                if driver in detail_drivers:
+                    detail_drivers.remove(driver)
+            cancel_token.detach_driver(driver)
+            task_manager.unregister_webdriver(driver)
+            WebDriverHelper.quit_driver(driver)
+
+    def fetch_detail(href):
+        """打开游戏详情页，返回厂商名称（未找到时为"未知厂商"）"""
+        driver = get_detail_driver()
+        detail_controller.pause()
+        try:
+            driver.get(href)
+        except Exception:
+            # 浏览器可能已失效，丢弃后由下次任务重新创建
+            drop_detail_driver()
+            raise
+
+        man="未知厂商"
+        try:
+            # 等待包含厂商/发行/开发信息的父容器加载
+            # 使用 'div.row-card.app-intro' 作为更可靠的等待目标
+            cancel_token.until(driver, 10,
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.row-card.app-intro"))
+            )
+            
+            # 一次脚本调用取出所有 厂商/发行/开发 信息块: {标签: 公司名}
+            possible_publishers = extract_publisher_info(driver)
+                    
+            # 应用优先级逻辑选择厂商名称
+            # 定义期望的标签及其优先级顺序
+            priority = ["厂商", "发行", "开发"]
+            for key in priority:
+                # 检查字典中是否存在当前优先级的标签
+                if key in possible_publishers:
+                    # 如果找到，则使用对应的值作为厂商名称，并停止查找
+                    man = possible_publishers[key]
+                    break 
+
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            # 如果在等待或查找元素的整体过程中发生异常 (例如超时)，
+            # 则保留默认值 "未知厂商"
+            blocked_kw = detect_anti_crawl(driver)
+            if blocked_kw:
+                raise AntiCrawlDetected(f"详情页疑似触发反爬限制（{blocked_kw}）")
+        return man
+
+    def output_day(day_str, day_data):
+        if day_data:
+            writer.append_rows([day_str,nm,st,man,ty,rt] for (nm, st, man, ty, rt) in day_data)
+            writer.checkpoint()
+            block=[f"\n=== [日期 {day_str}, 共{len(day_data)} 款游戏] ==="]
+            for (nm, st, man, ty, rt) in day_data:
+                block.append(
+                    f"  * {nm}\n"
+                    f"    状态：{st}\n"
+                    f"    厂商：{man}\n"
+                    f"    类型：{ty}\n"
+                    f"    评分：{rt}"
+                )
+            text="\n".join(block)
+            progress_log_callback(progress_callback, text)
+        else:
+            progress_log_callback(progress_callback,
+                f"=== [日期 {day_str}] 无游戏信息 ===")
+
     completed=0
 
-    # 并发: 以天为粒度
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # 注册线程池到任务管理器 
-        task_manager.register_thread_pool(executor)
+    # 任务日志：记录已爬完的日期及其数据，用于中断后续爬
+    journal = JobJournal(f"crawl_{start_date_str}_{end_date_str}")
+    if not resume:
+        journal.clear()
+
+    pending_dates=[]
+    for d in date_list:
+        day_str = d.strftime("%Y-%m-%d")
+        if resume and journal.is_done(day_str):
+            output_day(day_str, journal.get_payload(day_str) or [])
+            completed+=1
+        else:
+            pending_dates.append(d)
+
+    if completed:
+        progress_log_callback(progress_callback,
+            f"已从上次中断处恢复 {completed} 天的数据，剩余 {len(pending_dates)} 天需要爬取。")
+        if progress_percent_callback:
+            progress_percent_callback(int(completed*100/total_dates),0)
+
+    # 两级流水线：
+    #   1) 日历列表页以天为粒度并发快速扫描；
+    #   2) 每扫完一天，立即把其中尚未请求过的详情页（按链接去重，跨天共享）提交给详情线程池；
+    #   某天所有详情页都取回后，合并厂商信息并输出、记入任务日志。
+    # 失败的日期在本轮结束后单独重试；自适应线程池在进入/退出时自动注册/取消注册到任务管理器
+    detail_futures = {}  # href -> future（去重：同一游戏出现在多天时只打开一次详情页）
+    with AdaptiveThreadPoolExecutor(day_controller) as executor, \
+            AdaptiveThreadPoolExecutor(detail_controller) as detail_executor:
         try:
-            future_map={ executor.submit(crawl_one_day, d): d for d in date_list}
-            for future in as_completed(future_map):
-                d = future_map[future]
-                try:
-                    day_str, day_data = future.result()
-                except Exception as e:
-                    progress_log_callback(progress_callback, str(e))
-                    if progress_percent_callback:
-                        progress_percent_callback(100,0)
-                    return
-
-                if day_data:
-                    wb_cur=openpyxl.load_workbook(excel_filename)
-                    ws_cur=wb_cur.active
-                    block=[f"\n=== [日期 {day_str}, 共{len(day_data)} 款游戏] ==="]
-                    for (nm, st, man, ty, rt) in day_data:
-                        ws_cur.append([day_str,nm,st,man,ty,rt])
-                        block.append(
-                            f"  * {nm}\n"
-                            f"    状态：{st}\n"
-                            f"    厂商：{man}\n"
-                            f"    类型：{ty}\n"
-                            f"    评分：{rt}"
-                        )
-                    wb_cur.save(excel_filename)
-                    text="\n".join(block)
-                    progress_log_callback(progress_callback, text)
-                else:
+            for round_idx in range(MAX_RETRY_ROUNDS + 1):
+                if not pending_dates:
+                    break
+                if round_idx > 0:
                     progress_log_callback(progress_callback,
-                        f"=== [日期 {day_str}] 无游戏信息 ===")
+                        f"有 {len(pending_dates)} 天爬取失败，开始第 {round_idx} 次重试...")
+                    random_delay(2, 4, cancel_token)
 
-                completed+=1
-                if progress_percent_callback:
-                    val=int(completed*100/total_dates)
-                    progress_percent_callback(val,0)
+                failed_dates=[]
+                failed_hrefs=set()
+                waiting_days={}  # day_str -> (d, 列表页数据)，等待详情页结果
+                future_map={ executor.submit(crawl_one_day, d): d for d in pending_dates}
+                outstanding=set(future_map)
+                while outstanding:
+                    done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+                    if cancel_token.cancelled:
+                        # 尚未开始的任务直接取消，正在运行的任务会在等待处抛出 TaskCancelled
+                        for future in outstanding:
+                            future.cancel()
+                        cancel_token.raise_if_cancelled()
+                    for future in done:
+                        if future not in future_map:
+                            continue  # 详情页任务，结果在下方按天汇总
+                        d = future_map[future]
+                        try:
+                            day_str, listing = future.result()
+                        except Exception as e:
+                            progress_log_callback(progress_callback,
+                                f"日期 {d.strftime('%Y-%m-%d')} 爬取失败: {str(e)}", WARNING)
+                            failed_dates.append(d)
+                            continue
+                        for (_, _, _, _, href) in listing:
+                            if href not in detail_futures:
+                                detail_future = detail_executor.submit(fetch_detail, href)
+                                detail_futures[href] = detail_future
+                                outstanding.add(detail_future)
+                        waiting_days[day_str] = (d, listing)
+
+                    # 汇总详情页均已取回的日期
+                    for day_str, (d, listing) in list(waiting_days.items()):
+                        if not all(detail_futures[href].done() for (*_, href) in listing):
+                            continue
+                        del waiting_days[day_str]
+                        try:
+                            day_data = [
+                                (nm, st, detail_futures[href].result(), ty, rt)
+                                for (nm, st, ty, rt, href) in listing
+                            ]
+                        except Exception as e:
+                            progress_log_callback(progress_callback,
+                                f"日期 {day_str} 详情页爬取失败: {str(e)}", WARNING)
+                            for (*_, href) in listing:
+                                if detail_futures[href].exception() is not None:
+                                    failed_hrefs.add(href)
+                            failed_dates.append(d)
+                            continue
+
+                        journal.mark_done(day_str, [list(x) for x in day_data])
+                        output_day(day_str, day_data)
+
+                        completed+=1
+                        if progress_percent_callback:
+                            val=int(completed*100/total_dates)
+                            progress_percent_callback(val,0)
+                # 失败的详情页下轮重新请求
+                for href in failed_hrefs:
+                    detail_futures.pop(href, None)
+                pending_dates = failed_dates
+        except TaskCancelled:
+            pass
         finally:
-            # 取消注册线程池
-            task_manager.unregister_thread_pool(executor)
-
-    # 全部爬完后 => 对整个Excel按"日期"升序排序
-    final_wb=openpyxl.load_workbook(excel_filename)
-    final_ws=final_wb.active
-    data_rows=list(final_ws.values)
-    headers=data_rows[0]
-    body=data_rows[1:]
-    def parse_date(ds):
-        try:
-            return datetime.datetime.strptime(ds, "%Y-%m-%d")
-        except:
-            return datetime.datetime(1970,1,1)
-    body.sort(key=lambda row: parse_date(row[0]))
-    final_ws.delete_rows(1, final_ws.max_row)
-    final_ws.append(headers)
-    for row in body:
-        final_ws.append(row)
-    final_wb.save(excel_filename)
+            # 关闭详情页线程复用的浏览器
+            with detail_drivers_lock:
+                drivers = detail_drivers[:]
+                detail_drivers.clear()
+            for driver in drivers:
+                cancel_token.detach_driver(driver)
+                task_manager.unregister_webdriver(driver)
+                WebDriverHelper.quit_driver(driver)
+
+    if cancel_token.cancelled:
+        progress_log_callback(progress_callback,
+            f"任务已取消，已爬完 {completed}/{total_dates} 天。"
+            f"可勾选\"从上次中断处继续\"后重新运行，接着爬取剩余日期。")
+    elif pending_dates:
+        failed_text = "、".join(d.strftime("%Y-%m-%d") for d in sorted(pending_dates))
+        progress_log_callback(progress_callback,
+            f"以下日期多次重试后仍爬取失败：{failed_text}。"
+            f"可勾选\"从上次中断处继续\"后重新运行，仅补爬失败的日期。")
+    else:
+        journal.clear()
+
+    # 全部爬完后 => 按"日期"升序排序，一次性写出整个Excel
+    writer.finalize(sort_key=sort_by_date)
 
     progress_log_callback(progress_callback,
         f"新游数据已保存至 {excel_filename} (已按日期升序整理)")
@@ -361,8 +510,8 @@ def crawl_new_games(
     if progress_percent_callback:
         progress_percent_callback(100,0)
 
-    # 若自动版号匹配
-    if enable_version_match:
+    # 若自动版号匹配（任务已取消时不再进行）
+    if enable_version_match and not cancel_token.cancelled:
         if progress_percent_callback:
             progress_percent_callback(0,1)
         match_version_numbers(
@@ -370,7 +519,9 @@ def crawl_new_games(
             progress_callback=progress_callback,
             progress_percent_callback=progress_percent_callback,
             stage=1,
-            create_new_file=False
+            create_new_file=False,
+            resume=resume,
+            cancel_token=cancel_token
         )
 
 # -----------------------------------------------------------------------------
@@ -381,16 +532,24 @@ def match_version_numbers(
     progress_callback=None,
     progress_percent_callback=None,
     stage=1,
-    create_new_file=True
+    create_new_file=True,
+    resume=False,
+    cancel_token=None
 ):
     """
     - 如果 create_new_file=True => 基于原文件创建副本，并在副本上进行后续操作
     - 如果 create_new_file=False => 在同文件追加
     - 分段输出(每2~3行)
+    - 每匹配完一个游戏即记入任务日志；网络异常的游戏在本轮结束后单独重试。
+      resume=True 时跳过同一文件上次已匹配的游戏，直接复用其结果
+    - 调用 cancel_token.cancel() 可随时停止：已匹配的结果照常写出并保留在任务日志中
     - 需添加表头: [ "游戏名称", "出版单位", "运营单位", "文号", "出版物号", "版号获批时间", "游戏类型", "申报类别", "是否多个结果" ]
     """
     import shutil  # 用于复制文件
 
+    if cancel_token is None:
+        cancel_token = CancellationToken("版号匹配")
+
     progress_log_callback(progress_callback,
         "开始版号匹配，可能存在网络缓慢等情况，请耐心等待。")
 
@@ -427,16 +586,19 @@ def match_version_numbers(
         return
 
     ws = wb.active
+    # 所有写入都经由该组件在内存中完成，结束时一次性保存
+    writer = BufferedExcelWriter(excel_filename, workbook=wb)
     new_headers = [
         "游戏名称","出版单位","运营单位","文号","出版物号",
         "版号获批时间","游戏类型","申报类别","是否多个结果"
     ]
     current_cols = [c.value for c in ws[1]]
+    header_updates = []
     for nh in new_headers:
         if nh not in current_cols:
-            ws.cell(row=1, column=len(current_cols)+1, value=nh)
+            header_updates.append((1, len(current_cols)+1, nh))
             current_cols.append(nh)
-    wb.save(excel_filename)
+    writer.update_cells(header_updates)
 
     # 提前获取各字段对应的列索引，避免后续重复查找
     field_column_map = {}
@@ -453,6 +615,7 @@ def match_version_numbers(
     if name_col is None:
         progress_log_callback(progress_callback,
             "未找到'游戏名称'或'名称'列，跳过版号匹配。")
+        writer.finalize()
         if progress_percent_callback:
             progress_percent_callback(100, stage)
         return
@@ -467,6 +630,7 @@ def match_version_numbers(
     if total_count == 0:
         progress_log_callback(progress_callback,
             "没有需要匹配版号的条目。")
+        writer.finalize()
         if progress_percent_callback:
             progress_percent_callback(100, stage)
         return
@@ -486,11 +650,20 @@ def match_version_numbers(
         "是否多个结果" # info[8]
     ]
 
+    # 自适应并发控制：根据耗时、失败率和反爬信号调整并发查询数与请求间隔
+    match_controller = AdaptiveController(
+        "版号匹配", initial_workers=MATCH_WORKERS, max_workers=MATCH_WORKERS_CEILING,
+        cancel_token=cancel_token
+    )
+
     cache = {}
     def fetch_game_info(g_name):
+        """返回 (info, 是否为确定结果)；网络异常/超时等不确定结果可稍后重试"""
         if g_name in cache:
-            return cache[g_name]
+            return cache[g_name], True
         
+        # 只有确定的查询结果才写入缓存，网络异常/超时不缓存
+        cacheable = False
         # 创建WebDriver时添加性能优化选项
         opt = webdriver.EdgeOptions()
         # 禁用不必要的功能以提高性能
@@ -507,10 +680,12 @@ def match_version_numbers(
             driver = WebDriverHelper.create_driver(
                 options=opt,
                 headless=True,
-                progress_callback=wrapped_callback
+                progress_callback=wrapped_callback,
+                profile=BROWSER_PROFILE
             )
-            # 注册WebDriver到任务管理器
+            # 注册WebDriver到任务管理器，并登记到取消令牌（任务取消时立即关闭浏览器）
             task_manager.register_webdriver(driver)
+            cancel_token.attach_driver(driver)
             
             # 设置页面加载超时
             driver.set_page_load_timeout(30)
@@ -518,7 +693,7 @@ def match_version_numbers(
             
             qn = re.sub(r'（[^）]*）', '', g_name)
             qn = re.sub(r'\([^)]*\)', '', qn).strip()
-            url = (f"https://www.nppa.gov.cn/bsfw/jggs/cxjg/index.html?"
+            url = (f"{NPPA_QUERY_URL}?"
                    f"mc={qn}&cbdw=&yydw=&wh=undefined&description=#")
             
             # 添加重试机制
@@ -530,104 +705,109 @@ def match_version_numbers(
                 except Exception as e:
                     if retry == max_retries - 1:
                         raise
-                    time.sleep(2)  # 等待一段时间后重试
+                    cancel_token.sleep(2)  # 等待一段时间后重试
             
             try:
-                WebDriverWait(driver, 10).until(
+                cancel_token.until(driver, 10,
                     EC.presence_of_element_located((By.CSS_SELECTOR, "#dataCenter"))
                 )
+            except TaskCancelled:
+                raise
             except Exception as e:
+                blocked_kw = detect_anti_crawl(driver)
+                if blocked_kw:
+                    raise AntiCrawlDetected(f"游戏 {g_name} 查询页面疑似触发反爬限制（{blocked_kw}）")
                 progress_log_callback(progress_callback, 
-                    f"游戏 {g_name} 网页加载超时或结构变动: {str(e)}")
-                return None
+                    f"游戏 {g_name} 网页加载超时或结构变动: {str(e)}", WARNING)
+                return None, False
 
             try:
-                WebDriverWait(driver, 10).until(
+                cancel_token.until(driver, 10,
                     EC.presence_of_all_elements_located((By.CSS_SELECTOR, "#dataCenter tr"))
                 )
-            except:
+            except TaskCancelled:
+                raise
+            except Exception:
                 rows2 = []
             else:
-                rows2 = driver.find_elements(By.CSS_SELECTOR, "#dataCenter tr")
+                # 一次脚本调用取出所有结果行的单元格文本与链接
+                rows2 = extract_nppa_rows(driver)
 
             if not rows2:
                 res = None
+                cacheable = True
             else:
                 multiple_flag = "是" if len(rows2) > 1 else "否"
-                exact_elem = None
+                exact_row = None
                 for rr in rows2:
-                    time.sleep(0.3)
-                    try:
-                        t = rr.find_element(By.CSS_SELECTOR, "a").text.strip()
-                        if t == g_name:
-                            exact_elem = rr
-                            break
-                    except:
-                        pass
-                if not exact_elem:
-                    exact_elem = rows2[0]
-                res = extract_game_info(exact_elem, multiple_flag, driver)
+                    if rr.get("link_text") == g_name:
+                        exact_row = rr
+                        break
+                if not exact_row:
+                    exact_row = rows2[0]
+                res = extract_game_info(exact_row, multiple_flag, driver)
+                cacheable = res is not None
+        except (AntiCrawlDetected, TaskCancelled):
+            # 反爬交由自适应线程池降速，并在下一轮重试；取消直接结束
+            raise
         except requests.exceptions.RequestException as req_err:
             progress_log_callback(progress_callback, 
-                f"游戏 {g_name} 网络请求异常: {str(req_err)}")
+                f"游戏 {g_name} 网络请求异常: {str(req_err)}", WARNING)
             res = None
         except Exception as e:
+            # 浏览器被取消操作关闭时，后续调用会出错，此时按取消处理
+            cancel_token.raise_if_cancelled()
             progress_log_callback(progress_callback, 
-                f"游戏 {g_name} 处理异常: {str(e)}")
+                f"游戏 {g_name} 处理异常: {str(e)}", WARNING)
             res = None
         finally:
             if driver:
                 # 取消注册WebDriver 
+                cancel_token.detach_driver(driver)
                 task_manager.unregister_webdriver(driver)
                 WebDriverHelper.quit_driver(driver)
 
-        cache[g_name] = res
-        return res
+        if cacheable:
+            cache[g_name] = res
+            version_number_cache.put(g_name, res)
+        return res, cacheable
 
-    def extract_game_info(elem, multi_flag, driver):
+    def extract_game_info(row, multi_flag, driver):
+        """row 为 extract_nppa_rows 返回的一行: {cells, link_text, detail_url}"""
         try:
-            tds = elem.find_elements(By.TAG_NAME, "td")
+            tds = row.get("cells") or []
             if len(tds) < 7:
                 return None
-            gn = tds[1].text.strip()
-            pub = tds[2].text.strip()
-            op = tds[3].text.strip()
-            appr = tds[4].text.strip()
-            pubn = tds[5].text.strip()
-            ds = tds[6].text.strip()
-
-            detail_url = ""
-            try:
-                detail_url = tds[1].find_element(By.TAG_NAME, "a").get_attribute("href")
-            except:
-                pass
+            gn = tds[1]
+            pub = tds[2]
+            op = tds[3]
+            appr = tds[4]
+            pubn = tds[5]
+            ds = tds[6]
+
+            detail_url = row.get("detail_url") or ""
 
             gtype, appcat = "", ""
             if detail_url:
                 try:
                     driver.execute_script("window.open(arguments[0]);", detail_url)
                     driver.switch_to.window(driver.window_handles[1])
-                    random_delay()
+                    match_controller.pause()
                     
                     # 添加等待以确保页面加载
                     try:
-                        WebDriverWait(driver, 10).until(
+                        cancel_token.until(driver, 10,
                             EC.presence_of_element_located((By.CSS_SELECTOR, ".cFrame.nFrame table tr"))
                         )
-                    except:
+                    except TaskCancelled:
+                        raise
+                    except Exception:
                         pass  # 如果等待超时，继续处理已加载的内容
                     
-                    lines = driver.find_elements(By.CSS_SELECTOR, ".cFrame.nFrame table tr")
-                    for ln in lines:
-                        try:
-                            lab = ln.find_element(By.XPATH, "./td[1]").text.strip()
-                            val = ln.find_element(By.XPATH, "./td[2]").text.strip()
-                            if lab == "游戏类型":
-                                gtype = val
-                            elif lab == "申报类别":
-                                appcat = val
-                        except:
-                            pass
+                    # 一次脚本调用取出详情表格 {标签: 值}
+                    detail = extract_nppa_detail(driver)
+                    gtype = detail.get("游戏类型", "")
+                    appcat = detail.get("申报类别", "")
                 finally:
                     # 确保窗口关闭和切换回主窗口
                     try:
@@ -637,84 +817,147 @@ def match_version_numbers(
                         pass  # 忽略窗口操作可能出现的异常
 
             return [gn, pub, op, appr, pubn, ds, gtype, appcat, multi_flag]
+        except TaskCancelled:
+            raise
         except Exception as e:
             progress_log_callback(progress_callback, 
-                f"提取游戏详情异常: {str(e)}")
+                f"提取游戏详情异常: {str(e)}", WARNING)
             return None
 
     partial_flush_size = 3
     completed = 0
     buffered = []
     results_map = {}
-    
-    # 使用线程锁保护Excel写入
-    excel_lock = threading.Lock()
 
     def flush_results(buf):
         if not buf:
             return []
         buf.sort(key=lambda x: x[0])  # row_idx升序
         lines = []
+        updates = []
         
-        # 使用线程锁保护Excel文件写入
-        with excel_lock:
-            try:
-                wb2 = openpyxl.load_workbook(excel_filename)
-                ws2 = wb2.active
+        for (r_idx, g_n, info) in buf:
+            if info:
+                # info顺序: [gn, pub, op, appr, pubn, ds, gtype, appcat, multi_flag]
+                block = [
+                    f"--- [行 {r_idx}, 游戏名: {g_n}] ---",
+                    f"  游戏名称：{info[0]}",
+                    f"  出版单位：{info[1]}",
+                    f"  运营单位：{info[2]}",
+                    f"  文号：{info[3]}",
+                    f"  出版物号：{info[4]}",
+                    f"  版号获批时间：{info[5]}",
+                    f"  游戏类型：{info[6]}",
+                    f"  申报类别：{info[7]}",
+                    f"  是否多个结果：{info[8]}"
+                ]
+                lines.extend(block)
                 
-                for (r_idx, g_n, info) in buf:
-                    if info:
-                        # info顺序: [gn, pub, op, appr, pubn, ds, gtype, appcat, multi_flag]
-                        block = [
-                            f"--- [行 {r_idx}, 游戏名: {g_n}] ---",
-                            f"  游戏名称：{info[0]}",
-                            f"  出版单位：{info[1]}",
-                            f"  运营单位：{info[2]}",
-                            f"  文号：{info[3]}",
-                            f"  出版物号：{info[4]}",
-                            f"  版号获批时间：{info[5]}",
-                            f"  游戏类型：{info[6]}",
-                            f"  申报类别：{info[7]}",
-                            f"  是否多个结果：{info[8]}"
-                        ]
-                        lines.extend(block)
-                        
-                        # 使用预先计算的列索引映射写入数据
-                        for i, field_name in enumerate(fields_for_match):
-                            if field_name in field_column_map:
-                                col_idx = field_column_map[field_name]
-                                ws2.cell(row=r_idx, column=col_idx, value=info[i])
-                    else:
-                        lines.append(f"--- [行 {r_idx}, 游戏名: {g_n}] => 未查询到该游戏版号信息。")
-
-                wb2.save(excel_filename)
-            except Exception as e:
-                lines.append(f"写入Excel出错: {str(e)}")
+                # 使用预先计算的列索引映射写入数据
+                for i, field_name in enumerate(fields_for_match):
+                    if field_name in field_column_map:
+                        updates.append((r_idx, field_column_map[field_name], info[i]))
+            else:
+                lines.append(f"--- [行 {r_idx}, 游戏名: {g_n}] => 未查询到该游戏版号信息。")
+
+        # 写入内存并追加日志，检查点按时间间隔触发，不再每批重写整个文件
+        try:
+            writer.update_cells(updates)
+            writer.checkpoint()
+        except Exception as e:
+            lines.append(f"写入Excel出错: {str(e)}")
         
         text = "\n".join(lines)
         progress_log_callback(progress_callback, text)
         return []
 
-    # 调整并发数量，避免过多线程导致资源争用
-    max_workers = min(MAX_WORKERS, 2)  # 版号匹配时限制并发数
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        # 注册线程池到任务管理器
-        task_manager.register_thread_pool(ex)
-        try:
+    # 任务日志：记录已匹配的行及其结果，用于中断后续匹配
+    journal = JobJournal(f"match_{os.path.abspath(excel_filename)}")
+    if not resume:
+        journal.clear()
+    make_unit = lambda r_idx, g_n: f"{r_idx}:{g_n}"
+
+    resumed = 0
+    if resume:
+        remaining = []
+        for (r_idx, g_n) in game_list:
+            unit = make_unit(r_idx, g_n)
+            if journal.is_done(unit):
+                info = journal.get_payload(unit)
+                results_map[r_idx] = info
+                buffered.append((r_idx, g_n, info))
+                completed += 1
+                resumed += 1
+            else:
+                remaining.append((r_idx, g_n))
+        game_list = remaining
+        if resumed:
+            progress_log_callback(progress_callback,
+                f"已从上次中断处恢复 {resumed} 条匹配结果。")
+
+    # 先查本地持久化缓存，只有未缓存或已过期的游戏才联网查询
+    pending_list = []
+    for (r_idx, g_n) in game_list:
+        hit, cached_info = version_number_cache.get(g_n)
+        if hit:
+            journal.mark_done(make_unit(r_idx, g_n), cached_info)
+            cache[g_n] = cached_info
+            results_map[r_idx] = cached_info
+            buffered.append((r_idx, g_n, cached_info))
+            completed += 1
+        else:
+            pending_list.append((r_idx, g_n))
+
+    if completed:
+        if completed > resumed:
+            progress_log_callback(progress_callback,
+                f"本地版号缓存命中 {completed - resumed} 条，需联网查询 {len(pending_list)} 条。")
+        buffered = flush_results(buffered)
+        if progress_percent_callback:
+            progress_percent_callback(int(completed * 100 / total_count), stage)
+
+    # 自适应线程池在进入/退出时自动注册/取消注册到任务管理器；
+    # fetch_game_info 返回 (info, ok)，ok=False 视为一次失败反馈给控制器
+    with AdaptiveThreadPoolExecutor(match_controller, is_success=lambda r: r[1]) as ex:
+        for round_idx in range(MAX_RETRY_ROUNDS + 1):
+            if not pending_list or cancel_token.cancelled:
+                break
+            if round_idx > 0:
+                progress_log_callback(progress_callback,
+                    f"有 {len(pending_list)} 个游戏查询失败，开始第 {round_idx} 次重试...")
+                try:
+                    random_delay(2, 4, cancel_token)
+                except TaskCancelled:
+                    break
+            last_round = round_idx == MAX_RETRY_ROUNDS
+
+            failed_list = []
             future_map = {}
-            for (r_idx, g_n) in game_list:
+            for (r_idx, g_n) in pending_list:
                 future = ex.submit(fetch_game_info, g_n)
                 future_map[future] = (r_idx, g_n)
 
             for future in as_completed(future_map):
+                if cancel_token.cancelled:
+                    # 尚未开始的查询直接取消，正在运行的查询会在等待处抛出 TaskCancelled
+                    for f in future_map:
+                        f.cancel()
+                    break
                 row_i, g_na = future_map[future]
                 try:
-                    info = future.result()
+                    info, ok = future.result()
                 except Exception as e:
-                    progress_log_callback(progress_callback, f"处理游戏 {g_na} 时出错: {str(e)}")
-                    info = None
-                
+                    progress_log_callback(progress_callback, f"处理游戏 {g_na} 时出错: {str(e)}", WARNING)
+                    info, ok = None, False
+
+                if not ok:
+                    failed_list.append((row_i, g_na))
+                    # 最后一轮仍失败时按未查询到写出，但不记入任务日志，续跑时会重新查询
+                    if not last_round:
+                        continue
+                else:
+                    journal.mark_done(make_unit(row_i, g_na), info)
+
                 results_map[row_i] = info
                 buffered.append((row_i, g_na, info))
                 completed += 1
@@ -725,13 +968,27 @@ def match_version_numbers(
                 if progress_percent_callback:
                     pr = int(completed * 100 / total_count)
                     progress_percent_callback(pr, stage)
-        finally:
-            # 取消注册线程池 
-            task_manager.unregister_thread_pool(ex)
+            pending_list = failed_list
 
     if buffered:
         buffered = flush_results(buffered)
 
+    try:
+        writer.finalize()
+    except Exception as e:
+        progress_log_callback(progress_callback, f"保存Excel出错: {str(e)}", WARNING)
+
+    if cancel_token.cancelled:
+        progress_log_callback(progress_callback,
+            f"版号匹配已取消，已匹配 {completed}/{total_count} 条。"
+            f"可勾选\"从上次中断处继续\"后重新运行，接着匹配剩余游戏。")
+    elif pending_list:
+        progress_log_callback(progress_callback,
+            f"有 {len(pending_list)} 个游戏多次重试后仍查询失败，已按未查询到处理。"
+            f"可勾选\"从上次中断处继续\"后重新运行，仅补查这些游戏。")
+    else:
+        journal.clear()
+
     # 若 create_new_file=True，已在开头复制并操作副本，不再另存
     if create_new_file:
         pass
@@ -743,7 +1000,7 @@ def match_version_numbers(
         progress_percent_callback(100, stage)
 
 def helper_progress_callback(callback, message):
-    """处理WebDriverHelper的进度回调，过滤和简化WebDriver输出信息"""
+    """处理WebDriverHelper的进度回调，过滤和简化WebDriver输出信息（未显示的细节写入调试日志）"""
     # 定义需要保留的关键信息关键词
     key_messages = [
         "使用已缓存的WebDriver", 
@@ -763,15 +1020,16 @@ def helper_progress_callback(callback, message):
             show_message = True
             break
     
-    # 简化消息，删除过多细节
-    if "缓存目录" in message or "缓存文件" in message:
-        return  # 忽略缓存路径信息
+    # 简化消息，删除过多细节（缓存路径、版本检测等只记录到调试日志）
+    if "缓存目录" in message or "缓存文件" in message or "检测到Edge浏览器版本" in message:
+        show_message = False
     
-    if "检测到Edge浏览器版本" in message:
-        return  # 忽略版本检测信息
+    if not show_message:
+        progress_log_callback(callback, message, DEBUG)
+        return
     
     # 只显示关键节点信息
-    if show_message and callback:
+    if callback:
         # 进一步简化消息内容
         if "使用已缓存的WebDriver" in message:
             simplified = "使用已缓存的WebDriver配置"
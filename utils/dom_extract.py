@@ -0,0 +1,87 @@
+# utils/dom_extract.py
+#
+# 批量DOM提取：每个页面只执行一次 execute_script，在浏览器内一次性取出所有需要的字段并以JSON返回，
+# 替代对每个元素逐个调用 find_element / get_attribute / text（每次调用都是一次WebDriver往返）。
+
+# TapTap 新游日历页：每张游戏卡片的名称、类型标签、评分、状态与详情链接
+_CALENDAR_CARDS_JS = """
+var text = function (root, sel) {
+    var el = root.querySelector(sel);
+    return el ? (el.innerText || '').trim() : null;
+};
+var cards = document.querySelectorAll('div.daily-event-list__content > a.tap-router');
+return Array.prototype.map.call(cards, function (card) {
+    var titleEl = card.querySelector('div.daily-event-app-info__title');
+    var title = titleEl ? titleEl.getAttribute('content') : null;
+    var tags = card.querySelectorAll('div.daily-event-app-info__tag div.tap-label-tag');
+    var status = text(card, 'span.event-type-label__title');
+    if (status === null) {
+        status = text(card, 'div.event-recommend-label__title');
+    }
+    return {
+        name: title !== null ? title.trim() : null,
+        types: Array.prototype.map.call(tags, function (t) { return (t.innerText || '').trim(); }).join('/'),
+        rating: text(card, 'div.daily-event-app-info__rating .tap-rating__number'),
+        status: status,
+        href: card.getAttribute('href') || ''
+    };
+});
+"""
+
+# TapTap 游戏详情页：厂商/发行/开发 信息块
+_PUBLISHER_INFO_JS = """
+var result = {};
+var links = document.querySelectorAll('div.flex-center--y a.tap-router');
+Array.prototype.forEach.call(links, function (a) {
+    var labelEl = a.querySelector('div.gray-06.mr-6');
+    var valueEl = a.querySelector('div.tap-text.tap-text__one-line');
+    if (!labelEl || !valueEl) { return; }
+    var label = (labelEl.innerText || '').trim();
+    var value = (valueEl.innerText || '').trim();
+    if (label && value) { result[label] = value; }
+});
+return result;
+"""
+
+# 国家新闻出版署 版号查询结果表：#dataCenter 下每一行的单元格文本、首个链接文本与详情链接
+_NPPA_ROWS_JS = """
+var rows = document.querySelectorAll('#dataCenter tr');
+return Array.prototype.map.call(rows, function (tr) {
+    var tds = tr.querySelectorAll('td');
+    var firstLink = tr.querySelector('a');
+    var detailLink = tds.length > 1 ? tds[1].querySelector('a') : null;
+    return {
+        cells: Array.prototype.map.call(tds, function (td) { return (td.innerText || '').trim(); }),
+        link_text: firstLink ? (firstLink.innerText || '').trim() : null,
+        detail_url: detailLink ? (detailLink.href || '') : ''
+    };
+});
+"""
+
+# 版号详情页：两列表格（标签 -> 值）
+_NPPA_DETAIL_JS = """
+var result = {};
+var rows = document.querySelectorAll('.cFrame.nFrame table tr');
+Array.prototype.forEach.call(rows, function (tr) {
+    var tds = tr.querySelectorAll(':scope > td');
+    if (tds.length < 2) { return; }
+    result[(tds[0].innerText || '').trim()] = (tds[1].innerText || '').trim();
+});
+return result;
+"""
+
+def extract_calendar_cards(driver):
+    """一次性提取日历页所有游戏卡片，返回 [{name, types, rating, status, href}, ...]，缺失字段为 None"""
+    return driver.execute_script(_CALENDAR_CARDS_JS) or []
+
+def extract_publisher_info(driver):
+    """一次性提取详情页的 厂商/发行/开发 信息，返回 {标签: 值}"""
+    return driver.execute_script(_PUBLISHER_INFO_JS) or {}
+
+def extract_nppa_rows(driver):
+    """一次性提取版号查询结果表所有行，返回 [{cells, link_text, detail_url}, ...]"""
+    return driver.execute_script(_NPPA_ROWS_JS) or []
+
+def extract_nppa_detail(driver):
+    """一次性提取版号详情页的 {标签: 值}（如 游戏类型、申报类别）"""
+    return driver.execute_script(_NPPA_DETAIL_JS) or {}
@@ -0,0 +1,120 @@
+# utils/edge_version.py
+#
+# 进程内共享的 Edge 浏览器版本解析：
+# - 依次查找 msedge 可执行文件、读取注册表、读取可执行文件版本信息（PowerShell）
+# - 结果按 (可执行文件路径, 修改时间) 缓存，浏览器更新后可执行文件被替换时自动重新探测，
+#   其余情况下每次只需一次 os.stat，不再重复读注册表或启动 PowerShell
+# WebDriverHelper.get_edge_version 与 EnvironmentChecker 的版本检测都通过这里完成。
+
+import os
+import sys
+import shutil
+import threading
+import subprocess
+
+SOURCE_REGISTRY = "registry"
+SOURCE_EXE = "exe"
+
+# (根键名, 子键路径, 值名, 注册表视图)，按顺序尝试
+_REGISTRY_LOCATIONS = [
+    ("HKEY_CURRENT_USER", r"Software\Microsoft\Edge\BLBeacon", "version", None),
+    ("HKEY_LOCAL_MACHINE", r"Software\Microsoft\Edge\BLBeacon", "version", "KEY_WOW64_64KEY"),
+    ("HKEY_LOCAL_MACHINE", r"Software\Wow6432Node\Microsoft\Edge\BLBeacon", "version", "KEY_WOW64_32KEY"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Microsoft\EdgeUpdate\Clients\{56EB18F8-B008-4CBD-B6D2-8C97FE7E9062}", "pv", "KEY_WOW64_64KEY"),
+    ("HKEY_CURRENT_USER", r"SOFTWARE\Microsoft\EdgeUpdate\Clients\{56EB18F8-B008-4CBD-B6D2-8C97FE7E9062}", "pv", None),
+]
+
+def find_edge_executable():
+    """查找Edge浏览器可执行文件，找不到返回 None"""
+    edge_path = shutil.which('msedge') or shutil.which('edge')
+    if edge_path and os.path.exists(edge_path):
+        return edge_path
+    if sys.platform == 'win32':
+        possible_paths = [
+            os.path.join(os.environ.get("ProgramFiles(x86)", ""), "Microsoft\\Edge\\Application\\msedge.exe"),
+            os.path.join(os.environ.get("ProgramFiles", ""), "Microsoft\\Edge\\Application\\msedge.exe"),
+            os.path.join(os.environ.get("LocalAppData", ""), "Microsoft\\Edge\\Application\\msedge.exe"),  # 用户安装路径
+        ]
+        for path in possible_paths:
+            if path and os.path.exists(path):
+                return path
+    return None
+
+def read_version_from_registry():
+    """从Windows注册表读取Edge版本（非Windows返回 None）"""
+    if sys.platform != 'win32':
+        return None
+    import winreg
+    for root_name, key_path, value_name, view in _REGISTRY_LOCATIONS:
+        access = winreg.KEY_READ | (getattr(winreg, view) if view else 0)
+        try:
+            with winreg.OpenKey(getattr(winreg, root_name), key_path, 0, access) as key:
+                version, _ = winreg.QueryValueEx(key, value_name)
+                if version:
+                    return version
+        except OSError:
+            continue
+    return None
+
+def read_version_from_exe(exe_path):
+    """通过 PowerShell 读取可执行文件的版本信息（Windows特定）"""
+    if sys.platform != 'win32' or not exe_path:
+        return None
+    try:
+        command = f"(Get-Item \"{exe_path}\").VersionInfo.ProductVersion"
+        result = subprocess.run(["powershell", "-Command", command], capture_output=True, text=True,
+                                check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+class EdgeVersionResolver:
+    """带缓存的Edge版本解析器（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._exe_path = None
+        self._key = None      # (可执行文件路径, 修改时间)
+        self._result = None   # (版本, 来源)
+
+    def _current_key(self):
+        path = self._exe_path
+        if not path or not os.path.exists(path):
+            path = self._exe_path = find_edge_executable()
+        try:
+            mtime = os.stat(path).st_mtime if path else None
+        except OSError:
+            mtime = None
+        return path, mtime
+
+    def resolve(self):
+        """返回 (版本, 来源)，来源为 SOURCE_REGISTRY / SOURCE_EXE；无法获取时为 (None, None)"""
+        with self._lock:
+            key = self._current_key()
+            if key == self._key and self._result is not None:
+                return self._result
+            exe_path = key[0]
+            version = read_version_from_registry()
+            result = (version, SOURCE_REGISTRY) if version else (None, None)
+            if not version:
+                version = read_version_from_exe(exe_path)
+                if version:
+                    result = (version, SOURCE_EXE)
+            self._key, self._result = key, result
+            return result
+
+    def get_version(self):
+        return self.resolve()[0]
+
+    @property
+    def exe_path(self):
+        with self._lock:
+            return self._current_key()[0]
+
+    def invalidate(self):
+        """清除缓存，下次调用时重新探测（用户手动重新检测环境时使用）"""
+        with self._lock:
+            self._exe_path = self._key = self._result = None
+
+# 全局共享的版本解析器
+edge_version_resolver = EdgeVersionResolver()
@@ -1,25 +1,27 @@
 # utils/environment_checker.py
 
-import shutil
 import subprocess
 import sys
 import os
 from PySide6.QtCore import QObject, Signal
 import requests
+from utils.http_transport import transport
+from utils.task_manager import task_manager
+from utils.profile_pool import profile_pool
+from utils.edge_version import (edge_version_resolver, read_version_from_registry, read_version_from_exe,
+                                SOURCE_REGISTRY)
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.edge.service import Service as EdgeService
-import winreg
+from selenium.webdriver.common.utils import free_port
 import concurrent.futures
 import time
 import psutil  # 添加psutil导入
-import uuid    # 导入uuid用于生成唯一ID
-import tempfile
-import glob
-import random
-import datetime
+import json
+import hashlib
+import threading
 
 # 导入驱动管理器
 try:
@@ -35,6 +37,41 @@ except ImportError:
             return False
     driver_manager = SimpleDriverManager()
 
+# 环境检测结论缓存：记录上次完整检测通过时的环境指纹，指纹不变时跳过启动浏览器的验证
+ENV_VERDICT_FILE = 'env_verdict.json'
+# 缓存结论的最长有效期（天），超过后重新完整检测
+ENV_VERDICT_MAX_AGE_DAYS = 7
+
+def compute_env_fingerprint(edge_version, driver_path, driver_version):
+    """根据 Edge 版本、WebDriver 路径/版本/文件信息和 Python 运行环境计算指纹"""
+    try:
+        stat = os.stat(driver_path) if driver_path else None
+    except OSError:
+        stat = None
+    try:
+        import selenium
+        selenium_version = selenium.__version__
+    except Exception:
+        selenium_version = None
+    parts = {
+        "edge_version": edge_version,
+        "driver_path": os.path.abspath(driver_path) if driver_path else None,
+        "driver_version": driver_version,
+        "driver_mtime": int(stat.st_mtime) if stat else None,
+        "driver_size": stat.st_size if stat else None,
+        "python": sys.version,
+        "executable": sys.executable,
+        "selenium": selenium_version,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+# 驱动启动策略竞速：记录本机上次胜出的策略，下次优先启动
+DRIVER_STRATEGY_FILE = 'driver_strategy.json'
+# 优先策略单独运行的时间（秒），超过后其余策略同时启动参与竞速
+STRATEGY_HEAD_START = 3
+# 单个策略启动浏览器的超时（秒）
+STRATEGY_TIMEOUT = 15
+
 
 class EnvironmentChecker(QObject):
     """环境检查类：并行执行若干检测项，并输出结果。"""
@@ -46,11 +83,11 @@ class EnvironmentChecker(QObject):
     # 检测完成
     finished = Signal(bool)  # 参数表示是否有错误
     
-    # 设置最大保留的临时目录数量，防止过度膨胀
-    MAX_TEMP_DIRS = 20
 
-    def __init__(self):
+    def __init__(self, force_full_check=False):
         super().__init__()
+        # True 时忽略缓存的检测结论，始终启动浏览器完整验证（用户手动点击"检测"时使用）
+        self.force_full_check = force_full_check
         self.edge_version = None
         self.has_errors = False
         # 确保初始化structured_results为空列表
@@ -73,19 +110,18 @@ class EnvironmentChecker(QObject):
         
         # 当前运行时创建的临时目录列表，用于在结束时清理
         self.current_temp_dirs = []
+        # 本次检测各启动策略使用的驱动服务，清理时只终止这些进程树
+        self.started_services = []
     
     def set_progress_callback(self, callback):
         """设置进度回调函数"""
         self.progress_callback = callback
     
     def pre_cleanup(self):
-        """应用启动时的预清理，确保没有残留的驱动进程和临时目录"""
+        """检测前的预清理：回收残留的临时目录（上次遗留的驱动进程已在程序启动时按记录清理）"""
         try:
-            # 先清理所有msedgedriver进程
-            self.kill_msedgedriver()
-            
-            # 清理所有可能存在的临时目录
-            self.cleanup_temp_directories(enforce_limit=True)
+            # 回收配置目录池中上次异常退出遗留的目录（只读取清单，不遍历目录内容）
+            profile_pool.recover(keep=[os.path.dirname(driver_manager.get_driver_path() or "")])
             
         except Exception:
             pass
@@ -95,6 +131,7 @@ class EnvironmentChecker(QObject):
         # 确保每次运行前清空结果列表
         self.structured_results = []
         self.current_temp_dirs = []  # 重置当前运行时创建的临时目录列表
+        self.started_services = []
         self.has_errors = False  # 重置错误标志
         network_ok = True  # 单独跟踪网络状态
         
@@ -164,76 +201,18 @@ class EnvironmentChecker(QObject):
         # 清理msedgedriver进程
         self.kill_msedgedriver()
         
-        # 清理临时用户数据目录
-        cleaned_dirs = 0
-        failed_dirs = 0
-        
-        # 先清理本次运行创建的目录
-        for dir_path in self.current_temp_dirs:
-            if dir_path and os.path.isdir(dir_path):
-                try:
-                    shutil.rmtree(dir_path, ignore_errors=True)
-                    cleaned_dirs += 1
-                except Exception as e:
-                    failed_dirs += 1
-                    self.output_signal.emit(f"清理临时目录失败: {dir_path}, 错误: {str(e)}")
-        
-        # 然后清理其他可能存在的临时目录，并限制总数
-        try:
-            self.cleanup_temp_directories(enforce_limit=True)
-        except Exception as e:
-            self.output_signal.emit(f"清理临时目录时出错: {str(e)}")
-            
-        if cleaned_dirs > 0 or failed_dirs > 0:
-            self.output_signal.emit(f"环境清理：已清理 {cleaned_dirs} 个临时目录，失败 {failed_dirs} 个。")
-
-    def cleanup_temp_directories(self, enforce_limit=False):
-        """清理所有可能的临时目录，可选择限制总数"""
-        try:
-            # 获取缓存的WebDriver路径
-            cached_driver_path = driver_manager.get_driver_path()
-            
-            temp_dir = tempfile.gettempdir()
-            patterns = ["edge_driver_*", "edge_temp_*", "edge_port_*", "edge_alt_*", "scoped_dir*"]
-            
-            all_dirs = []
-            for pattern in patterns:
-                for path in glob.glob(os.path.join(temp_dir, pattern)):
-                    try:
-                        # 跳过当前运行时创建的临时目录
-                        if path in self.current_temp_dirs:
-                            continue
-                            
-                        # 跳过包含缓存WebDriver的目录
-                        if cached_driver_path and os.path.exists(cached_driver_path):
-                            driver_dir = os.path.dirname(cached_driver_path)
-                            if path == driver_dir or driver_dir.startswith(path) or path.startswith(driver_dir):
-                                self.output_signal.emit(f"跳过缓存WebDriver目录: {path}")
-                                continue
-                        
-                        # 其余目录可清理
-                        if os.path.isdir(path):
-                            if enforce_limit:
-                                # 收集目录及修改时间，稍后处理
-                                all_dirs.append((path, os.path.getmtime(path)))
-                            else:
-                                # 直接清理
-                                shutil.rmtree(path, ignore_errors=True)
-                    except Exception:
-                        pass
-                
-            # 如果启用限制，则保留最新的MAX_TEMP_DIRS个目录
-            if enforce_limit and all_dirs:
-                # 按修改时间从新到旧排序
-                all_dirs.sort(key=lambda x: x[1], reverse=True)
-                # 删除超出限制的旧目录
-                for path, _ in all_dirs[self.MAX_TEMP_DIRS:]:
-                    try:
-                        shutil.rmtree(path, ignore_errors=True)
-                    except Exception:
-                        pass
-        except Exception as e:
-            self.output_signal.emit(f"清理临时目录时发生异常: {str(e)}")
+        # 浏览器均已退出，将本次使用的配置目录交还目录池
+        released = self.release_temp_dirs()
+        if released:
+            self.output_signal.emit(f"环境清理：已归还 {released} 个临时配置目录。")
+
+    def release_temp_dirs(self, discard=False):
+        """将本次检测使用的配置目录交还目录池（需在相关浏览器退出后调用）；
+        discard=True 时直接删除，用于启动失败的尝试（目录可能已损坏）"""
+        dirs, self.current_temp_dirs = self.current_temp_dirs, []
+        for dir_path in dirs:
+            profile_pool.release(dir_path, discard=discard)
+        return len(dirs)
 
     def quit_driver(self):
         """安全地关闭WebDriver"""
@@ -282,39 +261,13 @@ class EnvironmentChecker(QObject):
         self.kill_msedgedriver()
 
     def kill_msedgedriver(self):
-        """终止所有 msedgedriver.exe 进程，不再终止 msedge.exe"""
-        terminated_count = 0
-        failed_count = 0
-        driver_process_name = 'msedgedriver.exe' # 明确目标进程名
-        
+        """只终止本次检测启动的 msedgedriver 进程树（当前 driver 及各启动策略的驱动服务），
+        不影响爬虫任务和待命浏览器正在使用的驱动，也不终止其他 msedge.exe"""
         try:
-            # 首先尝试使用系统命令强制终止所有目标驱动进程
-            if sys.platform == 'win32':
-                try:
-                    subprocess.call(f'taskkill /f /im {driver_process_name}', shell=True,
-                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                except Exception:
-                    pass
-            
-            # 然后使用psutil逐个终止目标驱动进程
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    # 严格匹配进程名
-                    if proc.info.get('name') and proc['name'].lower() == driver_process_name:
-                        try:
-                            proc.terminate()
-                            gone, alive = psutil.wait_procs([proc], timeout=1) # 缩短等待时间
-                            if proc in alive:
-                                proc.kill()
-                            terminated_count += 1
-                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-                            failed_count += 1
-                            # self.output_signal.emit(f"终止 {driver_process_name} (PID: {proc.info['pid']}) 时出错: {e}") # 减少冗余输出
-                except Exception:
-                    pass
-            
-            if terminated_count > 0 or failed_count > 0:
-                 self.output_signal.emit(f"环境清理：已终止 {terminated_count} 个 {driver_process_name} 进程，失败 {failed_count} 个。")
+            terminated_count = task_manager.kill_driver_processes(drivers=[self.driver],
+                                                                  services=list(self.started_services))
+            if terminated_count > 0:
+                 self.output_signal.emit(f"环境清理：已终止 {terminated_count} 个WebDriver相关进程。")
         except Exception as e:
             self.output_signal.emit(f"清理驱动进程时出现异常: {e}")
 
@@ -326,7 +279,7 @@ class EnvironmentChecker(QObject):
             success_count = 0
             for url in urls_to_check:
                 try:
-                    response = requests.get(url, timeout=3)
+                    response = transport.get(url, timeout=3, retry=False)  # 快速检测，不自动重试
                     if response.status_code == 200:
                         success_count += 1
                         break # 只要有一个成功就认为网络通畅
@@ -348,21 +301,22 @@ class EnvironmentChecker(QObject):
 
     def check_edge_browser(self):
         """检测Edge浏览器是否安装，以及版本信息"""
+        if self.force_full_check:
+            edge_version_resolver.invalidate()  # 手动检测时重新探测版本
         edge_path = self.find_edge_executable()
         if edge_path and os.path.exists(edge_path):
             try:
-                version = self.get_edge_version_from_registry()
-                if version:
+                # 注册表优先，其次可执行文件（结果在进程内共享缓存）
+                version, source = edge_version_resolver.resolve()
+                if version and source == SOURCE_REGISTRY:
                     self.output_signal.emit(f"检测到Edge浏览器，版本：{version}")
                     self.edge_version = version
                     return True, f"Edge浏览器已安装，版本：{version}"
                 else:
-                    # 尝试从可执行文件获取版本（备用方案）
-                    version_from_exe = self.get_edge_version_from_exe(edge_path)
-                    if version_from_exe:
-                         self.output_signal.emit(f"检测到Edge浏览器 (通过文件)，版本：{version_from_exe}")
-                         self.edge_version = version_from_exe
-                         return True, f"Edge浏览器已安装 (通过文件)，版本：{version_from_exe}"
+                    if version:
+                         self.output_signal.emit(f"检测到Edge浏览器 (通过文件)，版本：{version}")
+                         self.edge_version = version
+                         return True, f"Edge浏览器已安装 (通过文件)，版本：{version}"
                     else:
                         msg = "无法获取Edge浏览器版本（注册表和文件均失败）。"
                         self.output_signal.emit(msg)
@@ -377,6 +331,165 @@ class EnvironmentChecker(QObject):
             self.output_signal.emit(msg)
             return False, msg
 
+    # ------------------------------------------------------------------
+    # 检测结论缓存
+    # ------------------------------------------------------------------
+    @staticmethod
+    def get_verdict_file_path():
+        return os.path.join(driver_manager.get_cache_dir(), ENV_VERDICT_FILE)
+
+    def current_fingerprint(self):
+        return compute_env_fingerprint(self.edge_version, driver_manager.get_driver_path(),
+                                       driver_manager.get_driver_version())
+
+    def cached_verdict_valid(self):
+        """当前环境指纹与上次完整检测通过时一致，且结论未过期"""
+        try:
+            with open(self.get_verdict_file_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        if not data.get("ok") or data.get("fingerprint") != self.current_fingerprint():
+            return False
+        return time.time() - data.get("time", 0) <= ENV_VERDICT_MAX_AGE_DAYS * 24 * 3600
+
+    def save_verdict(self):
+        """完整检测通过后记录当前环境指纹"""
+        if not driver_manager.get_driver_path():
+            return
+        data = {"ok": True, "fingerprint": self.current_fingerprint(), "time": time.time(),
+                "edge_version": self.edge_version, "driver_version": driver_manager.get_driver_version()}
+        path = self.get_verdict_file_path()
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"保存环境检测结论失败: {e}")
+
+    @classmethod
+    def invalidate_verdict(cls):
+        """删除缓存的检测结论，下次检测时重新完整验证"""
+        try:
+            os.remove(cls.get_verdict_file_path())
+        except OSError:
+            pass
+
+    def revalidate_driver_async(self, driver_path, edge_version):
+        """后台轻量复核：运行 msedgedriver --version 确认驱动可执行且主版本与浏览器一致，
+        失败时删除缓存的结论（下次检测会完整验证），不阻塞本次检测"""
+        def revalidate():
+            try:
+                kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+                result = subprocess.run([driver_path, "--version"], capture_output=True, text=True,
+                                        timeout=10, **kwargs)
+                output = result.stdout.strip()
+                browser_major = (edge_version or "").split('.')[0]
+                if result.returncode != 0 or (browser_major and f" {browser_major}." not in f" {output}"):
+                    print(f"WebDriver复核未通过（{output or result.returncode}），已清除缓存的环境检测结论")
+                    self.invalidate_verdict()
+            except Exception as e:
+                print(f"WebDriver复核失败: {e}，已清除缓存的环境检测结论")
+                self.invalidate_verdict()
+
+        threading.Thread(target=revalidate, daemon=True, name="env_revalidate").start()
+
+    # ------------------------------------------------------------------
+    # 驱动启动策略竞速
+    # ------------------------------------------------------------------
+    def get_driver_strategies(self):
+        """返回 (名称, 策略函数) 列表，本机上次胜出的策略排在最前"""
+        strategies = [
+            ("unique_profile", self._try_edge_with_unique_profile),
+            ("random_port", self._try_edge_with_random_port),
+            ("headless_incognito", self._try_edge_headless_incognito),
+            ("alternative_service", self._try_edge_with_alternative_service),
+        ]
+        preferred = self.load_preferred_strategy()
+        strategies.sort(key=lambda item: item[0] != preferred)
+        return strategies
+
+    @staticmethod
+    def get_strategy_file_path():
+        return os.path.join(driver_manager.get_cache_dir(), DRIVER_STRATEGY_FILE)
+
+    def load_preferred_strategy(self):
+        try:
+            with open(self.get_strategy_file_path(), 'r', encoding='utf-8') as f:
+                return json.load(f).get("winner")
+        except Exception:
+            return None
+
+    def save_preferred_strategy(self, name):
+        try:
+            with open(self.get_strategy_file_path(), 'w', encoding='utf-8') as f:
+                json.dump({"winner": name, "time": time.time()}, f)
+        except Exception as e:
+            print(f"保存WebDriver启动策略失败: {e}")
+
+    @staticmethod
+    def _discard_strategy_result(future):
+        """竞速失败方完成后关闭其启动的浏览器"""
+        try:
+            ok, driver = future.result()
+        except Exception:
+            return
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    @staticmethod
+    def get_service_driver_path(driver, default=None):
+        """返回 driver 实际使用的驱动程序路径（备用服务策略可能使用 Selenium 自动找到的驱动）"""
+        path = getattr(getattr(driver, 'service', None), 'path', None)
+        return path if path and os.path.isfile(path) else default
+
+    def race_driver_strategies(self, driver_path=None):
+        """并发竞速各启动策略（各自使用独立的临时配置目录和端口）：
+        优先策略先单独运行 STRATEGY_HEAD_START 秒，未成功则其余策略同时启动；
+        采用最先成功的结果，其余策略完成后立即关闭各自的浏览器。返回 (是否成功, driver)"""
+        strategies = self.get_driver_strategies()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(strategies),
+                                                         thread_name_prefix="edge_strategy")
+        futures = {}
+        winner = None
+        try:
+            name, func = strategies[0]
+            futures[executor.submit(func, driver_path)] = name
+            concurrent.futures.wait(futures, timeout=STRATEGY_HEAD_START)
+            first = next(iter(futures))
+            if not (first.done() and not first.exception() and first.result()[0]):
+                self.output_signal.emit("同时尝试其他WebDriver启动策略...")
+                for name, func in strategies[1:]:
+                    futures[executor.submit(func, driver_path)] = name
+            for future in concurrent.futures.as_completed(futures, timeout=STRATEGY_TIMEOUT + STRATEGY_HEAD_START + 5):
+                try:
+                    ok, driver = future.result()
+                except Exception as e:
+                    self.output_signal.emit(f"启动策略 {futures[future]} 出错: {e}")
+                    continue
+                if ok and driver:
+                    winner = (futures[future], driver, future)
+                    break
+        except concurrent.futures.TimeoutError:
+            self.output_signal.emit("所有WebDriver启动策略均超时")
+        finally:
+            for future in futures:
+                if winner is None or future is not winner[2]:
+                    future.add_done_callback(self._discard_strategy_result)
+            executor.shutdown(wait=False)
+
+        if winner is None:
+            return False, None
+        name, driver, _ = winner
+        self.output_signal.emit(f"WebDriver启动策略 {name} 最先成功")
+        if self.load_preferred_strategy() != name:
+            self.save_preferred_strategy(name)
+        return True, driver
+
     def check_edge_driver(self):
         """检测Edge WebDriver是否可用，否则尝试下载/更新"""
         if not self.edge_version:
@@ -403,11 +516,21 @@ class EnvironmentChecker(QObject):
             if driver_manager.version_matches(self.edge_version):
                 self.output_signal.emit(f"使用已缓存的WebDriver配置")
                 
+                # 环境与上次检测通过时一致：跳过启动浏览器，改为后台轻量复核
+                if not self.force_full_check and self.cached_verdict_valid():
+                    self.output_signal.emit("运行环境与上次检测通过时一致，跳过浏览器启动验证")
+                    self.revalidate_driver_async(driver_path, self.edge_version)
+                    return True, "缓存的WebDriver可用（运行环境未变化）。"
+                
                 # 验证缓存的驱动是否可用
-                result, driver = self._try_edge_with_unique_profile(driver_path=driver_path)
+                result, driver = self.race_driver_strategies(driver_path=driver_path)
                 if result:
                     self.driver = driver
                     self.output_signal.emit("缓存的WebDriver可用")
+                    actual_path = self.get_service_driver_path(driver, driver_path)
+                    if actual_path != driver_path:
+                        driver_manager.set_driver_path(actual_path, self.edge_version)
+                    self.save_verdict()
                     return True, "缓存的WebDriver可用。"
                 else:
                     self.output_signal.emit("缓存的WebDriver不可用，需要重新配置")
@@ -416,7 +539,7 @@ class EnvironmentChecker(QObject):
             
             # 清理失败的尝试
             self.kill_msedgedriver()
-            self.cleanup_temp_directories()
+            self.release_temp_dirs(discard=True)
             # 如果版本不匹配或验证失败，重置缓存状态
             driver_manager.reset()
         
@@ -424,8 +547,6 @@ class EnvironmentChecker(QObject):
         
         # 1. 检测前清理驱动进程和旧目录
         self.kill_msedgedriver()
-        self.cleanup_temp_directories() # 清理旧目录
-        time.sleep(1) # 短暂等待
 
         driver_path = None
         # 尝试自动获取当前缓存的或已安装的驱动路径
@@ -441,11 +562,12 @@ class EnvironmentChecker(QObject):
              self.output_signal.emit(f"查找WebDriver失败: {str(e)}")
              driver_path = None # 获取失败则置空
 
-        # 2. 优先尝试核心策略：无头+唯一配置 (使用找到的或让Selenium自动找)
+        # 2. 竞速各启动策略 (使用找到的或让Selenium自动找)
         try:
-            result, driver = self._try_edge_with_unique_profile(driver_path=driver_path)
+            result, driver = self.race_driver_strategies(driver_path=driver_path)
             if result:
                 self.driver = driver
+                driver_path = self.get_service_driver_path(driver, driver_path)
                 self.output_signal.emit("Edge WebDriver已正确配置")
                 
                 # 将成功的驱动路径缓存到驱动管理器并保存
@@ -459,17 +581,16 @@ class EnvironmentChecker(QObject):
                     except Exception as e:
                         self.output_signal.emit(f"保存WebDriver缓存失败: {str(e)}")
                 
+                self.save_verdict()
                 return True, "Edge WebDriver已正确配置。"
             else:
                  # 如果第一次尝试失败，清理一下可能产生的临时文件和进程
                  self.kill_msedgedriver()
-                 self.cleanup_temp_directories(enforce_limit=False) # 清理本次尝试的目录
-                 time.sleep(0.5)
+                 self.release_temp_dirs(discard=True) # 删除本次尝试的目录
         except Exception as e:
             self.output_signal.emit(f"初始WebDriver启动尝试失败: {str(e)}")
             self.kill_msedgedriver() # 失败后清理
-            self.cleanup_temp_directories(enforce_limit=False)
-            time.sleep(0.5)
+            self.release_temp_dirs(discard=True)
 
         # 3. 如果失败，尝试下载/更新驱动并重试核心策略
         try:
@@ -493,12 +614,12 @@ class EnvironmentChecker(QObject):
 
             # 下载后清理一次环境
             self.kill_msedgedriver()
-            time.sleep(1)
             
-            # 使用新驱动再次尝试核心策略
-            result, driver = self._try_edge_with_unique_profile(driver_path=driver_path)
+            # 使用新驱动再次竞速各启动策略
+            result, driver = self.race_driver_strategies(driver_path=driver_path)
             if result:
                 self.driver = driver
+                driver_path = self.get_service_driver_path(driver, driver_path)
                 self.output_signal.emit("WebDriver已更新并配置成功")
                 
                 # 将成功的驱动路径缓存到驱动管理器并保存
@@ -511,54 +632,35 @@ class EnvironmentChecker(QObject):
                 except Exception as e:
                     self.output_signal.emit(f"保存WebDriver缓存出错")
                 
+                self.save_verdict()
                 return True, "Edge WebDriver下载/更新并配置成功。"
             else:
-                 # 如果使用新驱动的核心策略仍然失败，可以尝试一个备用策略（如随机端口）
-                 self.output_signal.emit("尝试备用启动策略...")
-                 self.kill_msedgedriver()
-                 self.cleanup_temp_directories(enforce_limit=False)
-                 time.sleep(0.5)
-                 result, driver = self._try_edge_with_random_port(driver_path=driver_path)
-                 if result:
-                    self.driver = driver
-                    self.output_signal.emit("WebDriver已使用备用策略配置成功")
-                    
-                    # 将成功的驱动路径缓存到驱动管理器并保存
-                    try:
-                        success = driver_manager.set_driver_path(driver_path, self.edge_version)
-                        if success:
-                            self.output_signal.emit("WebDriver已缓存，下次将加速启动")
-                        else:
-                            self.output_signal.emit("缓存WebDriver失败")
-                    except Exception as e:
-                        self.output_signal.emit("保存WebDriver缓存出错")
-                    
-                    return True, "Edge WebDriver下载/更新并使用备用策略配置成功。"
-                 else:
-                    # 如果备用策略也失败了，最后清理一次
-                    self.kill_msedgedriver()
-                    self.cleanup_temp_directories(enforce_limit=False)
+                # 所有策略仍然失败，最后清理一次
+                self.kill_msedgedriver()
+                self.release_temp_dirs(discard=True)
                     
         except Exception as e:
             self.output_signal.emit(f"下载或使用新WebDriver失败: {str(e)}")
             # 失败后清理
             self.kill_msedgedriver()
-            self.cleanup_temp_directories(enforce_limit=False)
+            self.release_temp_dirs(discard=True)
             
         # 所有方法都失败
+        self.invalidate_verdict()
         self.output_signal.emit("无法配置Edge WebDriver。请确保Edge浏览器已正确安装并更新到最新版，或检查网络连接。")
         return False, "所有WebDriver启动策略均失败。"
 
     def kill_all_browser_processes(self):
-        """彻底清理所有WebDriver相关进程，不再干预浏览器进程"""
-        # 只清理msedgedriver进程
+        """清理本次检测启动的WebDriver相关进程，不再干预浏览器进程"""
+        # 只清理本次检测启动的msedgedriver进程
         self.kill_msedgedriver()
         
         # 确保任何残留的WebDriver连接被关闭
         self.quit_driver()
 
-    def create_edge_driver_with_timeout(self, options, service=None, timeout=15): # 默认超时增加到15秒
-        """并发启动Edge WebDriver，如超时则返回None"""
+    def create_edge_driver_with_timeout(self, options, service=None, timeout=STRATEGY_TIMEOUT):
+        """在后台线程启动Edge WebDriver，如超时则返回None。
+        失败或超时时只停止本次启动的驱动服务（不影响同时竞速的其他策略），超时后才完成的浏览器会被自动关闭"""
         def create_driver():
             driver_instance = None
             try:
@@ -580,183 +682,68 @@ class EnvironmentChecker(QObject):
                 # 抛出原始异常，由上层处理
                 raise create_err
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = None # 初始化future
+        def stop_service():
+            if service:
+                try:
+                    service.stop()
+                except Exception:
+                    pass
+
+        def quit_late_driver(future):
             try:
-                future = executor.submit(create_driver)
-                driver = future.result(timeout=timeout)
-                return driver
-            except concurrent.futures.TimeoutError:
-                self.output_signal.emit(f"启动Edge WebDriver超时 ({timeout}秒)")
-                # 超时后尝试取消任务 (如果还在运行)
-                if future and not future.done():
-                    future.cancel()
-                # 尝试强制清理可能的残留进程
-                self.kill_msedgedriver()
-                return None
-            except Exception as e:
-                # 将详细错误信息输出
-                import traceback
-                tb_str = traceback.format_exc()
-                self.output_signal.emit(f"启动Edge WebDriver时发生错误: {e}\n详细信息:\n{tb_str}")
-                # 出错后尝试强制清理可能的残留进程
-                self.kill_msedgedriver()
-                return None
-            finally:
-                 # 确保线程池关闭
-                 executor.shutdown(wait=False)
+                late_driver = future.result()
+            except Exception:
+                return
+            if late_driver:
+                try:
+                    late_driver.quit()
+                except Exception:
+                    pass
+
+        if service:
+            self.started_services.append(service)
+        # 不使用 with 语句：退出 with 时会等待线程结束，使超时失效
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(create_driver)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            self.output_signal.emit(f"启动Edge WebDriver超时 ({timeout}秒)")
+            future.add_done_callback(quit_late_driver)
+            stop_service()
+            return None
+        except Exception as e:
+            # 将详细错误信息输出
+            import traceback
+            tb_str = traceback.format_exc()
+            self.output_signal.emit(f"启动Edge WebDriver时发生错误: {e}\n详细信息:\n{tb_str}")
+            stop_service()
+            return None
+        finally:
+            executor.shutdown(wait=False)
 
     def find_edge_executable(self):
         """尝试找到Edge浏览器可执行文件"""
-        # 优先使用 shutil.which
-        edge_path = shutil.which('msedge') or shutil.which('edge')
-        if edge_path and os.path.exists(edge_path):
-            return edge_path
-        
-        # 如果which找不到，再尝试固定路径 (Windows特定)
-        if sys.platform == 'win32':
-            possible_paths = [
-                os.path.join(os.environ.get("ProgramFiles(x86)", ""), "Microsoft\\Edge\\Application\\msedge.exe"),
-                os.path.join(os.environ.get("ProgramFiles", ""), "Microsoft\\Edge\\Application\\msedge.exe"),
-                os.path.join(os.environ.get("LocalAppData", ""), "Microsoft\\Edge\\Application\\msedge.exe") # 用户安装路径
-            ]
-            for path in possible_paths:
-                if path and os.path.exists(path):
-                    return path
-        return None
+        return edge_version_resolver.exe_path
 
     def get_edge_version_from_registry(self):
         """从Windows注册表获取Edge版本"""
-        if sys.platform != 'win32':
-             return None # 非Windows直接返回
         try:
-            # 检查 HKEY_CURRENT_USER
-            try:
-                key_path = r"Software\\Microsoft\\Edge\\BLBeacon"
-                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_READ) as key:
-                    version, _ = winreg.QueryValueEx(key, "version")
-                    if version:
-                        return version
-            except FileNotFoundError:
-                pass
-            except Exception as e_cu:
-                 self.output_signal.emit(f"读取 HKEY_CURRENT_USER 注册表时出错: {e_cu}")
-
-            # 检查 HKEY_LOCAL_MACHINE (64位视图)
-            try:
-                key_path = r"Software\\Microsoft\\Edge\\BLBeacon"
-                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
-                    version, _ = winreg.QueryValueEx(key, "version")
-                    if version:
-                        return version
-            except FileNotFoundError:
-                pass
-            except Exception as e_lm64:
-                 self.output_signal.emit(f"读取 HKEY_LOCAL_MACHINE (64位) 注册表时出错: {e_lm64}")
-
-            # 检查 HKEY_LOCAL_MACHINE (32位视图)
-            try:
-                key_path = r"Software\\Wow6432Node\\Microsoft\\Edge\\BLBeacon" # 注意路径变化
-                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ | winreg.KEY_WOW64_32KEY) as key:
-                    version, _ = winreg.QueryValueEx(key, "version")
-                    if version:
-                        return version
-            except FileNotFoundError:
-                pass
-            except Exception as e_lm32:
-                 self.output_signal.emit(f"读取 HKEY_LOCAL_MACHINE (32位) 注册表时出错: {e_lm32}")
-
-            # 如果上述都失败，尝试读取 Update 键 (更通用)
-            try:
-                 key_path = r"SOFTWARE\\Microsoft\\EdgeUpdate\\Clients\\{56EB18F8-B008-4CBD-B6D2-8C97FE7E9062}"
-                 # 先尝试 HKLM
-                 try:
-                      with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
-                           version, _ = winreg.QueryValueEx(key, "pv") # 读取 pv 值
-                           if version:
-                                return version
-                 except FileNotFoundError:
-                      pass
-                 # 再尝试 HKCU
-                 try:
-                      with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_READ) as key:
-                           version, _ = winreg.QueryValueEx(key, "pv")
-                           if version:
-                                return version
-                 except FileNotFoundError:
-                      pass
-            except Exception as e_update:
-                 self.output_signal.emit(f"读取 Edge Update 注册表键时出错: {e_update}")
-
-            return None
+            return read_version_from_registry()
         except Exception as e:
             raise Exception(f"从注册表获取Edge版本失败: {str(e)}")
 
     def get_edge_version_from_exe(self, exe_path):
-         """尝试从Edge可执行文件获取版本信息 (Windows特定)"""
-         if sys.platform != 'win32' or not exe_path:
-             return None
-         try:
-             # 使用 PowerShell 命令获取文件版本信息
-             command = f"(Get-Item \"{exe_path}\").VersionInfo.ProductVersion"
-             result = subprocess.run(["powershell", "-Command", command], capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-             version = result.stdout.strip()
-             if version:
-                 return version
-         except (subprocess.CalledProcessError, FileNotFoundError, Exception) as e:
-             # self.output_signal.emit(f"通过可执行文件获取版本失败: {e}") # 减少不必要的输出
-             pass
-         return None
+        """尝试从Edge可执行文件获取版本信息 (Windows特定)"""
+        return read_version_from_exe(exe_path)
 
     def _try_edge_with_unique_profile(self, driver_path=None):
         """策略: 使用唯一临时配置文件 (内部不再清理进程)"""
-        unique_id = uuid.uuid4().hex
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
-        temp_dir_base = os.path.join(tempfile.gettempdir(), f"edge_temp_{timestamp}_{unique_id}")
-        temp_dir = os.path.abspath(temp_dir_base) # 确保绝对路径
-        profile_dir_created = False # 标记是否创建了目录
+        temp_dir = self._make_strategy_temp_dir("edge_temp_")
+        if not temp_dir:
+            return False, None
 
         try:
-            # 确保父目录存在
-            if not os.path.exists(os.path.dirname(temp_dir)):
-                 try:
-                     os.makedirs(os.path.dirname(temp_dir), exist_ok=True)
-                 except OSError as e:
-                     # 如果父目录创建失败，可能权限问题，记录错误并放弃
-                     self.output_signal.emit(f"无法创建临时目录的父目录 {os.path.dirname(temp_dir)}: {e}")
-                     return False, None
-
-            # 尝试创建或验证目录
-            retries = 3
-            while retries > 0:
-                try:
-                    if not os.path.exists(temp_dir):
-                        os.makedirs(temp_dir)
-                        profile_dir_created = True
-                        # self.output_signal.emit(f"创建临时目录: {temp_dir}")
-                        break # 创建成功
-                    elif os.access(temp_dir, os.W_OK):
-                         # 目录存在且可写，可能被上次运行遗留，尝试使用
-                         profile_dir_created = True # 标记以便清理
-                         # self.output_signal.emit(f"使用已存在的临时目录: {temp_dir}")
-                         break
-                    else:
-                        # 目录存在但不可写，尝试新名称
-                         self.output_signal.emit(f"临时目录 {temp_dir} 不可写，尝试新名称...")
-                         temp_dir = os.path.abspath(os.path.join(tempfile.gettempdir(), f"edge_temp_{timestamp}_{uuid.uuid4().hex}"))
-                         retries -= 1
-                except Exception as mkdir_e:
-                     self.output_signal.emit(f"创建临时目录 {temp_dir} 时出错: {mkdir_e}, 重试...")
-                     temp_dir = os.path.abspath(os.path.join(tempfile.gettempdir(), f"edge_temp_{timestamp}_{uuid.uuid4().hex}"))
-                     retries -= 1
-                     time.sleep(0.2)
-
-            if not profile_dir_created:
-                 self.output_signal.emit("无法创建可用的临时配置文件目录")
-                 return False, None # 直接返回失败
-
-            self.register_temp_dir(temp_dir) # 注册以便最终清理
-
             options = Options()
             options.use_chromium = True
             options.add_argument("--headless")
@@ -802,7 +789,7 @@ class EnvironmentChecker(QObject):
                  self.output_signal.emit(f"初始化WebDriver服务失败: {service_err}")
                  return False, None
 
-            driver = self.create_edge_driver_with_timeout(options, service=service, timeout=15) # 使用之前的超时设置
+            driver = self.create_edge_driver_with_timeout(options, service=service)
 
             return driver is not None, driver
         except Exception as e:
@@ -820,51 +807,12 @@ class EnvironmentChecker(QObject):
 
     def _try_edge_with_random_port(self, driver_path=None):
         """策略: 使用随机端口和唯一目录 (内部不再清理进程)"""
-        port = random.randint(10000, 32000)
-        unique_id = uuid.uuid4().hex
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
-        temp_dir_base = os.path.join(tempfile.gettempdir(), f"edge_port_{timestamp}_{unique_id}")
-        temp_dir = os.path.abspath(temp_dir_base)
-        port_dir_created = False
+        port = free_port()  # 由系统分配空闲端口，避免与同时竞速的其他策略冲突
+        temp_dir = self._make_strategy_temp_dir("edge_port_")
+        if not temp_dir:
+            return False, None
 
         try:
-             # 确保父目录存在
-            if not os.path.exists(os.path.dirname(temp_dir)):
-                 try:
-                     os.makedirs(os.path.dirname(temp_dir), exist_ok=True)
-                 except OSError as e:
-                     self.output_signal.emit(f"无法创建随机端口临时目录的父目录 {os.path.dirname(temp_dir)}: {e}")
-                     return False, None
-
-            # 尝试创建或验证目录 (与上一个策略类似)
-            retries = 3
-            while retries > 0:
-                 try:
-                     if not os.path.exists(temp_dir):
-                         os.makedirs(temp_dir)
-                         port_dir_created = True
-                         # self.output_signal.emit(f"创建随机端口临时目录: {temp_dir}")
-                         break
-                     elif os.access(temp_dir, os.W_OK):
-                          port_dir_created = True
-                          # self.output_signal.emit(f"使用已存在的随机端口临时目录: {temp_dir}")
-                          break
-                     else:
-                          self.output_signal.emit(f"随机端口临时目录 {temp_dir} 不可写，尝试新名称...")
-                          temp_dir = os.path.abspath(os.path.join(tempfile.gettempdir(), f"edge_port_{timestamp}_{uuid.uuid4().hex}"))
-                          retries -= 1
-                 except Exception as mkdir_e:
-                      self.output_signal.emit(f"创建随机端口临时目录 {temp_dir} 时出错: {mkdir_e}, 重试...")
-                      temp_dir = os.path.abspath(os.path.join(tempfile.gettempdir(), f"edge_port_{timestamp}_{uuid.uuid4().hex}"))
-                      retries -= 1
-                      time.sleep(0.2)
-
-            if not port_dir_created:
-                 self.output_signal.emit("无法创建可用的随机端口临时目录")
-                 return False, None
-
-            self.register_temp_dir(temp_dir)
-
             options = Options()
             options.use_chromium = True
             options.add_argument("--headless")
@@ -902,7 +850,7 @@ class EnvironmentChecker(QObject):
                  self.output_signal.emit(f"初始化WebDriver服务 (随机端口) 失败: {service_err}")
                  return False, None
 
-            driver = self.create_edge_driver_with_timeout(options, service=service, timeout=15)
+            driver = self.create_edge_driver_with_timeout(options, service=service)
 
             return driver is not None, driver
         except Exception as e:
@@ -917,14 +865,60 @@ class EnvironmentChecker(QObject):
                       pass
             return False, None
 
-    # 可以考虑移除 _try_edge_headless_incognito 和 _try_edge_with_alternative_service
-    # 如果它们不再被 check_edge_driver 调用
+    def _make_strategy_temp_dir(self, prefix):
+        """从配置目录池为竞速策略分配独立的临时配置目录（检测结束时归还）"""
+        temp_dir = profile_pool.acquire(prefix)
+        if not temp_dir:
+            self.output_signal.emit("无法创建可用的临时配置文件目录")
+            return None
+        self.register_temp_dir(temp_dir)
+        return temp_dir
+
+    def _make_headless_options(self, temp_dir, extra_args=()):
+        options = Options()
+        options.use_chromium = True
+        options.add_argument("--headless")
+        options.add_argument(f'--user-data-dir={temp_dir}')
+        for arg in ("--disable-extensions", "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage",
+                    "--log-level=3", *extra_args):
+            options.add_argument(arg)
+        if sys.platform == 'win32':
+            options.add_argument("--silent")
+        options.add_experimental_option("excludeSwitches", [
+            "enable-logging",
+            "enable-automation",
+            "disable-component-extensions-with-background-pages"
+        ])
+        options.add_experimental_option('useAutomationExtension', False)
+        return options
+
     def _try_edge_headless_incognito(self, driver_path=None):
-         # ... (此函数现在可能不再需要，可以删除或注释掉) ...
-         # 如果保留，也需要移除内部的进程清理调用
-         pass
+        """策略: InPrivate 无痕模式 + 独立临时目录"""
+        temp_dir = self._make_strategy_temp_dir("edge_temp_inprivate_")
+        if not temp_dir:
+            return False, None
+        try:
+            options = self._make_headless_options(temp_dir, extra_args=("--inprivate",))
+            if driver_path and os.path.exists(driver_path):
+                service = EdgeService(executable_path=driver_path, service_args=['--log-level=WARNING'])
+            else:
+                service = EdgeService(service_args=['--log-level=WARNING'])
+            driver = self.create_edge_driver_with_timeout(options, service=service)
+            return driver is not None, driver
+        except Exception as e:
+            self.output_signal.emit(f"配置无痕模式策略时发生异常: {str(e)}")
+            return False, None
 
     def _try_edge_with_alternative_service(self, driver_path=None):
-         # ... (此函数现在可能不再需要，可以删除或注释掉) ...
-         # 如果保留，也需要移除内部的进程清理调用
-         pass
+        """策略: 忽略指定的驱动路径，由 Selenium 自动查找/下载匹配的驱动（应对缓存的驱动损坏或不匹配）"""
+        temp_dir = self._make_strategy_temp_dir("edge_alt_")
+        if not temp_dir:
+            return False, None
+        try:
+            options = self._make_headless_options(temp_dir)
+            service = EdgeService(service_args=['--log-level=WARNING'])
+            driver = self.create_edge_driver_with_timeout(options, service=service)
+            return driver is not None, driver
+        except Exception as e:
+            self.output_signal.emit(f"配置备用驱动服务策略时发生异常: {str(e)}")
+            return False, None
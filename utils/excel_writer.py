@@ -0,0 +1,94 @@
+# utils/excel_writer.py
+
+import os
+import time
+import threading
+import openpyxl
+
+# 默认两次检查点之间的最短间隔（秒）
+DEFAULT_CHECKPOINT_INTERVAL = 120
+
+class BufferedExcelWriter:
+    """单写者Excel输出组件：
+    - 追加模式（传入 headers）：行数据保存在内存中，结束时排序并一次性写出工作簿
+    - 更新模式（传入 workbook）：单元格修改直接作用于内存中的工作簿，结束时一次性保存
+    检查点按时间间隔触发并以"临时文件+替换"的方式保存，避免每批都重写整个文件；
+    崩溃后的恢复由各任务的 JobJournal 负责（续跑时重放已完成的结果），这里不再单独记录修改日志。
+    """
+
+    def __init__(self, excel_path, headers=None, workbook=None, sheet_title=None,
+                 checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        if headers is None and workbook is None:
+            raise ValueError("headers 和 workbook 至少需要提供一个")
+        self.excel_path = excel_path
+        self.headers = list(headers) if headers else None
+        self.workbook = workbook
+        self.sheet_title = sheet_title
+        self.checkpoint_interval = checkpoint_interval
+        self.rows = []
+        self._dirty = False
+        self._last_checkpoint = time.time()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 写入接口
+    # ------------------------------------------------------------------
+    def append_rows(self, rows):
+        """追加若干行（仅追加模式）"""
+        rows = [list(r) for r in rows]
+        if not rows:
+            return
+        with self._lock:
+            self.rows.extend(rows)
+            self._dirty = True
+
+    def update_cells(self, updates):
+        """批量修改单元格（仅更新模式），updates 为 [(row_idx, col_idx, value), ...]"""
+        if self.workbook is None:
+            raise RuntimeError("update_cells 需要在更新模式（传入 workbook）下使用")
+        updates = list(updates)
+        if not updates:
+            return
+        with self._lock:
+            ws = self.workbook.active
+            for (r, c, v) in updates:
+                ws.cell(row=r, column=c, value=v)
+            self._dirty = True
+
+    # ------------------------------------------------------------------
+    # 检查点与最终输出
+    # ------------------------------------------------------------------
+    def checkpoint(self, force=False):
+        """按时间间隔保存检查点；force=True 时立即保存。返回是否实际写出"""
+        with self._lock:
+            if not force:
+                if not self._dirty:
+                    return False
+                if time.time() - self._last_checkpoint < self.checkpoint_interval:
+                    return False
+            self._save(self.rows)
+            self._dirty = False
+            self._last_checkpoint = time.time()
+            return True
+
+    def finalize(self, sort_key=None):
+        """一次性写出最终工作簿（追加模式下可按 sort_key 排序）"""
+        with self._lock:
+            rows = sorted(self.rows, key=sort_key) if sort_key else self.rows
+            self._save(rows)
+            self._dirty = False
+
+    def _save(self, rows):
+        """写入临时文件后替换目标文件，避免写到一半时崩溃损坏原文件"""
+        tmp_path = f"{self.excel_path}.tmp"
+        if self.workbook is not None:
+            self.workbook.save(tmp_path)
+        else:
+            # 追加模式使用只写模式，写出速度与内存占用只和行数线性相关
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(title=self.sheet_title) if self.sheet_title else wb.create_sheet()
+            ws.append(self.headers)
+            for row in rows:
+                ws.append(row)
+            wb.save(tmp_path)
+        os.replace(tmp_path, self.excel_path)
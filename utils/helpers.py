@@ -1,7 +1,35 @@
 # 示例辅助函数
 
+import os
+import re
+import sys
+import unicodedata
+
 def center_window(window):
     """将窗口居中显示"""
     desktop = window.app.primaryScreen().availableGeometry()
     w, h = desktop.width(), desktop.height()
     window.move((w - window.width()) // 2, (h - window.height()) // 2)
+
+def get_app_data_dir(sub_dir):
+    """获取软件根目录下的数据目录（打包后为程序所在目录，开发环境为当前工作目录），不存在则创建"""
+    if getattr(sys, 'frozen', False):
+        root_dir = os.path.dirname(sys.executable)
+    else:
+        root_dir = os.getcwd()
+    data_dir = os.path.join(root_dir, sub_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+def normalize_game_name(name, strip_brackets=False):
+    """归一化游戏名称：全角转半角、统一括号、去除空白并小写。
+    strip_brackets=True 时同时去掉括号及其中内容（与版号查询时的关键字处理一致）"""
+    if name is None:
+        return ""
+    # NFKC 会将全角字母、数字、括号等转换为半角形式
+    text = unicodedata.normalize('NFKC', str(name))
+    text = text.replace('【', '[').replace('】', ']')
+    if strip_brackets:
+        text = re.sub(r'\([^)]*\)', '', text)
+    text = re.sub(r'\s+', '', text)
+    return text.lower()
@@ -0,0 +1,214 @@
+# utils/http_transport.py
+#
+# 统一的HTTP传输层：所有联网请求（模型下载、版本检查、更新包下载、网络检测）共用同一个连接池，
+# 支持保持连接、默认超时、自动重试、代理设置，以及用于离线测试的本地模拟后端。
+#
+# 代理：默认沿用系统/环境变量中的代理（HTTP_PROXY / HTTPS_PROXY），
+#       也可通过环境变量 TOOLBOX_HTTP_PROXY 或 transport.configure(proxy=...) 单独指定。
+# 模拟后端：设置环境变量 TOOLBOX_HTTP_MOCK_DIR=<目录> 或调用 transport.use_mock(...) 后，
+#       所有请求都由本地文件/预设路由响应，不访问网络。
+
+import io
+import os
+import threading
+import mimetypes
+from urllib.parse import urlsplit, unquote
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# 默认超时（连接, 读取）
+DEFAULT_TIMEOUT = (5, 30)
+# 自动重试次数与退避系数（第 n 次重试前等待 backoff * 2^(n-1) 秒）
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# 连接池：按主机缓存的连接池数量，以及每个主机保持的连接数
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+class MockAdapter(BaseAdapter):
+    """本地模拟后端：先查预设路由，再查快照目录（<目录>/<主机>/<路径>），都没有则返回 404。
+    支持 Range 请求（返回 206），便于离线测试断点续传"""
+
+    def __init__(self, routes=None, fixture_dir=None):
+        super().__init__()
+        self.routes = {}
+        self.fixture_dir = fixture_dir
+        for url, spec in (routes or {}).items():
+            if isinstance(spec, tuple):
+                self.add_route(url, *spec)
+            else:
+                self.add_route(url, spec)
+
+    def add_route(self, url, body=b"", status=200, headers=None):
+        """注册一个路由（忽略查询参数）；body 可以是 bytes/str，或接收 PreparedRequest 返回 (status, body, headers) 的函数"""
+        self.routes[self._key(url)] = (body, status, headers or {})
+
+    @staticmethod
+    def _key(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{parts.path or '/'}"
+
+    def _resolve(self, request):
+        route = self.routes.get(self._key(request.url))
+        if route is not None:
+            body, status, headers = route
+            if callable(body):
+                return body(request)
+            return status, body, headers
+        if self.fixture_dir:
+            parts = urlsplit(request.url)
+            rel = [p for p in unquote(parts.path).split('/') if p not in ('', '.', '..')]
+            base = os.path.join(self.fixture_dir, parts.hostname or '', *rel)
+            for candidate in (base, base + '.html', os.path.join(base, 'index.html')):
+                if os.path.isfile(candidate):
+                    with open(candidate, 'rb') as f:
+                        content_type = mimetypes.guess_type(candidate)[0] or 'application/octet-stream'
+                        return 200, f.read(), {'Content-Type': content_type}
+        return 404, b"", {}
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, body, headers = self._resolve(request)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        headers = CaseInsensitiveDict(headers)
+
+        range_header = request.headers.get('Range', '')
+        if status == 200 and range_header.startswith('bytes='):
+            start_text, _, end_text = range_header[len('bytes='):].partition('-')
+            start = int(start_text or 0)
+            end = int(end_text) if end_text else len(body) - 1
+            if start >= len(body):
+                status, headers['Content-Range'], body = 416, f"bytes */{len(body)}", b""
+            else:
+                end = min(end, len(body) - 1)
+                headers['Content-Range'] = f"bytes {start}-{end}/{len(body)}"
+                status, body = 206, body[start:end + 1]
+        headers['Content-Length'] = str(len(body))
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = requests.status_codes._codes.get(status, ('',))[0].upper()
+        response.headers = headers
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(headers) or 'utf-8'
+        return response
+
+    def close(self):
+        pass
+
+class HttpTransport:
+    """共享HTTP传输：
+    - 所有线程共用同一组连接池（HTTPAdapter），每个线程使用自己的 Session 挂载这些连接池
+    - 未显式传入 timeout 时使用默认超时；retry=False 的请求不自动重试（如快速网络检测）"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, proxy=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.proxy = proxy or os.environ.get("TOOLBOX_HTTP_PROXY") or None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._adapters = None
+        mock_dir = os.environ.get("TOOLBOX_HTTP_MOCK_DIR")
+        if mock_dir:
+            self.use_mock(fixture_dir=mock_dir)
+
+    # ------------------------------------------------------------------
+    # 配置
+    # ------------------------------------------------------------------
+    def _build_adapters(self):
+        retry = Retry(total=self.retries, connect=self.retries, read=self.retries,
+                      backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUS,
+                      allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                      raise_on_status=False, respect_retry_after_header=True)
+        return {
+            True: HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry),
+            False: HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0),
+        }
+
+    def _install(self, adapters):
+        with self._lock:
+            old, self._adapters = self._adapters, adapters
+            self._generation += 1  # 各线程下次请求时重建 Session
+        if old:
+            for adapter in set(old.values()):
+                adapter.close()
+
+    def configure(self, timeout=None, retries=None, proxy=None):
+        """修改默认超时、重试次数或代理（proxy="" 表示恢复使用系统代理）"""
+        if timeout is not None:
+            self.timeout = timeout
+        if proxy is not None:
+            self.proxy = proxy or None
+        if retries is not None:
+            self.retries = retries
+        with self._lock:
+            is_mock = self._adapters is not None and isinstance(self._adapters[True], MockAdapter)
+        if not is_mock:
+            self._install(self._build_adapters())
+        else:
+            with self._lock:
+                self._generation += 1
+
+    def use_mock(self, routes=None, fixture_dir=None):
+        """切换到本地模拟后端并返回它（可继续 add_route）"""
+        adapter = MockAdapter(routes=routes, fixture_dir=fixture_dir)
+        self._install({True: adapter, False: adapter})
+        return adapter
+
+    def use_network(self):
+        """恢复真实网络后端"""
+        self._install(self._build_adapters())
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+    def session(self, retry=True):
+        """返回当前线程的 Session（共享连接池）"""
+        with self._lock:
+            if self._adapters is None:
+                self._adapters = self._build_adapters()
+            generation, adapters = self._generation, self._adapters
+        local = self._local
+        if getattr(local, 'generation', None) != generation:
+            local.sessions = {}  # 配置已变化，丢弃旧 Session（连接池由传输层统一关闭）
+            local.generation = generation
+        session = local.sessions.get(retry)
+        if session is None:
+            session = requests.Session()
+            adapter = adapters[retry]
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if self.proxy:
+                session.proxies.update({"http": self.proxy, "https": self.proxy})
+            local.sessions[retry] = session
+        return session
+
+    def request(self, method, url, retry=True, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session(retry).request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('HEAD', url, **kwargs)
+
+    def close(self):
+        """关闭所有连接（程序退出时调用）"""
+        with self._lock:
+            adapters, self._adapters = self._adapters, None
+            self._generation += 1
+        if adapters:
+            for adapter in set(adapters.values()):
+                adapter.close()
+
+# 全局共享的传输实例
+transport = HttpTransport()
@@ -0,0 +1,88 @@
+# utils/job_journal.py
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+from utils.helpers import get_app_data_dir
+
+class JobJournal:
+    """任务日志：以追加写入的方式记录已完成的任务单元（如某一天、某个游戏）及其结果，
+    用于任务中断后从断点继续，而不必从头重跑"""
+
+    def __init__(self, job_id, journal_dir=None):
+        self.job_id = job_id
+        if journal_dir is None:
+            journal_dir = os.path.join(get_app_data_dir('.crawler_cache'), 'jobs')
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = os.path.join(journal_dir, f"{self.make_file_stem(job_id)}.jsonl")
+        self._done = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_file_stem(job_id):
+        """将任务ID转换为安全的文件名：保留可读前缀并附加哈希避免冲突"""
+        readable = re.sub(r'[^0-9A-Za-z_\-]+', '_', job_id)[:40].strip('_')
+        digest = hashlib.md5(job_id.encode('utf-8')).hexdigest()[:12]
+        return f"{readable}_{digest}" if readable else digest
+
+    def _load(self):
+        """读取已有日志，崩溃时写了一半的最后一行直接忽略"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'unit' in entry:
+                        self._done[entry['unit']] = entry.get('payload')
+        except Exception as e:
+            print(f"读取任务日志失败: {str(e)}")
+
+    def is_done(self, unit):
+        """判断任务单元是否已完成"""
+        with self._lock:
+            return unit in self._done
+
+    def get_payload(self, unit):
+        """获取已完成任务单元记录的结果"""
+        with self._lock:
+            return self._done.get(unit)
+
+    def completed_units(self):
+        """返回所有已完成的任务单元"""
+        with self._lock:
+            return list(self._done.keys())
+
+    def mark_done(self, unit, payload=None):
+        """记录任务单元已完成，立即落盘"""
+        entry = {"unit": unit, "payload": payload, "time": time.time()}
+        with self._lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                print(f"写入任务日志失败: {str(e)}")
+            self._done[unit] = payload
+
+    def clear(self):
+        """清空任务日志（开始全新任务或任务全部完成时调用）"""
+        with self._lock:
+            self._done = {}
+            try:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            except Exception:
+                pass
@@ -12,6 +12,7 @@ from docx.table import _Cell  # 导入 Cell 类
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill
 import requests
+from utils.http_transport import transport
 
 # 配置日志记录
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -141,7 +142,7 @@ def check_and_download_model(progress_callback):
             
             # 下载文件
             try:
-                with requests.get(download_url, stream=True) as r:
+                with transport.get(download_url, stream=True, timeout=(10, 60)) as r:
                     r.raise_for_status()
                     total_size = int(r.headers.get('content-length', 0))
                     downloaded_size = 0
@@ -0,0 +1,299 @@
+# utils/profile_pool.py
+#
+# Edge 临时配置目录（--user-data-dir）池：
+# - 所有配置目录集中放在 <系统临时目录>/edge_profile_pool 下，由清单文件 manifest.json 记录每个目录的
+#   前缀、占用者（进程 PID 与创建时间）、最近使用时间和占用空间
+# - acquire 优先复用同前缀的空闲目录，没有时才新建；release 后目录回到池中供下一个浏览器使用
+# - 空闲目录总大小超过配额或数量超过上限时，后台线程按最近使用时间淘汰最旧的目录（占用中的目录不会被淘汰）
+# - 程序异常退出后，下次启动只需读取清单：占用者进程已不存在的目录直接回收为空闲，
+#   不再遍历临时目录中的全部文件逐个检测是否被锁定
+
+import os
+import glob
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROFILE_POOL_DIR = "edge_profile_pool"
+MANIFEST_FILE = "manifest.json"
+# 池中目录的总空间配额（字节），超出时淘汰最久未使用的空闲目录
+PROFILE_POOL_QUOTA = 512 * 1024 * 1024
+# 最多保留的空闲目录数
+MAX_FREE_PROFILES = 8
+# 旧版本直接创建在系统临时目录中的配置目录，启动时在后台删除（仍被浏览器锁定的跳过）。
+# 驱动自行创建的 scoped_dir* 可能属于正在运行的爬虫浏览器、其他程序实例或其他 Selenium 程序，不在此清理
+LEGACY_PATTERNS = ["edge_driver_*", "edge_temp_*", "edge_port_*", "edge_alt_*"]
+# 浏览器运行时在配置目录中创建的单实例锁文件
+LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile")
+
+def get_process_identity(pid=None):
+    """返回 [PID, 进程创建时间]（没有 psutil 时创建时间为 None），PID 被系统复用后可据此区分"""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return [pid, psutil.Process(pid).create_time()]
+        except Exception:
+            pass
+    return [pid, None]
+
+def is_owner_alive(owner):
+    """占用者进程是否仍在运行（无法判断时按仍在运行处理，不回收其目录）"""
+    if not owner:
+        return False
+    pid, create_time = owner
+    if psutil is None:
+        return True
+    try:
+        proc = psutil.Process(pid)
+        return create_time is None or abs(proc.create_time() - create_time) < 0.5
+    except Exception:
+        return False
+
+def get_dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def clear_lock_files(path):
+    """删除浏览器遗留的单实例锁文件；锁文件仍被占用（浏览器仍在运行）时返回 False"""
+    for name in LOCK_FILES:
+        lock_path = os.path.join(path, name)
+        if not os.path.lexists(lock_path):
+            continue
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+    return True
+
+class ProfilePool:
+    """配置目录池（线程安全；清单每次修改都重新读取后原子写回，多个程序实例可共用）"""
+
+    def __init__(self, root=None, quota=PROFILE_POOL_QUOTA, max_free=MAX_FREE_PROFILES):
+        self.root = os.path.abspath(root or os.path.join(tempfile.gettempdir(), PROFILE_POOL_DIR))
+        self.quota = quota
+        self.max_free = max_free
+        self._lock = threading.Lock()
+        self._identity = None
+        self._evicting = False
+        self._evict_again = False
+        self._legacy_purged = False
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def _owner(self):
+        if self._identity is None:
+            self._identity = get_process_identity()
+        return self._identity
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except Exception:
+            return {}
+
+    def _save(self, entries):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            print(f"保存配置目录清单失败: {str(e)}")
+
+    def _name_of(self, path):
+        """池中目录的名称；不属于本池的路径返回 None"""
+        if not path:
+            return None
+        path = os.path.abspath(path)
+        return os.path.basename(path) if os.path.dirname(path) == self.root else None
+
+    # ------------------------------------------------------------------
+    # 分配与归还
+    # ------------------------------------------------------------------
+    def acquire(self, prefix="edge_temp_"):
+        """分配一个配置目录（优先复用最近用过的同前缀空闲目录），失败返回 None"""
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            free = sorted((name for name, entry in entries.items()
+                           if entry.get("prefix") == prefix and not entry.get("owner")),
+                          key=lambda name: entries[name].get("last_used", 0), reverse=True)
+            for name in free:
+                path = os.path.join(self.root, name)
+                if not os.path.isdir(path):
+                    entries.pop(name)
+                    continue
+                if not clear_lock_files(path):
+                    continue  # 上一个浏览器尚未完全退出
+                entries[name].update(owner=self._owner(), last_used=now)
+                self._save(entries)
+                return path
+
+            name = f"{prefix}{uuid.uuid4().hex}"
+            path = os.path.join(self.root, name)
+            try:
+                os.makedirs(path)
+            except OSError as e:
+                print(f"创建配置目录失败: {path}, 错误: {str(e)}")
+                return None
+            entries[name] = {"prefix": prefix, "owner": self._owner(), "last_used": now, "size": 0}
+            self._save(entries)
+            return path
+
+    def release(self, path, discard=False):
+        """归还配置目录（需在使用它的浏览器退出后调用）；discard=True 时直接删除（如启动失败、目录可能已损坏）"""
+        name = self._name_of(path)
+        if name is None:
+            return False
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(name)
+            if entry is None:
+                return False
+            if discard:
+                entries.pop(name)
+            else:
+                entry.update(owner=None, last_used=time.time(), size=None)  # 大小由后台重新统计
+            self._save(entries)
+        if discard:
+            shutil.rmtree(path, ignore_errors=True)
+        self.schedule_evict()
+        return True
+
+    def release_all(self):
+        """归还本进程占用的全部目录（程序退出时调用）"""
+        owner = self._owner()
+        with self._lock:
+            entries = self._load()
+            released = 0
+            for entry in entries.values():
+                if entry.get("owner") == owner:
+                    entry.update(owner=None, last_used=time.time(), size=None)
+                    released += 1
+            if released:
+                self._save(entries)
+        return released
+
+    # ------------------------------------------------------------------
+    # 启动恢复与淘汰
+    # ------------------------------------------------------------------
+    def recover(self, keep=()):
+        """启动或环境检测前调用：回收占用者已退出的目录，删除清单中没有的目录；
+        首次调用时还会在后台删除旧版本遗留在系统临时目录中的配置目录（keep 中的路径及其上级目录除外）。
+        只读取清单和池目录的一层列表，返回回收的目录数"""
+        with self._lock:
+            entries = self._load()
+            try:
+                names = set(os.listdir(self.root))
+            except OSError:
+                names = set()
+            names = {name for name in names if not name.startswith(MANIFEST_FILE)}
+            recovered = 0
+            for name in list(entries):
+                if name not in names:
+                    entries.pop(name)
+                elif entries[name].get("owner") and not is_owner_alive(entries[name]["owner"]):
+                    entries[name].update(owner=None, size=None)
+                    recovered += 1
+            orphans = [os.path.join(self.root, name) for name in names if name not in entries]
+            self._save(entries)
+            purge_legacy = not self._legacy_purged
+            self._legacy_purged = True
+        if orphans or purge_legacy:
+            threading.Thread(target=self._remove_dirs, args=(orphans, purge_legacy, list(keep)),
+                             daemon=True, name="profile_pool_purge").start()
+        self.schedule_evict()
+        return recovered
+
+    @staticmethod
+    def _remove_dirs(paths, purge_legacy, keep):
+        if purge_legacy:
+            temp_dir = tempfile.gettempdir()
+            keep = [os.path.abspath(p) for p in keep if p]
+            for pattern in LEGACY_PATTERNS:
+                for path in glob.glob(os.path.join(temp_dir, pattern)):
+                    path = os.path.abspath(path)
+                    if any(k == path or k.startswith(path + os.sep) for k in keep):
+                        continue
+                    if os.path.isdir(path) and clear_lock_files(path):
+                        paths.append(path)
+        removed = 0
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+            if not os.path.exists(path):
+                removed += 1
+        if removed:
+            print(f"已在后台删除 {removed} 个遗留的浏览器配置目录")
+
+    def schedule_evict(self):
+        """在后台统计空闲目录大小，并淘汰超出配额/数量上限的最久未使用目录"""
+        with self._lock:
+            if self._evicting:
+                self._evict_again = True  # 本轮结束后再整理一次，统计期间新归还的目录
+                return
+            self._evicting = True
+        threading.Thread(target=self._evict, daemon=True, name="profile_pool_evict").start()
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                self._evict_again = False
+            self._evict_once()
+            with self._lock:
+                if not self._evict_again:
+                    self._evicting = False
+                    return
+
+    def _evict_once(self):
+        try:
+            with self._lock:
+                entries = self._load()
+            # 目录大小在锁外统计，不阻塞分配与归还
+            sizes = {name: get_dir_size(os.path.join(self.root, name))
+                     for name, entry in entries.items()
+                     if not entry.get("owner") and entry.get("size") is None}
+            with self._lock:
+                entries = self._load()
+                for name, size in sizes.items():
+                    if name in entries and not entries[name].get("owner"):
+                        entries[name]["size"] = size
+                free = sorted((name for name, entry in entries.items() if not entry.get("owner")),
+                              key=lambda name: entries[name].get("last_used", 0))
+                total = sum(entry.get("size") or 0 for entry in entries.values())
+                victims = []
+                while free and (total > self.quota or len(free) > self.max_free):
+                    name = free.pop(0)
+                    total -= entries.pop(name).get("size") or 0
+                    victims.append(name)
+                if sizes or victims:
+                    self._save(entries)
+            for name in victims:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            if victims:
+                print(f"配置目录池已淘汰 {len(victims)} 个最久未使用的目录")
+        except Exception as e:
+            print(f"整理配置目录池时出错: {str(e)}")
+
+# 全局配置目录池
+profile_pool = ProfilePool()
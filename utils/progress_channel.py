@@ -0,0 +1,117 @@
+# utils/progress_channel.py
+#
+# 分级、合并的进度日志通道：
+# - 工作线程通过 post(message, level) 投递消息，只加锁追加到缓冲区，不直接发送Qt信号
+# - GUI线程中的定时器按固定帧率（默认每 100 毫秒）取出缓冲区，合并为一段文本后只发出一次 flushed 信号
+# - 低于界面级别（默认 INFO）的调试信息不进入界面，只写入滚动日志文件 .crawler_cache/logs/<名称>.log
+# - 所有投递的消息（含调试信息）都会写入日志文件，界面只显示其中一部分
+
+import os
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from utils.helpers import get_app_data_dir
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+# 界面默认显示的最低级别
+UI_LEVEL = INFO
+# 刷新到界面的间隔（毫秒）
+FLUSH_INTERVAL_MS = 100
+# 每次刷新最多显示的行数，超出部分只保留最新的，完整内容见日志文件
+MAX_BATCH_LINES = 200
+# 界面日志框最多保留的行数（更早的内容只在日志文件中）
+LOG_VIEW_MAX_LINES = 5000
+# 滚动日志文件大小与保留份数
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_loggers_lock = threading.Lock()
+
+def get_log_path(name):
+    """返回指定通道的日志文件路径"""
+    return os.path.join(get_app_data_dir(os.path.join('.crawler_cache', 'logs')), f"{name}.log")
+
+def get_log_files(name):
+    """返回指定通道现有的日志文件（含滚动备份），按时间从旧到新排列"""
+    path = get_log_path(name)
+    candidates = [f"{path}.{i}" for i in range(LOG_BACKUP_COUNT, 0, -1)] + [path]
+    return [p for p in candidates if os.path.isfile(p)]
+
+def get_file_logger(name):
+    """获取写入 .crawler_cache/logs/<name>.log 的滚动日志记录器（同名只创建一次）"""
+    logger = logging.getLogger(f"toolbox.{name}")
+    with _loggers_lock:
+        if not logger.handlers:
+            handler = RotatingFileHandler(get_log_path(name), maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(DEBUG)
+            logger.propagate = False
+    return logger
+
+class ProgressChannel(QObject):
+    """进度日志通道：需在GUI线程中创建，post 可在任意线程调用"""
+
+    flushed = Signal(str)  # 一批合并后的消息（以换行分隔）
+
+    def __init__(self, name, ui_level=UI_LEVEL, interval_ms=FLUSH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.ui_level = ui_level
+        self.logger = get_file_logger(name)
+        self._pending = deque(maxlen=MAX_BATCH_LINES)  # [消息, 连续重复次数]
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def post(self, message, level=INFO):
+        """投递一条消息：写入日志文件，达到界面级别的放入缓冲区等待下次刷新"""
+        self.logger.log(level, message)
+        if level < self.ui_level:
+            return
+        with self._lock:
+            if self._pending and self._pending[-1][0] == message:
+                self._pending[-1][1] += 1  # 连续相同的消息合并为一行
+                return
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1  # 缓冲区已满时丢弃最早的一条（日志文件中仍有记录）
+            self._pending.append([message, 1])
+
+    def __call__(self, message, level=INFO):
+        """可直接作为 progress_callback 使用"""
+        self.post(message, level)
+
+    def debug(self, message):
+        self.post(message, DEBUG)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        """停止定时刷新，并把缓冲区中剩余的消息立即发出"""
+        self._timer.stop()
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, dropped = self._pending, self._dropped
+            self._pending, self._dropped = deque(maxlen=MAX_BATCH_LINES), 0
+        if not pending:
+            return
+        lines = []
+        if dropped:
+            lines.append(f"...（消息过多，省略 {dropped} 条，完整内容见日志文件 {get_log_path(self.name)}）")
+        for message, count in pending:
+            lines.append(message if count == 1 else f"{message}（重复 {count} 次）")
+        self.flushed.emit("\n".join(lines))
@@ -0,0 +1,80 @@
+# utils/qcc_parser.py
+#
+# 企查查著作权搜索结果的本地解析：一次性取回结果表格的 outerHTML，用 lxml 在本地解析，
+# 替代对每一行逐个调用 find_elements（每次调用都是一次WebDriver往返）。
+# 提取规则（主要XPath与备选方法）与 CopyrightQuery.extract_and_match_results 中的逐行提取保持一致。
+
+import re
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# 结果表格定位（与页面上的XPath一致）
+RESULTS_TABLE_XPATH = "//div[contains(@class, 'bigsearch-list')]//table[contains(@class, 'ntable')]"
+
+def _text(elem):
+    """近似 WebElement.text：合并空白并去除首尾空白"""
+    return re.sub(r'\s+', ' ', elem.text_content()).strip()
+
+def _first(elem, xpath):
+    found = elem.xpath(xpath)
+    return found[0] if found else None
+
+def _extract_short_name(row):
+    """提取软件简称：主要XPath查找 '软件简称' 后的 span.val，找不到时从 span.f 标签回退"""
+    val = _first(row, ".//span[contains(text(), '软件简称')]/following-sibling::span[contains(@class, 'val')]")
+    if val is None:
+        for label_span in row.xpath(".//span[@class='f']"):
+            if "软件简称" not in label_span.text_content():
+                continue
+            # 尝试1：作为直接的兄弟节点；尝试2：作为父级 div 的兄弟节点
+            val = _first(label_span, "./following-sibling::span[contains(@class, 'val')]")
+            if val is None:
+                parent_div = _first(label_span, "./parent::div")
+                if parent_div is not None:
+                    val = _first(parent_div, "./following-sibling::span[contains(@class, 'val')]")
+            if val is not None:
+                break
+    short_name = _text(val) if val is not None else ""
+    return short_name or "-"
+
+def _extract_owner(row):
+    """提取著作权人：定位 '著作权人' 标签 span.f，再取其对应 span.val 中链接的文本"""
+    candidates = row.xpath(
+        ".//span[@class='f' and starts-with(normalize-space(.), '著作权人')]"
+        " | .//span[starts-with(normalize-space(.), '著作权人')]//span[@class='f']"
+    )
+    if not candidates:
+        return ""
+    label_span = candidates[0]
+    for candidate in candidates:
+        if candidate.xpath("./ancestor::div[contains(@class, 'rline')]"
+                           " | ./ancestor::div[@class='f']/ancestor::div[contains(@class, 'rline')]"):
+            label_span = candidate
+            break
+
+    val = _first(label_span, "following-sibling::span[contains(@class, 'val')]")
+    if val is None:
+        wrapper_div = _first(label_span, "./parent::div[contains(@class,'f')]")
+        if wrapper_div is not None:
+            val = _first(wrapper_div, "following-sibling::span[contains(@class, 'val')]")
+    if val is None:
+        val = _first(row, ".//span[starts-with(normalize-space(.), '著作权人')]/following-sibling::span[contains(@class, 'val')]")
+    if val is None:
+        return ""
+    link = _first(val, ".//a")
+    return _text(link) if link is not None else ""
+
+def parse_copyright_results(table_html):
+    """解析结果表格的 outerHTML，返回 [(软件简称, 著作权人), ...]（跳过两者都未提取到的行）"""
+    table = lxml.html.fromstring(table_html)
+    results = []
+    for row in table.xpath(".//tr"):
+        short_name = _extract_short_name(row)
+        owner = _extract_owner(row)
+        if owner or short_name != "-":
+            results.append((short_name, owner))
+    return results
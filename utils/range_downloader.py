@@ -0,0 +1,326 @@
+# utils/range_downloader.py
+#
+# 分段并行下载（用于更新包等大文件）：
+# - 先用 Range: bytes=0-0 探测文件大小与是否支持分段，再把文件预分配为 <目标文件>.part，
+#   划分成若干字节区间由多个线程并行下载，各自写入自己的偏移位置
+# - 每个区间已写入的字节数定期保存到 <目标文件>.part.json（先写 .tmp 再替换），
+#   程序退出、取消或网络中断后再次下载同一文件时只补齐缺少的部分；服务器上的文件变化（ETag/大小不同）时重新下载
+# - 单个区间读取超时（网络卡住）或连接中断时从该区间已写入的位置重试，不影响其它区间
+# - 全部完成后计算 SHA-256 与发布信息中的值比对，一致才改名为目标文件；不一致时删除并报错
+# - 服务器不支持 Range 时退回单连接顺序下载（无法续传）
+# 所有请求都经过共享的 transport，可用 transport.use_mock 或本地 HTTP 服务离线测试。
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+import requests
+
+from utils.http_transport import transport
+
+# 并行区间数，以及每个区间的最小大小（文件较小时减少区间数）
+DOWNLOAD_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 128 * 1024
+# 请求超时（连接, 读取）：读取超过该时间没有数据视为卡住，从断点重新请求该区间
+DOWNLOAD_TIMEOUT = (5, 30)
+# 单个区间连续失败（期间没有任何进展）的最大重试次数
+SEGMENT_RETRIES = 5
+# 进度回调与进度文件保存的最小间隔（秒）
+PROGRESS_INTERVAL = 0.5
+STATE_SAVE_INTERVAL = 2.0
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+_SHA256_RE = re.compile(r"\b([0-9a-fA-F]{64})\b")
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+class DownloadCancelled(Exception):
+    """下载已被取消（已下载的部分保留，可续传）"""
+    pass
+
+class IntegrityError(Exception):
+    """下载完成但文件校验失败"""
+    pass
+
+def parse_sha256(text):
+    """从 "sha256:<hex>"、"<hex>  文件名" 等文本中提取 SHA-256（小写），没有则返回 None"""
+    if not text:
+        return None
+    match = _SHA256_RE.search(str(text))
+    return match.group(1).lower() if match else None
+
+def file_sha256(path, cancel_event=None, block_size=1024 * 1024):
+    """计算文件的 SHA-256；cancel_event 被设置时抛出 DownloadCancelled"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelled("用户取消下载")
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def verify_file(path, expected_size=None, expected_sha256=None):
+    """校验文件大小与 SHA-256（未提供的项不检查）"""
+    if not os.path.isfile(path):
+        return False
+    if expected_size and os.path.getsize(path) != expected_size:
+        return False
+    expected_sha256 = parse_sha256(expected_sha256)
+    if expected_sha256 and file_sha256(path) != expected_sha256:
+        return False
+    return True
+
+class RangeDownloader:
+    """分段并行下载器。run() 在调用线程中阻塞执行，cancel() 可在任意线程调用"""
+
+    def __init__(self, url, save_path, headers=None, sha256=None, segments=DOWNLOAD_SEGMENTS,
+                 progress_callback=None, status_callback=None):
+        self.url = url
+        self.save_path = save_path
+        self.part_path = save_path + PART_SUFFIX
+        self.state_path = save_path + STATE_SUFFIX
+        self.headers = dict(headers or {})
+        self.sha256 = parse_sha256(sha256)
+        self.segments = max(1, segments)
+        self.progress_callback = progress_callback  # (已下载字节, 总字节或 None)
+        self.status_callback = status_callback      # (提示信息)
+        self.total_size = None
+        self.resumed_bytes = 0
+        self._ranges = []  # [[起始, 结束(含), 已写入字节]]
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._stop_event = threading.Event()  # 取消或某个区间失败时通知其它区间停止
+        self._last_progress = 0
+        self._last_save = 0
+        self._state_args = None  # 分段下载期间为 (总大小, 版本标识)，用于定期保存进度
+
+    @property
+    def downloaded_bytes(self):
+        with self._lock:
+            return sum(done for _, _, done in self._ranges)
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._stop_event.set()
+
+    def run(self):
+        """下载并校验，成功返回目标文件路径；失败抛出异常（取消时为 DownloadCancelled）"""
+        if self.sha256 and os.path.isfile(self.save_path):
+            self._status("发现已下载的文件，正在校验...")
+            if file_sha256(self.save_path, self._cancel_event) == self.sha256:
+                self._status("已下载的文件校验通过，无需重新下载")
+                return self.save_path
+            self._status("已下载的文件校验失败，重新下载")
+
+        total, validator, accept_ranges = self._probe()
+        self.total_size = total
+        if accept_ranges and total:
+            self._download_ranges(total, validator)
+        else:
+            self._download_stream(total)
+        return self._finalize()
+
+    # ------------------------------------------------------------------
+    # 探测与进度文件
+    # ------------------------------------------------------------------
+    def _check_cancel(self):
+        if self._cancel_event.is_set():
+            raise DownloadCancelled("用户取消下载")
+
+    def _status(self, message):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def _request(self, headers):
+        return transport.get(self.url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers={**self.headers, **headers})
+
+    def _probe(self):
+        """返回 (文件大小或 None, 版本标识, 是否支持分段)"""
+        self._check_cancel()
+        with self._request({'Range': 'bytes=0-0'}) as response:
+            response.raise_for_status()
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            if response.status_code == 206:
+                match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                if match and match.group(3) != '*':
+                    return int(match.group(3)), validator, True
+            length = response.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else None), validator, False
+
+    def _load_state(self, total, validator):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get("url") == self.url and state.get("total") == total
+                    and state.get("validator") == validator
+                    and os.path.isfile(self.part_path) and os.path.getsize(self.part_path) == total):
+                ranges = [[int(start), int(end), int(done)] for start, end, done in state["ranges"]]
+                if ranges and all(0 <= done <= end - start + 1 for start, end, done in ranges):
+                    return ranges
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _save_state(self, total, validator):
+        try:
+            with self._lock:
+                ranges = [list(r) for r in self._ranges]
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"url": self.url, "total": total, "validator": validator, "ranges": ranges}, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"保存下载进度失败: {str(e)}")
+
+    def _remove_partial(self):
+        for path in (self.part_path, self.state_path, self.state_path + ".tmp"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _report(self, force=False):
+        """节流后的进度回调，同时定期保存进度文件"""
+        now = time.monotonic()
+        with self._lock:
+            report = force or now - self._last_progress >= PROGRESS_INTERVAL
+            if report:
+                self._last_progress = now
+            save = self._state_args is not None and now - self._last_save >= STATE_SAVE_INTERVAL
+            if save:
+                self._last_save = now
+            downloaded = sum(done for _, _, done in self._ranges)
+        if save:
+            self._save_state(*self._state_args)
+        if report and self.progress_callback:
+            self.progress_callback(downloaded, self.total_size)
+
+    # ------------------------------------------------------------------
+    # 分段下载
+    # ------------------------------------------------------------------
+    def _download_ranges(self, total, validator):
+        ranges = self._load_state(total, validator)
+        if ranges is None:
+            count = max(1, min(self.segments, total // MIN_SEGMENT_SIZE))
+            size = -(-total // count)
+            ranges = [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+            with open(self.part_path, 'wb') as f:
+                f.truncate(total)  # 预分配，各区间按偏移直接写入
+        with self._lock:
+            self._ranges = ranges
+        self.resumed_bytes = self.downloaded_bytes
+        if self.resumed_bytes:
+            self._status(f"从上次中断处继续下载（已完成 {self.resumed_bytes * 100 // total}%）")
+        self._state_args = (total, validator)
+        self._save_state(total, validator)
+
+        pending = [r for r in ranges if r[2] < r[1] - r[0] + 1]
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="range_download") as executor:
+                    futures = [executor.submit(self._fetch_range, r) for r in pending]
+                    done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                    if any(f.exception() for f in done):
+                        self._stop_event.set()  # 让其余区间尽快停止，进度随后保存
+                    wait(futures)
+                    for future in futures:
+                        error = future.exception()
+                        if error is not None and not isinstance(error, DownloadCancelled):
+                            raise error
+        finally:
+            self._state_args = None
+            self._save_state(total, validator)
+        self._check_cancel()
+        self._report(force=True)
+
+    def _fetch_range(self, rng):
+        start, end, _ = rng
+        failures = 0
+        with open(self.part_path, 'r+b', buffering=0) as f:
+            while True:
+                if self._stop_event.is_set():
+                    raise DownloadCancelled("下载已停止")
+                offset = start + rng[2]
+                if offset > end:
+                    return
+                progressed = False
+                try:
+                    with self._request({'Range': f'bytes={offset}-{end}'}) as response:
+                        response.raise_for_status()
+                        match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                        if response.status_code != 206 or not match or int(match.group(1)) != offset:
+                            raise IOError(f"服务器未按请求返回分段数据（状态码 {response.status_code}）")
+                        f.seek(offset)
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if self._stop_event.is_set():
+                                raise DownloadCancelled("下载已停止")
+                            if not chunk:
+                                continue
+                            chunk = chunk[:end + 1 - (start + rng[2])]
+                            f.write(chunk)
+                            with self._lock:
+                                rng[2] += len(chunk)
+                            progressed = True
+                            self._report()
+                    if start + rng[2] <= end:
+                        raise IOError("连接提前结束")
+                except (requests.exceptions.RequestException, IOError) as e:
+                    failures = 0 if progressed else failures + 1
+                    if failures >= SEGMENT_RETRIES:
+                        raise IOError(f"区间 {start}-{end} 下载失败: {str(e)}")
+                    # 卡住或断开后退避重试，从已写入的位置继续
+                    if self._stop_event.wait(min(2 ** failures, 30)):
+                        raise DownloadCancelled("下载已停止")
+
+    # ------------------------------------------------------------------
+    # 不支持分段时的单连接下载
+    # ------------------------------------------------------------------
+    def _download_stream(self, total):
+        self._status("服务器不支持分段下载，使用单连接下载（无法续传）")
+        rng = [0, (total or 0) - 1, 0]
+        with self._lock:
+            self._ranges = [rng]
+        try:
+            with self._request({}) as response, open(self.part_path, 'wb') as f:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    self._check_cancel()
+                    if chunk:
+                        f.write(chunk)
+                        with self._lock:
+                            rng[2] += len(chunk)
+                        self._report()
+        except DownloadCancelled:
+            self._remove_partial()
+            raise
+        if total and rng[2] != total:
+            self._remove_partial()
+            raise IOError("文件下载不完整")
+        self._report(force=True)
+
+    # ------------------------------------------------------------------
+    # 校验并完成
+    # ------------------------------------------------------------------
+    def _finalize(self):
+        if self.total_size and os.path.getsize(self.part_path) != self.total_size:
+            self._remove_partial()
+            raise IOError("文件大小与服务器不一致")
+        if self.sha256:
+            self._status("下载完成，正在校验 SHA-256...")
+            actual = file_sha256(self.part_path, self._cancel_event)
+            if actual != self.sha256:
+                self._remove_partial()
+                raise IntegrityError(f"SHA-256 校验失败（期望 {self.sha256}，实际 {actual}），文件已删除")
+            self._status("SHA-256 校验通过")
+        os.replace(self.part_path, self.save_path)
+        self._remove_partial()
+        return self.save_path
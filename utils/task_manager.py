@@ -1,7 +1,110 @@
+import os
 import sys
+import json
+import time
 import threading
 import atexit
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from utils.helpers import get_app_data_dir
+from utils.profile_pool import get_process_identity, is_owner_alive
+
+# 清理驱动进程时，先向所有目标进程发送终止信号，再统一等待的时间（秒），仍未退出的强制结束
+REAP_TIMEOUT = 0.5
+# 本程序启动的驱动进程记录（同时记录所属程序实例；程序异常退出后，下次启动时只清理占用者已退出的进程）
+DRIVER_PID_FILE = 'driver_pids.json'
+DRIVER_PROCESS_KEYWORDS = ('msedgedriver', 'edgewebdriver')
+
+def get_driver_pid_file():
+    return os.path.join(get_app_data_dir('.crawler_cache'), DRIVER_PID_FILE)
+
+def load_driver_pid_entries():
+    try:
+        with open(get_driver_pid_file(), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, list) else []
+    except Exception:
+        return []
+
+def save_driver_pid_entries(entries):
+    """写入驱动进程记录，没有记录时删除文件"""
+    path = get_driver_pid_file()
+    try:
+        if entries:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+        elif os.path.exists(path):
+            os.remove(path)
+    except Exception as e:
+        print(f"保存驱动进程记录失败: {str(e)}")
+
+def get_service_process_tree(service):
+    """返回驱动服务进程及其全部子进程（浏览器主进程、渲染进程等）"""
+    if psutil is None:
+        return []
+    try:
+        root = psutil.Process(service.process.pid)
+        return [root] + root.children(recursive=True)
+    except Exception:
+        return []
+
+def get_driver_process_tree(driver):
+    """返回 driver 的驱动服务进程及其全部子进程（浏览器主进程、渲染进程等）"""
+    return get_service_process_tree(getattr(driver, 'service', None))
+
+def get_own_driver_processes():
+    """本进程启动的驱动进程（只沿本进程的进程树查找，不涉及其他程序或其他用户的浏览器）"""
+    if psutil is None:
+        return []
+    try:
+        children = psutil.Process().children(recursive=True)
+    except Exception:
+        return []
+    result = []
+    for proc in children:
+        try:
+            if any(keyword in proc.name().lower() for keyword in DRIVER_PROCESS_KEYWORDS):
+                result.append(proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return result
+
+def reap_process_trees(procs, timeout=REAP_TIMEOUT):
+    """并行终止给定进程及其当前的全部子进程：统一发送终止信号后只等待一次，返回终止的进程数。
+    psutil.Process 记录了进程创建时间，PID 被系统复用后不会误杀其他进程"""
+    if psutil is None or not procs:
+        return 0
+    targets = {}
+    for proc in procs:
+        try:
+            if not proc.is_running():
+                continue
+            targets.setdefault(proc.pid, proc)
+            for child in proc.children(recursive=True):
+                targets.setdefault(child.pid, child)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    signalled = []
+    for proc in targets.values():
+        try:
+            proc.terminate()
+            signalled.append(proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    if not signalled:
+        return 0
+    _, alive = psutil.wait_procs(signalled, timeout=timeout)
+    for proc in alive:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return len(signalled)
+
 # 任务管理器类定义
 class TaskManager:
     """管理爬虫和版号匹配任务，确保在应用关闭时能够正确终止所有任务"""
@@ -9,8 +112,11 @@ class TaskManager:
     def __init__(self):
         self.thread_pools = []  # 存储所有活动的线程池
         self.webdrivers = []    # 存储所有活动的WebDriver实例
+        self.process_trees = {}  # id(WebDriver) -> 该实例的驱动服务及浏览器进程（psutil.Process 列表）
+        self.cancel_tokens = []  # 正在运行的任务的取消令牌（CancellationToken）
         self.tasks_running = False
         self.lock = threading.Lock()  # 用于同步访问共享资源
+        self.owner = get_process_identity()  # 本程序实例（PID 与创建时间），写入驱动进程记录
         
         # 注册应用退出时的清理函数
         atexit.register(self.cleanup_all_resources)
@@ -29,16 +135,91 @@ class TaskManager:
             if not self.thread_pools:
                 self.tasks_running = False
     
+    def register_cancel_token(self, token):
+        """注册任务的取消令牌，退出时先取消任务，使其停止等待和重试"""
+        with self.lock:
+            self.cancel_tokens.append(token)
+
+    def unregister_cancel_token(self, token):
+        """取消注册取消令牌"""
+        with self.lock:
+            if token in self.cancel_tokens:
+                self.cancel_tokens.remove(token)
+
+    def cancel_all_tasks(self):
+        """取消所有已注册令牌的任务，返回取消的任务数"""
+        with self.lock:
+            tokens = self.cancel_tokens[:]
+        for token in tokens:
+            try:
+                token.cancel()
+            except Exception as e:
+                print(f"取消任务时出错: {str(e)}")
+        return len(tokens)
+
     def register_webdriver(self, driver):
-        """注册WebDriver实例以便在退出时关闭"""
+        """注册WebDriver实例以便在退出时关闭，同时记录其驱动服务和浏览器进程"""
+        if driver is None:
+            return
+        tree = get_driver_process_tree(driver)
         with self.lock:
             self.webdrivers.append(driver)
+            if tree:
+                self.process_trees[id(driver)] = tree
+                self._save_pid_file()
     
     def unregister_webdriver(self, driver):
         """取消注册WebDriver实例"""
         with self.lock:
             if driver in self.webdrivers:
                 self.webdrivers.remove(driver)
+            if self.process_trees.pop(id(driver), None) is not None:
+                self._save_pid_file()
+
+    def _save_pid_file(self):
+        """把本实例当前记录的进程（PID 与创建时间）连同占用者写入文件，保留其他实例的记录；需在持有 self.lock 时调用"""
+        entries = [entry for entry in load_driver_pid_entries() if entry.get("owner") != self.owner]
+        for tree in self.process_trees.values():
+            for proc in tree:
+                try:
+                    entries.append({"pid": proc.pid, "create_time": proc.create_time(), "owner": self.owner})
+                except Exception:
+                    pass
+        save_driver_pid_entries(entries)
+
+    def kill_driver_processes(self, drivers=(), services=()):
+        """只终止给定 WebDriver / 驱动服务的进程树（含注册时记录的进程），
+        不影响其他任务和待命浏览器正在使用的驱动，返回终止的进程数"""
+        drivers = [driver for driver in drivers if driver is not None]
+        procs = [proc for service in services if service is not None
+                 for proc in get_service_process_tree(service)]
+        with self.lock:
+            for driver in drivers:
+                procs += self.process_trees.get(id(driver), [])
+        for driver in drivers:
+            procs += get_driver_process_tree(driver)
+        return reap_process_trees(procs)
+
+    def reap_leftover_processes(self):
+        """启动时调用：终止异常退出的程序实例遗留的驱动/浏览器进程。
+        只处理占用者已不在运行、且 PID 与创建时间都吻合的记录；仍在运行的其他实例的记录原样保留"""
+        if psutil is None:
+            return 0
+        with self.lock:
+            procs = []
+            kept = []
+            for entry in load_driver_pid_entries():
+                if is_owner_alive(entry.get("owner")):
+                    kept.append(entry)
+                    continue
+                try:
+                    proc = psutil.Process(entry["pid"])
+                    if abs(proc.create_time() - entry["create_time"]) < 0.5:
+                        procs.append(proc)
+                except Exception:
+                    pass
+            save_driver_pid_entries(kept)
+        return reap_process_trees(procs)
     
     def cleanup_all_resources(self):
         """清理所有资源，包括线程池和WebDriver实例"""
@@ -47,6 +228,12 @@ class TaskManager:
         active_pools = []
         active_drivers = []
 
+        # --- Cancel Running Tasks First ---
+        # 任务中的等待/重试会在取消后立即结束，不再继续占用线程池和浏览器
+        count = self.cancel_all_tasks()
+        if count:
+            print(f"已取消 {count} 个正在运行的任务。")
+
         # --- Shutdown Thread Pools First ---
         with self.lock:
             # Make copies to avoid modification issues during iteration
@@ -69,69 +256,38 @@ class TaskManager:
              # Make copies
             active_drivers = self.webdrivers[:]
             self.webdrivers.clear() # Clear original list
+            trees = dict(self.process_trees)
+            self.process_trees.clear()
 
-        print(f"尝试关闭 {len(active_drivers)} 个WebDriver实例...")
-        for driver in active_drivers:
-            print(f"  正在关闭 WebDriver: {driver}")
-            try:
-                driver.quit()
-                print(f"  WebDriver 关闭成功: {driver}")
-            except Exception as e:
-                # Log error but continue cleanup
-                print(f"  关闭WebDriver时出错: {driver}, 错误: {str(e)}") 
-        print("所有活动的WebDriver实例已尝试关闭。")
-
+        # 已记录进程树的实例直接终止其进程树；没有记录的实例并行调用 quit()
+        untracked = [driver for driver in active_drivers if id(driver) not in trees]
+        print(f"尝试关闭 {len(active_drivers)} 个WebDriver实例（其中 {len(untracked)} 个需调用 quit）...")
+        quit_threads = []
+        for driver in untracked:
+            thread = threading.Thread(target=self._quit_driver, args=(driver,), daemon=True)
+            thread.start()
+            quit_threads.append(thread)
+        deadline = time.monotonic() + REAP_TIMEOUT * 4
+        for thread in quit_threads:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
 
-        # --- Kill Lingering Driver Processes ---
-        print("开始清理 msedgedriver 进程...")
-        # 不再尝试从 main 导入，直接使用 psutil 清理
-        try:
-            import psutil
-            terminated_count = 0
-            failed_count = 0
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    p_name = proc.info.get('name') # 使用 get 避免 KeyError
-                    p_pid = proc.info.get('pid')
-                    if p_name and p_name.lower() == 'msedgedriver.exe':
-                        print(f"  找到 msedgedriver 进程 (PID: {p_pid}), 尝试终止...")
-                        try:
-                            # 先尝试温和终止
-                            proc.terminate()
-                            # 等待最多2秒
-                            gone, alive = psutil.wait_procs([proc], timeout=2)
-                            if proc in alive:
-                                print(f"    进程 (PID: {p_pid}) 未在2秒内终止，强制终止...")
-                                proc.kill()
-                            print(f"    进程 (PID: {p_pid}) 已终止。")
-                            terminated_count += 1
-                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                            # 进程可能已经消失或无权限访问
-                            print(f"    终止进程 (PID: {p_pid}) 时出错或进程已消失。")
-                            failed_count += 1
-                        except Exception as term_err:
-                             print(f"    终止进程 (PID: {p_pid}) 时出现意外错误: {term_err}")
-                             failed_count += 1
-
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass # Process already gone or inaccessible during iteration
-                except Exception as proc_err:
-                     print(f"    处理进程信息时出错 (PID: {proc.info.get('pid', 'N/A')}): {proc_err}")
-                     failed_count += 1 # 计入失败
-
-            if terminated_count > 0 or failed_count > 0:
-                 print(f"驱动进程清理：已终止 {terminated_count} 个，失败 {failed_count} 个。")
-            else:
-                 print("驱动进程清理：未找到活动的 msedgedriver 进程。")
-
-        except ImportError:
-            print("错误：无法导入 psutil 库，无法执行 msedgedriver 进程清理。请确保已安装 psutil。")
-        except Exception as e:
-            print(f"执行 msedgedriver 进程清理时出错: {str(e)}")
+        # --- Kill Driver Process Trees ---
+        procs = [proc for tree in trees.values() for proc in tree]
+        count = reap_process_trees(procs + get_own_driver_processes())
+        print(f"驱动进程清理：已终止 {count} 个进程。")
+        with self.lock:
+            self._save_pid_file()  # 只移除本实例的记录
         
         with self.lock:        
             self.tasks_running = False # Mark tasks as no longer running
         print("所有爬虫任务资源清理过程结束。")
 
+    @staticmethod
+    def _quit_driver(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"  关闭WebDriver时出错: {driver}, 错误: {str(e)}")
+
 # 创建全局任务管理器实例
 task_manager = TaskManager() 
\ No newline at end of file
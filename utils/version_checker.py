@@ -1,7 +1,9 @@
 # utils/version_checker.py
 
 import requests
+from utils.http_transport import transport
 from utils.version import __version__
+from utils.range_downloader import RangeDownloader, DownloadCancelled, IntegrityError, parse_sha256
 from PySide6.QtCore import QObject, Signal
 import os
 import threading
@@ -15,6 +17,11 @@ GITHUB_API_URL = "https://api.github.com/repos/{owner}/{repo}/releases/latest"
 OWNER = "FredericMN"  # 替换为你的 GitHub 用户名
 REPO = "Game_ComplianceToolbox"  # 替换为你的仓库名称
 
+# 发布中的更新包文件名（标准版、CUDA版）
+CPU_ASSET_NAME = "ComplianceToolbox_standard.zip"
+GPU_ASSET_NAME = "ComplianceToolbox_cuda.7z"
+DOWNLOAD_ASSET_NAMES = (CPU_ASSET_NAME, GPU_ASSET_NAME)
+
 # 获取软件根目录（支持打包后的环境）
 def get_app_root():
     # 如果是PyInstaller打包的环境
@@ -141,7 +148,7 @@ class VersionChecker:
         # 诊断网络连接
         try:
             print("诊断: 测试网络连接...")
-            test_response = requests.get("https://api.github.com", timeout=(3, 10))
+            test_response = transport.get("https://api.github.com", timeout=(3, 10), retry=False)
             print(f"诊断: GitHub API 可访问性: {test_response.status_code}")
         except Exception as e:
             print(f"诊断: 无法连接到GitHub: {str(e)}")
@@ -166,9 +173,9 @@ class VersionChecker:
                     print("诊断: 未提供令牌，使用匿名访问 (速率限制较低)")
                 
                 print(f"诊断: 请求 (第{attempt+1}次尝试)")
-                response = requests.get(url, timeout=(5, 30),
-                                      headers=headers,
-                                      params={'per_page': 1})
+                response = transport.get(url, timeout=(5, 30),
+                                       headers=headers,
+                                       params={'per_page': 1})
                 
                 print(f"诊断: 响应状态码: {response.status_code}")
                 
@@ -224,6 +231,7 @@ class VersionChecker:
                 
                 self.latest_version = data['tag_name'].lstrip('v')
                 self.assets = data['assets']
+                self.resolve_asset_checksums(headers)
                 self.release_notes = data['body'][:2000]  # 限制长度防止内存溢出
                 
                 print(f"诊断: 成功获取版本信息: {self.latest_version}")
@@ -282,14 +290,38 @@ class VersionChecker:
                 return -1
         return 0
 
+    def resolve_asset_checksums(self, headers=None):
+        """为缺少 digest 字段的更新包补充 SHA-256：读取同一发布中的 <文件名>.sha256 校验文件"""
+        by_name = {asset.get('name'): asset for asset in self.assets}
+        for name in DOWNLOAD_ASSET_NAMES:
+            asset = by_name.get(name)
+            checksum_asset = by_name.get(name + ".sha256")
+            if not asset or parse_sha256(asset.get('digest')) or not checksum_asset:
+                continue
+            try:
+                response = transport.get(checksum_asset['browser_download_url'], timeout=(5, 30),
+                                         headers={k: v for k, v in (headers or {}).items() if k == 'Authorization'})
+                sha256 = parse_sha256(response.text) if response.status_code == 200 else None
+                if sha256:
+                    asset['digest'] = f"sha256:{sha256}"
+            except requests.exceptions.RequestException as e:
+                print(f"获取 {name} 的校验文件失败: {str(e)}")
+
+    def get_asset_sha256(self, download_url):
+        """返回下载链接对应更新包的 SHA-256（来自发布信息），未提供时返回 None"""
+        for asset in self.assets:
+            if asset.get('browser_download_url') == download_url:
+                return parse_sha256(asset.get('digest'))
+        return None
+
     def get_download_urls(self):
         """获取标准版和CUDA版的下载链接"""
         cpu_url = None
         gpu_url = None
         for asset in self.assets:
-            if asset['name'] == "ComplianceToolbox_standard.zip":
+            if asset['name'] == CPU_ASSET_NAME:
                 cpu_url = asset['browser_download_url']
-            elif asset['name'] == "ComplianceToolbox_cuda.7z":
+            elif asset['name'] == GPU_ASSET_NAME:
                 gpu_url = asset['browser_download_url']
         return cpu_url, gpu_url
 
@@ -382,106 +414,59 @@ class VersionCheckWorker(QObject):
         return result
 
 class DownloadWorker(QObject):
+    """更新包下载：分段并行下载、支持断点续传，并按发布信息中的 SHA-256 校验"""
     progress = Signal(int, str)
     finished = Signal(bool, str)
     
-    def __init__(self, download_url, parent=None):
+    def __init__(self, download_url, parent=None, sha256=None):
         super().__init__(parent)
         self.download_url = download_url
-        self._cancel_flag = False
-        self.downloaded_bytes = 0  # 添加已下载字节计数
+        self.sha256 = sha256
         self.config = load_config()  # 加载配置获取令牌
         
+        # 构建请求头
+        headers = {'Cache-Control': 'no-cache'}
+        # 如果是GitHub URL且有令牌，添加认证
+        is_github_url = "github.com" in download_url or "githubusercontent.com" in download_url
+        if is_github_url and self.config.get("github_token"):
+            headers['Authorization'] = f'token {self.config.get("github_token", "")}'
+        
+        self.save_path = os.path.join(os.getcwd(), os.path.basename(download_url))
+        self.downloader = RangeDownloader(download_url, self.save_path, headers=headers, sha256=sha256,
+                                          progress_callback=self._on_progress,
+                                          status_callback=lambda message: self.progress.emit(self._percent(), message))
+        
+    @property
+    def downloaded_bytes(self):
+        return self.downloader.downloaded_bytes
+        
     def cancel(self):
-        self._cancel_flag = True
+        self.downloader.cancel()
+        
+    def _percent(self, downloaded=None, total=None):
+        total = total if total is not None else self.downloader.total_size
+        if not total:
+            return 0
+        downloaded = downloaded if downloaded is not None else self.downloaded_bytes
+        return min(99, int(downloaded * 100 / total))
+        
+    def _on_progress(self, downloaded, total):
+        # 周期性进度只更新进度条，不输出文字
+        self.progress.emit(self._percent(downloaded, total), "")
         
     def run(self):
         try:
-            for attempt in range(3):
-                if self._cancel_flag:
-                    break
-                
-                try:
-                    # 检查是否为GitHub URL
-                    is_github_url = "github.com" in self.download_url or "githubusercontent.com" in self.download_url
-                    
-                    # 构建请求头
-                    headers = {'Cache-Control': 'no-cache'}
-                    # 如果是GitHub URL且有令牌，添加认证
-                    if is_github_url and self.config.get("github_token"):
-                        headers['Authorization'] = f'token {self.config.get("github_token", "")}'
-                    
-                    # 添加断点续传支持
-                    filename = os.path.basename(self.download_url)
-                    save_path = os.path.join(os.getcwd(), filename)
-                    if os.path.exists(save_path):
-                        file_size = os.path.getsize(save_path)
-                        if file_size > 0:
-                            headers['Range'] = f'bytes={file_size}-'
-                            self.downloaded_bytes = file_size
-                    
-                    response = requests.get(
-                        self.download_url, 
-                        stream=True,
-                        timeout=(3.05, 60),  # 增加下载超时时间
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    
-                    # 检查是否支持断点续传
-                    is_resume = response.status_code == 206
-                    
-                    total_length = int(response.headers.get('content-length', 0))
-                    if is_resume:
-                        total_length += self.downloaded_bytes
-                    else:
-                        # 如果服务器不支持断点续传，从头开始下载
-                        self.downloaded_bytes = 0
-                        save_path = os.path.join(os.getcwd(), filename)
-                    
-                    mode = 'ab' if is_resume else 'wb'
-                    chunk_size = 8192 * 16  # 增加块大小以提高下载速度
-                    
-                    with open(save_path, mode) as f:
-                        for chunk in response.iter_content(chunk_size=chunk_size):
-                            if self._cancel_flag:
-                                raise Exception("用户取消下载")
-                                
-                            if chunk:
-                                f.write(chunk)
-                                if not is_resume:
-                                    self.downloaded_bytes += len(chunk)
-                                else:
-                                    self.downloaded_bytes = file_size + len(chunk)
-                                
-                                if total_length > 0:
-                                    percent = min(99, int(self.downloaded_bytes * 100 / total_length))
-                                else:
-                                    percent = 0
-                                    
-                                self.progress.emit(
-                                    percent,
-                                    f"下载中... {self.downloaded_bytes//1024//1024:.1f}MB"
-                                    f"{f'/{total_length//1024//1024:.1f}MB' if total_length else ''}"
-                                )
-                                
-                    if total_length > 0 and self.downloaded_bytes != total_length:
-                        raise Exception("文件下载不完整")
-                        
-                    self.finished.emit(True, save_path)
-                    return
-                    
-                except requests.exceptions.RequestException as e:
-                    if attempt == 2:  # 最后一次尝试失败
-                        raise
-                    time.sleep(2 ** attempt)  # 指数退避
-                    
+            self.downloader.run()
+            if not self.sha256:
+                self.progress.emit(100, "发布信息中没有提供 SHA-256，仅校验了文件大小")
+            self.progress.emit(100, "")
+            self.finished.emit(True, self.save_path)
+        except DownloadCancelled:
+            self.progress.emit(0, "下载已取消，已下载的部分已保留，再次下载时将从中断处继续")
+            self.finished.emit(False, None)
+        except IntegrityError as e:
+            self.progress.emit(0, f"下载失败：{str(e)}")
+            self.finished.emit(False, None)
         except Exception as e:
-            error_msg = f"下载失败：{str(e)}"
-            try:
-                if 'save_path' in locals():
-                    os.remove(save_path)
-            except:
-                pass
-            self.progress.emit(0, error_msg)
+            self.progress.emit(0, f"下载失败：{str(e)}（已下载的部分已保留，可重新下载继续）")
             self.finished.emit(False, None)
@@ -0,0 +1,124 @@
+# utils/version_number_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from utils.helpers import get_app_data_dir, normalize_game_name
+
+# 查询到版号信息的结果保留7天
+POSITIVE_TTL = 7 * 24 * 3600
+# 未查询到版号的结果只保留1天，避免新过审的游戏长期查不到
+NEGATIVE_TTL = 24 * 3600
+
+class VersionNumberCache:
+    """版号查询结果的本地持久化缓存（SQLite），跨多次运行复用"""
+
+    def __init__(self, db_path=None, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.db_path = db_path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self):
+        """延迟打开数据库连接，首次使用时建表"""
+        if self._conn is None:
+            if not self.db_path:
+                self.db_path = os.path.join(get_app_data_dir('.crawler_cache'), 'version_numbers.db')
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS version_numbers ("
+                "name_key TEXT PRIMARY KEY, "
+                "raw_name TEXT, "
+                "info TEXT, "
+                "found INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(game_name):
+        """缓存键：完整名称归一化（保留括号内容）。
+        同一查询关键字下不同括号后缀的游戏（如"X"与"X（测试服）"）精确匹配到的结果行不同，不能共用缓存"""
+        return normalize_game_name(game_name)
+
+    def get(self, game_name):
+        """查询缓存，返回 (是否命中, info)。未查到版号的命中返回 (True, None)，过期或未缓存返回 (False, None)"""
+        key = self.make_key(game_name)
+        if not key:
+            return False, None
+        try:
+            with self._lock:
+                row = self._get_conn().execute(
+                    "SELECT info, found, updated_at FROM version_numbers WHERE name_key = ?",
+                    (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"读取版号缓存失败: {str(e)}")
+            return False, None
+
+        if not row:
+            return False, None
+        info_text, found, updated_at = row
+        ttl = self.positive_ttl if found else self.negative_ttl
+        if time.time() - updated_at > ttl:
+            return False, None
+        if not found:
+            return True, None
+        try:
+            return True, json.loads(info_text)
+        except Exception:
+            return False, None
+
+    def put(self, game_name, info):
+        """写入查询结果，info 为 None 表示确认未查询到版号"""
+        key = self.make_key(game_name)
+        if not key:
+            return
+        found = 1 if info else 0
+        info_text = json.dumps(info, ensure_ascii=False) if info else None
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO version_numbers "
+                    "(name_key, raw_name, info, found, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, str(game_name), info_text, found, time.time())
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"写入版号缓存失败: {str(e)}")
+
+    def purge_expired(self):
+        """删除已过期的缓存记录，返回删除条数"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                cur = conn.execute(
+                    "DELETE FROM version_numbers WHERE "
+                    "(found = 1 AND updated_at < ?) OR (found = 0 AND updated_at < ?)",
+                    (now - self.positive_ttl, now - self.negative_ttl)
+                )
+                conn.commit()
+                return cur.rowcount
+        except Exception as e:
+            print(f"清理版号缓存失败: {str(e)}")
+            return 0
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+# 全局单例实例
+version_number_cache = VersionNumberCache()
@@ -2,11 +2,20 @@
 
 import os
 import re
+import itertools
 import pandas as pd
-from typing import List, Set, Dict
+import openpyxl
+from typing import List, Set, Dict, Iterable, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from PySide6.QtCore import QObject, Signal
 from datetime import datetime
 
+# 选择词汇列时只统计每个工作表前若干行（标题行之后）的不重复值数量
+COLUMN_SAMPLE_ROWS = 1000
+# 两个文件合计超过该大小时在两个子进程中并行解析（解析 xlsx 是纯Python计算，线程无法并行）；
+# 小文件用线程读取，避免启动子进程的开销
+PARALLEL_PROCESS_MIN_BYTES = 20 * 1024 * 1024
+
 def detect_delimiters(sample_text: str) -> List[str]:
     """
     从样本文本中检测分隔符。
@@ -81,32 +90,58 @@ def read_word_file(file_path: str) -> List[str]:
     words = [word.strip() for word in words if word.strip()]
     return words
 
+def pick_vocab_column(sample_rows: Iterable) -> Optional[int]:
+    """根据样本行选择不重复值最多的列（并列时取靠前的列），没有任何值时返回 None"""
+    distinct: Dict[int, Set[str]] = {}
+    for row in sample_rows:
+        for idx, value in enumerate(row):
+            if value is not None:
+                distinct.setdefault(idx, set()).add(str(value))
+    best_column, max_unique = None, 0
+    for idx in sorted(distinct):
+        if len(distinct[idx]) > max_unique:
+            max_unique = len(distinct[idx])
+            best_column = idx
+    return best_column
+
+def iter_xlsx_words(file_path: str) -> Iterator[str]:
+    """以只读模式逐行读取 xlsx：每个工作表用前 COLUMN_SAMPLE_ROWS 行选定词汇列，再流式输出该列的词汇。
+    首行视为标题，不计入词汇"""
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            ws.reset_dimensions()  # 部分软件导出的文件尺寸信息不准确，按实际内容读取
+            rows = ws.iter_rows(values_only=True)
+            next(rows, None)  # 跳过标题行
+            sample = list(itertools.islice(rows, COLUMN_SAMPLE_ROWS))
+            column = pick_vocab_column(sample)
+            if column is None:
+                continue
+            for row in itertools.chain(sample, rows):
+                if column < len(row) and row[column] is not None:
+                    word = str(row[column]).strip()
+                    if word:
+                        yield word
+    finally:
+        wb.close()
+
 def read_excel_file(file_path: str) -> List[str]:
-    """读取Excel文件并提取词汇列表"""
-    words = []
+    """读取Excel文件并提取词汇列表（xlsx 流式读取；xls 使用 pandas + xlrd）"""
     try:
-        if file_path.lower().endswith('.xls'):
-            df_sheets = pd.read_excel(file_path, sheet_name=None, dtype=str, engine='xlrd')  # 指定引擎
-        else:
-            df_sheets = pd.read_excel(file_path, sheet_name=None, dtype=str, engine='openpyxl')  # 指定引擎
+        if not file_path.lower().endswith('.xls'):
+            return list(iter_xlsx_words(file_path))
+        df_sheets = pd.read_excel(file_path, sheet_name=None, dtype=str, engine='xlrd')  # 指定引擎
     except ImportError:
         raise ImportError("缺少必要的依赖库。请确保已安装 'xlrd' 和 'openpyxl'。")
     except Exception as e:
         raise ValueError(f"读取Excel文件时出错：{e}")
 
+    words = []
     for sheet_name, df in df_sheets.items():
-        max_unique = 0
-        vocab_column = None
-        for column in df.columns:
-            unique_values = df[column].dropna().unique()
-            num_unique = len(unique_values)
-            if num_unique > max_unique:
-                max_unique = num_unique
-                vocab_column = column
-
-        if vocab_column:
-            column_words = df[vocab_column].dropna().astype(str).tolist()
-            words.extend(column_words)
+        sample = df.head(COLUMN_SAMPLE_ROWS).itertuples(index=False, name=None)
+        column = pick_vocab_column(tuple(None if pd.isna(v) else v for v in row) for row in sample)
+        if column is not None:
+            words.extend(df.iloc[:, column].dropna().astype(str).tolist())
 
     # 去除空字符串和标题（假设标题不在词汇中）
     words = [word.strip() for word in words if word.strip()]
@@ -125,10 +160,25 @@ def extract_words(file_path: str) -> List[str]:
     else:
         raise ValueError(f"不支持的文件格式: {ext}")
 
+def extract_word_set(file_path: str) -> Set[str]:
+    """提取词汇并去重（xlsx 边读边去重，不保留完整的词汇列表）"""
+    if file_path.lower().endswith('.xlsx'):
+        return set(iter_xlsx_words(file_path))
+    return set(extract_words(file_path))
+
+def extract_word_sets(files: List[str]) -> List[Set[str]]:
+    """同时读取多个词表，按输入顺序返回各自的词汇集合"""
+    total_size = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+    if total_size >= PARALLEL_PROCESS_MIN_BYTES:
+        pool = ProcessPoolExecutor(max_workers=max(1, min(len(files), os.cpu_count() or 1)))
+    else:
+        pool = ThreadPoolExecutor(max_workers=min(len(files), 8), thread_name_prefix="vocab")
+    with pool:
+        return list(pool.map(extract_word_set, files))
+
 def compare_vocabularies(a_file: str, b_file: str) -> Dict[str, Set[str]]:
-    """比较两个词表，返回对照结果"""
-    a_words = set(extract_words(a_file))
-    b_words = set(extract_words(b_file))
+    """比较两个词表，返回对照结果（A、B 两个文件同时读取）"""
+    a_words, b_words = extract_word_sets([a_file, b_file])
 
     merged_words = a_words.union(b_words)
     a_missing_in_b = b_words - a_words
@@ -142,32 +192,109 @@ def compare_vocabularies(a_file: str, b_file: str) -> Dict[str, Set[str]]:
         'b_missing_in_a': b_missing_in_a
     }
 
+def write_word_sheet(wb, sheet_name: str, header: str, words: Iterable[str], empty_message: str):
+    """向只写模式的工作簿追加一个单列工作表；words 为空时写入提示信息"""
+    ws = wb.create_sheet(title=sheet_name)
+    words = sorted(words)
+    if words:
+        ws.append([header])
+        for word in words:
+            ws.append([word])
+    else:
+        ws.append(['信息'])
+        ws.append([empty_message])
+
 def write_to_excel(results: Dict[str, Set[str]], output_path: str):
-    """将对照结果写入Excel文件"""
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        # Sheet1: 合并词表
-        if results['merged_words']:
-            df_merged = pd.DataFrame(sorted(results['merged_words']), columns=['合并词表'])
-            df_merged.to_excel(writer, sheet_name='合并词表', index=False)
-        else:
-            df_empty = pd.DataFrame({'信息': ['合并词表为空。']})
-            df_empty.to_excel(writer, sheet_name='合并词表', index=False)
-
-        # Sheet2: A缺失的B
-        if results['a_missing_in_b']:
-            df_a_missing = pd.DataFrame(sorted(results['a_missing_in_b']), columns=['A词表缺失的B词汇'])
-            df_a_missing.to_excel(writer, sheet_name='A缺失的B', index=False)
-        else:
-            df_empty = pd.DataFrame({'信息': ['A词表未缺失B词表中的词汇。']})
-            df_empty.to_excel(writer, sheet_name='A缺失的B', index=False)
-
-        # Sheet3: B缺失的A
-        if results['b_missing_in_a']:
-            df_b_missing = pd.DataFrame(sorted(results['b_missing_in_a']), columns=['B词表缺失的A词汇'])
-            df_b_missing.to_excel(writer, sheet_name='B缺失的A', index=False)
-        else:
-            df_empty = pd.DataFrame({'信息': ['B词表未缺失A词表中的词汇。']})
-            df_empty.to_excel(writer, sheet_name='B缺失的A', index=False)
+    """将对照结果写入Excel文件（只写模式逐行写出，百万行词表也不会占用大量内存）"""
+    wb = openpyxl.Workbook(write_only=True)
+    # Sheet1: 合并词表
+    write_word_sheet(wb, '合并词表', '合并词表', results['merged_words'], '合并词表为空。')
+    # Sheet2: A缺失的B
+    write_word_sheet(wb, 'A缺失的B', 'A词表缺失的B词汇', results['a_missing_in_b'], 'A词表未缺失B词表中的词汇。')
+    # Sheet3: B缺失的A
+    write_word_sheet(wb, 'B缺失的A', 'B词表缺失的A词汇', results['b_missing_in_a'], 'B词表未缺失A词表中的词汇。')
+    wb.save(output_path)
+
+def make_list_names(files: List[str]) -> List[str]:
+    """用文件名（不含扩展名）作为词表名称，重名时追加序号"""
+    names, seen = [], {}
+    for f in files:
+        name = os.path.splitext(os.path.basename(f))[0] or "词表"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}({seen[name]})")
+    return names
+
+def compare_multiple_vocabularies(files: List[str]) -> Dict:
+    """N 个词表对照：一次遍历为每个词汇记录一个位掩码（第 i 位表示出现在第 i 个词表中），
+    由掩码直接得到出现矩阵、合并词表、共有词汇和各词表独有词汇"""
+    if len(files) < 2:
+        raise ValueError("至少需要选择两个词表")
+    word_sets = extract_word_sets(files)
+
+    presence: Dict[str, int] = {}
+    for i, words in enumerate(word_sets):
+        bit = 1 << i
+        for word in words:
+            presence[word] = presence.get(word, 0) | bit
+
+    full_mask = (1 << len(files)) - 1
+    unique_sets: List[Set[str]] = [set() for _ in files]
+    common_words = set()
+    for word, mask in presence.items():
+        if mask == full_mask:
+            common_words.add(word)
+        elif mask & (mask - 1) == 0:  # 只有一位为1：仅出现在一个词表中
+            unique_sets[mask.bit_length() - 1].add(word)
+
+    return {
+        'names': make_list_names(files),
+        'counts': [len(words) for words in word_sets],
+        'presence': presence,
+        'common_words': common_words,
+        'unique_words': unique_sets,
+    }
+
+def make_sheet_title(name: str, used: Set[str]) -> str:
+    """生成合法且不重复的工作表名称（去除非法字符，最长31个字符）"""
+    base = re.sub(r'[\\/*?:\[\]]', '_', name)[:31] or "Sheet"
+    title, n = base, 1
+    while title in used:
+        n += 1
+        suffix = f"_{n}"
+        title = base[:31 - len(suffix)] + suffix
+    used.add(title)
+    return title
+
+def write_multi_to_excel(results: Dict, output_path: str):
+    """将 N 个词表的对照结果写入同一个工作簿"""
+    names = results['names']
+    presence = results['presence']
+    wb = openpyxl.Workbook(write_only=True)
+    used_titles = set()
+
+    # 统计
+    ws = wb.create_sheet(title=make_sheet_title('统计', used_titles))
+    ws.append(['词表', '词汇数量', '独有词汇数量'])
+    for name, count, unique in zip(names, results['counts'], results['unique_words']):
+        ws.append([name, count, len(unique)])
+    ws.append(['合并词表', len(presence), None])
+    ws.append(['所有词表共有', len(results['common_words']), None])
+
+    # 出现矩阵：每个词汇在各词表中是否出现，以及出现的词表数
+    ws = wb.create_sheet(title=make_sheet_title('出现矩阵', used_titles))
+    ws.append(['词汇'] + names + ['出现词表数'])
+    bits = [1 << i for i in range(len(names))]
+    for word in sorted(presence):
+        mask = presence[word]
+        ws.append([word] + ['✓' if mask & bit else '' for bit in bits] + [bin(mask).count('1')])
+
+    write_word_sheet(wb, make_sheet_title('合并词表', used_titles), '合并词表', presence.keys(), '合并词表为空。')
+    write_word_sheet(wb, make_sheet_title('共有词汇', used_titles), '所有词表共有的词汇',
+                     results['common_words'], '没有所有词表共有的词汇。')
+    for name, unique in zip(names, results['unique_words']):
+        write_word_sheet(wb, make_sheet_title(f"仅{name}", used_titles), f"仅出现在 {name} 中的词汇",
+                         unique, f"{name} 没有独有的词汇。")
+    wb.save(output_path)
 
 class VocabularyComparisonProcessor(QObject):
     """词表对照处理器"""
@@ -201,3 +328,32 @@ class VocabularyComparisonProcessor(QObject):
             self.finished.emit(error_message, 0, 0, 0, 0, 0)
         except Exception as e:
             self.finished.emit(f"错误: {str(e)}", 0, 0, 0, 0, 0)
+
+class MultiVocabularyComparisonProcessor(QObject):
+    """多词表对照处理器"""
+    finished = Signal(str, list)  # output_path（或错误信息）, 统计信息行
+
+    def __init__(self, files: List[str], output_dir: str):
+        super().__init__()
+        self.files = files
+        self.output_dir = output_dir
+
+    def run(self):
+        output_path = ""
+        try:
+            results = compare_multiple_vocabularies(self.files)
+            today_str = datetime.today().strftime('%Y-%m-%d')
+            output_filename = f"多词表对照结果_{today_str}.xlsx"
+            output_path = os.path.join(self.output_dir, output_filename)
+            write_multi_to_excel(results, output_path)
+            summary = [
+                f"{name}: 词汇 {count} 个，独有 {len(unique)} 个"
+                for name, count, unique in zip(results['names'], results['counts'], results['unique_words'])
+            ]
+            summary.append(f"合并词表词汇数量: {len(results['presence'])}")
+            summary.append(f"所有词表共有词汇数量: {len(results['common_words'])}")
+            self.finished.emit(output_path, summary)
+        except PermissionError:
+            self.finished.emit(f"错误: 无法写入文件 '{output_path}'。请关闭该文件后重试。", [])
+        except Exception as e:
+            self.finished.emit(f"错误: {str(e)}", [])
@@ -1,10 +1,10 @@
-import sys
-import os
 import time
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.edge.options import Options
 
+from utils.edge_version import edge_version_resolver
+
 # 导入驱动管理器
 try:
     from utils.driver_manager import driver_manager
@@ -33,6 +33,24 @@ class WebDriverHelper:
     """WebDriver辅助类：提供统一的WebDriver创建和管理功能"""
     
     _initialized = False
+
+    # 浏览器配置档：default 为常规浏览器；lean 为精简模式，不加载图片/媒体/字体/统计脚本，
+    # 使用 eager 页面加载策略（DOM 就绪即返回），适合只读取页面文本的爬虫
+    PROFILE_DEFAULT = "default"
+    PROFILE_LEAN = "lean"
+
+    # lean 模式下通过 CDP 拦截的请求（Network.setBlockedURLs 通配符格式）
+    LEAN_BLOCKED_URLS = [
+        # 图片
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.bmp", "*.svg", "*.ico",
+        # 音视频
+        "*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mp3", "*.flv",
+        # 字体
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        # 第三方统计/广告
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*hm.baidu.com*", "*cnzz.com*", "*umeng.com*",
+    ]
     
     @classmethod
     def init(cls):
@@ -46,53 +64,62 @@ class WebDriverHelper:
     
     @staticmethod
     def get_edge_version():
-        """获取Edge浏览器版本"""
+        """获取Edge浏览器版本（进程内缓存，浏览器更新后自动重新探测）"""
         try:
-            # 尝试从注册表获取Edge版本
-            if sys.platform == 'win32':
-                import winreg
-                try:
-                    key_path = r"Software\\Microsoft\\Edge\\BLBeacon"
-                    with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_READ) as key:
-                        version, _ = winreg.QueryValueEx(key, "version")
-                        if version:
-                            return version
-                except:
-                    pass
-                    
-                try:
-                    key_path = r"Software\\Microsoft\\Edge\\BLBeacon"
-                    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
-                        version, _ = winreg.QueryValueEx(key, "version")
-                        if version:
-                            return version
-                except:
-                    pass
-            
-            # 尝试使用命令行方法获取版本
-            if sys.platform == 'win32':
-                import subprocess
-                try:
-                    edge_path = "C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe"
-                    if not os.path.exists(edge_path):
-                        edge_path = "C:\\Program Files\\Microsoft\\Edge\\Application\\msedge.exe"
-                    
-                    if os.path.exists(edge_path):
-                        command = f"(Get-Item \"{edge_path}\").VersionInfo.ProductVersion"
-                        result = subprocess.run(["powershell", "-Command", command], 
-                                                capture_output=True, text=True, check=True)
-                        version = result.stdout.strip()
-                        if version:
-                            return version
-                except:
-                    pass
-        except:
-            pass
-            
-        return None
+            return edge_version_resolver.get_version()
+        except Exception:
+            return None
     
     @staticmethod
-    def create_driver(options=None, headless=True, progress_callback=None, filter_messages=True):
+    def apply_profile(options, profile=None):
+        """将浏览器配置档应用到选项上，返回该选项对象"""
+        if profile != WebDriverHelper.PROFILE_LEAN:
+            return options
+
+        # DOM 就绪即返回，不等待图片、样式表等子资源
+        options.page_load_strategy = 'eager'
+
+        # 通过内容设置禁止加载图片、通知、媒体设备等（与调用方已有的 prefs 合并）
+        prefs = dict(options.experimental_options.get("prefs", {}))
+        prefs.update({
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.media_stream": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+        })
+        options.add_experimental_option("prefs", prefs)
+
+        for arg in (
+            "--blink-settings=imagesEnabled=false",
+            "--mute-audio",
+            "--disable-extensions",
+            "--disable-gpu",
+            "--disable-background-networking",
+            "--disable-sync",
+            "--disable-default-apps",
+            "--disable-component-update",
+            "--no-first-run",
+            "--disable-features=Translate,MediaRouter,OptimizationHints",
+        ):
+            if arg not in options.arguments:
+                options.add_argument(arg)
+        return options
+
+    @staticmethod
+    def enable_url_blocking(driver, patterns=None):
+        """通过 CDP 拦截指定URL（默认拦截图片/媒体/字体/统计脚本），失败时忽略"""
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs",
+                                   {"urls": patterns or WebDriverHelper.LEAN_BLOCKED_URLS})
+            return True
+        except Exception as e:
+            print(f"启用请求拦截失败: {str(e)}")
+            return False
+
+    @staticmethod
+    def create_driver(options=None, headless=True, progress_callback=None, filter_messages=True,
+                      profile=None, use_standby=True):
         """创建WebDriver实例
         
         Args:
@@ -100,6 +127,8 @@ class WebDriverHelper:
             headless: 是否使用无头模式
             progress_callback: 进度回调函数，接收(message, percent)参数
             filter_messages: 是否过滤和简化消息输出
+            profile: 浏览器配置档，PROFILE_DEFAULT（默认）或 PROFILE_LEAN（精简模式）
+            use_standby: 是否优先使用配置兼容的预热待命浏览器（见 utils/browser_standby.py）
             
         Returns:
             WebDriver实例或None
@@ -132,12 +161,28 @@ class WebDriverHelper:
             # 添加禁用自动化控制特征的选项
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option('useAutomationExtension', False)
+        elif headless and not any(arg.startswith("--headless") for arg in options.arguments):
+            # 调用方传入自定义选项时同样遵循 headless 参数
+            options.add_argument("--headless")
+
+        # 应用浏览器配置档
+        WebDriverHelper.apply_profile(options, profile)
+
+        # 有兼容的预热浏览器时直接使用，省去冷启动
+        if use_standby:
+            from utils.browser_standby import browser_standby
+            driver = browser_standby.acquire(options)
+            if driver is not None:
+                update_progress("浏览器实例创建成功！（使用预热的待命浏览器）", 30)
+                return driver
         
         # 尝试获取Edge版本
         edge_version = WebDriverHelper.get_edge_version()
         update_progress(f"检测到Edge浏览器版本: {edge_version or '未知'}", 8)
         
-        # 尝试创建WebDriver
+        # 尝试创建WebDriver（失败时只清理本次启动的驱动服务及其浏览器）
+        driver = None
+        edge_service = None
         try:
             update_progress("正在初始化Edge浏览器...", 5)
             
@@ -148,7 +193,6 @@ class WebDriverHelper:
             update_progress(f"WebDriver缓存文件: {cache_file}", 7)
             
             # 从驱动管理器获取WebDriver服务
-            edge_service = None
             if driver_manager.is_initialized():
                 # 检查版本匹配
                 if edge_version and not driver_manager.version_matches(edge_version):
@@ -204,8 +248,9 @@ class WebDriverHelper:
                 start_time = time.time()
                 
                 try:
+                    edge_service = EdgeService(driver_path)
                     driver = webdriver.Edge(
-                        service=EdgeService(driver_path),
+                        service=edge_service,
                         options=options
                     )
                     elapsed_time = time.time() - start_time
@@ -219,16 +264,20 @@ class WebDriverHelper:
                         update_progress(f"缓存WebDriver配置时出错: {str(cache_e)}", 35)
                 except Exception as driver_e:
                     update_progress(f"创建WebDriver实例失败: {str(driver_e)}", 0)
-                    # 尝试强制关闭所有msedgedriver进程
-                    WebDriverHelper.kill_msedgedriver()
+                    # 只关闭本次启动的msedgedriver进程
+                    WebDriverHelper.kill_msedgedriver(service=edge_service)
                     update_progress("已尝试清理msedgedriver进程", 0)
                     raise  # 重新抛出异常
+
+            # 精简模式下再通过 CDP 拦截图片/媒体/字体/统计脚本请求
+            if profile == WebDriverHelper.PROFILE_LEAN:
+                WebDriverHelper.enable_url_blocking(driver)
             
             return driver
         except Exception as e:
             update_progress(f"创建WebDriver时出错: {str(e)}", 0)
-            # 尝试强制关闭所有msedgedriver进程
-            WebDriverHelper.kill_msedgedriver()
+            # 只关闭本次启动的msedgedriver进程及其浏览器
+            WebDriverHelper.kill_msedgedriver(driver=driver, service=edge_service)
             return None
     
     @staticmethod
@@ -243,43 +292,13 @@ class WebDriverHelper:
         return False
     
     @staticmethod
-    def kill_msedgedriver():
-        """终止所有msedgedriver进程"""
+    def kill_msedgedriver(driver=None, service=None):
+        """终止指定 driver / 驱动服务的msedgedriver进程及其浏览器（不影响其他任务、待命浏览器和其他程序的进程）"""
         try:
-            # 在Windows上使用taskkill
-            if sys.platform == 'win32':
-                try:
-                    import subprocess
-                    # 使用tasklist检查是否有msedgedriver进程
-                    cmd = 'tasklist /FI "IMAGENAME eq msedgedriver.exe" /FO CSV /NH'
-                    output = subprocess.check_output(cmd, shell=True, text=True)
-                    if 'msedgedriver.exe' in output:
-                        # 如果进程存在，强制终止
-                        subprocess.call('taskkill /f /im msedgedriver.exe', 
-                                    shell=True, stdout=subprocess.DEVNULL, 
-                                    stderr=subprocess.DEVNULL)
-                        print("已终止msedgedriver.exe进程 (通过taskkill)")
-                except Exception as e:
-                    print(f"使用taskkill终止msedgedriver进程时出错: {str(e)}")
-            
-            # 使用psutil逐个终止进程 (跨平台方案)
-            try:
-                import psutil
-                terminated = 0
-                for proc in psutil.process_iter(['pid', 'name']):
-                    try:
-                        process_name = proc.info.get('name', '').lower()
-                        if 'msedgedriver' in process_name:
-                            proc.kill()
-                            terminated += 1
-                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                        pass
-                
-                if terminated > 0:
-                    print(f"已终止 {terminated} 个msedgedriver进程 (通过psutil)")
-            except Exception as e:
-                print(f"使用psutil终止msedgedriver进程时出错: {str(e)}")
-            
+            from utils.task_manager import task_manager
+            count = task_manager.kill_driver_processes(drivers=[driver], services=[service])
+            if count > 0:
+                print(f"已终止 {count} 个WebDriver相关进程")
             return True
         except Exception as e:
             print(f"终止msedgedriver进程时出错: {str(e)}")
@@ -31,6 +31,8 @@ from utils.version_checker import VersionChecker, VersionCheckWorker
 from interfaces.large_model_optimization_interface import LargeModelOptimizationInterface
 from PySide6.QtCore import QThread
 from interfaces.copyright_query_interface import CopyrightQueryInterface
+from utils.webdriver_helper import WebDriverHelper
+from utils.browser_standby import browser_standby
 
 
 def resource_path(relative_path):
@@ -176,6 +178,10 @@ class MainWindow(FramelessWindow):
 
     def switch_to(self, widget):
         self.stackWidget.setCurrentWidget(widget)
+        # 进入新游爬虫/版号匹配页面时在后台预热待命浏览器，用户设置参数期间完成启动，点击开始后直接使用。
+        # 著作权人查询需要可见窗口供用户登录，且每次使用随机 User-Agent，无法使用待命浏览器，不为其预热
+        if widget in (self.crawlerInterface, self.versionMatchingInterface):
+            browser_standby.start(WebDriverHelper.PROFILE_LEAN)
 
     def set_navigation_enabled(self, enabled: bool):
         """启用或禁用导航栏"""